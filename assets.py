@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# Static asset pipeline: the app's own CSS (static/src) and the vendored
+# Bootstrap, Font Awesome and Socket.IO client (static/vendor, fetched once)
+# are built into static/dist with content-hashed names, so they can be
+# cached for a year and a change always gets a new URL. CSS is purged of
+# rules whose classes no template uses, fonts it references are hashed too,
+# and every file gets gzip (and, with the brotli module, brotli) variants.
+#   python assets.py --fetch   on a machine with internet access, once
+#   python assets.py           rebuild static/dist (main.py does this too)
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+import urllib.parse
+import urllib.request
+
+from flask import Blueprint, abort, request, send_file
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_AGE = 365 * 24 * 3600  # Hashed names never change content
+
+# Vendored assets and the CDN they come from. Until static/dist is built,
+# pages fall back to these URLs.
+VENDOR = {
+    "bootstrap.css": "https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css",
+    "fontawesome.css": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.3/css/all.min.css",
+    "socket.io.js": "https://cdn.socket.io/4.7.5/socket.io.min.js",
+}
+
+CSS_URL = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+
+
+# Built assets: url(name) maps a logical name ("bootstrap.css") to its
+# hashed URL under /assets. The manifest is swapped in whole after a build,
+# so pages rendered during a rebuild still get a consistent set.
+class Assets:
+
+    def __init__(self, root=os.path.join(BASE_DIR, "static"),
+                 templates=os.path.join(BASE_DIR, "templates"), prefix="/assets"):
+        self.src = os.path.join(root, "src")
+        self.vendor = os.path.join(root, "vendor")
+        self.dist = os.path.join(root, "dist")
+        self.templates = templates
+        self.prefix = prefix
+        self.manifest = {}  # logical name -> hashed file name in dist
+        self.files = frozenset()
+        self.generation = 0  # Bumped whenever the manifest changes
+        self.load()
+
+    def load(self):
+        try:
+            with open(os.path.join(self.dist, "manifest.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.manifest = manifest
+        self.files = frozenset(manifest.values())
+        self.generation += 1
+        return True
+
+    def url(self, name):
+        hashed = self.manifest.get(name)
+        if hashed is not None:
+            return f"{self.prefix}/{hashed}"
+        if name in VENDOR:
+            return VENDOR[name]
+        return f"/static/src/{name}"
+
+    def _sources(self):
+        for directory in (self.src, self.vendor, self.templates):
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    yield os.path.join(dirpath, filename)
+
+    def stale(self):
+        try:
+            built = os.path.getmtime(os.path.join(self.dist, "manifest.json"))
+        except OSError:
+            return True
+        return any(os.path.getmtime(path) > built for path in self._sources())
+
+    def ensure_built(self):
+        if self.stale():
+            self.build()
+        return self
+
+    # Words that may be class names: anything word-like in the templates
+    # (inline scripts included), as the purge has to keep classes that are
+    # only toggled from JavaScript
+    def _content_words(self):
+        words = set()
+        for dirpath, _, filenames in os.walk(self.templates):
+            for filename in filenames:
+                with open(os.path.join(dirpath, filename), encoding="utf-8") as f:
+                    words.update(re.findall(r"[A-Za-z0-9_-]+", f.read()))
+        return words
+
+    def build(self):
+        os.makedirs(self.dist, exist_ok=True)
+        words = self._content_words()
+        manifest, report = {}, []
+        for directory in (self.src, self.vendor):
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                path = os.path.join(directory, filename)
+                if not os.path.isfile(path):
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                size = len(data)
+                if filename.endswith(".css"):
+                    css = purge_css(data.decode("utf-8"), words)
+                    css = self._hash_references(css, os.path.dirname(path), manifest, report)
+                    data = css.encode("utf-8")
+                manifest[filename] = self._write(filename, data)
+                report.append((filename, size, len(data)))
+        self._write_file("manifest.json", json.dumps(manifest, indent=1, sort_keys=True).encode())
+        self.manifest = manifest
+        self.files = frozenset(manifest.values())
+        self.generation += 1
+        for filename in os.listdir(self.dist):
+            if filename != "manifest.json" and \
+                    filename.removesuffix(".gz").removesuffix(".br") not in self.files:
+                os.remove(os.path.join(self.dist, filename))
+        return report
+
+    # Fonts and images a stylesheet points at are built as well and the
+    # url() rewritten to their hashed names (everything lives in one folder)
+    def _hash_references(self, css, directory, manifest, report):
+        def replace(match):
+            ref = match.group(2)
+            if ref.startswith(("data:", "http:", "https:", "//", "#")):
+                return match.group(0)
+            path_part = re.split(r"[?#]", ref, 1)[0]
+            suffix = ref[len(path_part):]
+            path = os.path.normpath(os.path.join(directory, path_part))
+            if not os.path.isfile(path):
+                return match.group(0)
+            name = os.path.relpath(path, directory).replace(os.sep, "/")
+            if name not in manifest:
+                with open(path, "rb") as f:
+                    data = f.read()
+                manifest[name] = self._write(os.path.basename(path), data)
+                report.append((name, len(data), len(data)))
+            return f"url({manifest[name]}{suffix})"
+        return CSS_URL.sub(replace, css)
+
+    def _write(self, filename, data):
+        stem, ext = os.path.splitext(filename)
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        if not os.path.exists(os.path.join(self.dist, hashed)):
+            self._write_file(hashed, data)
+            for suffix, compressed in compress(data).items():
+                self._write_file(hashed + suffix, compressed)
+        return hashed
+
+    def _write_file(self, filename, data):
+        path = os.path.join(self.dist, filename)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    # Download the CDN assets into static/vendor; files a stylesheet
+    # references (webfonts) go to static/vendor/fonts
+    def fetch(self):
+        os.makedirs(os.path.join(self.vendor, "fonts"), exist_ok=True)
+        for name, url in VENDOR.items():
+            data = _download(url)
+            if name.endswith(".css"):
+                def localise(match, base=url):
+                    ref = match.group(2)
+                    if ref.startswith("data:"):
+                        return match.group(0)
+                    path_part = re.split(r"[?#]", ref, 1)[0]
+                    local = "fonts/" + os.path.basename(path_part)
+                    target = os.path.join(self.vendor, local)
+                    if not os.path.exists(target):
+                        with open(target, "wb") as f:
+                            f.write(_download(urllib.parse.urljoin(base, path_part)))
+                    return f"url({local}{ref[len(path_part):]})"
+                data = CSS_URL.sub(localise, data.decode("utf-8")).encode("utf-8")
+            with open(os.path.join(self.vendor, name), "wb") as f:
+                f.write(data)
+            print(f"Fetched {name} ({len(data):,} bytes)")
+
+
+def _download(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+
+# Precompressed variants, kept only where they are smaller
+def compress(data):
+    variants = {".gz": gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass  # Optional; browsers then get gzip
+    else:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+# Drop style rules whose selectors name a class that is not in words, then
+# @font-face blocks for font families no remaining rule uses. Comments and
+# whitespace are removed on the way.
+def purge_css(css, words):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = _purge_rules(css, words)
+    families = " ".join(re.findall(r"font(?:-family)?:([^;}]*)",
+                                   re.sub(r"@font-face\{[^}]*\}", "", css)))
+
+    def keep_font(match):
+        family = re.search(r"font-family:\s*['\"]?([^;'\"}]+)", match.group(1))
+        return match.group(0) if family is None or family.group(1) in families else ""
+
+    return re.sub(r"@font-face\{([^}]*)\}", keep_font, css)
+
+
+def _purge_rules(css, words):
+    out = []
+    for prelude, body in _blocks(css):
+        prelude = re.sub(r"\s+", " ", prelude)
+        if body is None:
+            out.append(prelude)
+        elif prelude.startswith(("@media", "@supports")):
+            inner = _purge_rules(body, words)
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            out.append(f"{prelude}{{{_minify(body)}}}")  # @font-face, @keyframes, @page
+        else:
+            selectors = [s.strip() for s in _split_selectors(prelude) if _used(s, words)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{_minify(body)}}}")
+    return "".join(out)
+
+
+# Top-level (prelude, body) pairs of a stylesheet; statements such as
+# @charset come back with a body of None
+def _blocks(css):
+    blocks = []
+    start = open_at = depth = i = 0
+    quote = None
+    while i < len(css):
+        c = css[i]
+        if c == "\\":
+            i += 2
+            continue
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c == "{":
+            if depth == 0:
+                open_at = i
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:open_at].strip(), css[open_at + 1:i]))
+                start = i + 1
+        elif c == ";" and depth == 0:
+            blocks.append((css[start:i + 1].strip(), None))
+            start = i + 1
+        i += 1
+    return blocks
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, c in enumerate(prelude):
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "," and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+# A selector is used when every class it requires appears in the content;
+# classes only inside :not() or attribute selectors are not required
+def _used(selector, words):
+    selector = re.sub(r":not\([^)]*\)|\[[^\]]*\]", "", selector)
+    classes = re.findall(r"\.((?:\\.|[\w-])+)", selector)
+    return all(name.replace("\\", "") in words for name in classes)
+
+
+def _minify(body):
+    body = re.sub(r"\s+", " ", body).strip()
+    return re.sub(r"\s*([{};,:])\s*", r"\1", body)
+
+
+# Serve static/dist at /assets: hashed files only, with far-future caching
+# and the precompressed variant the client accepts
+def create_blueprint(assets, name="assets"):
+    blueprint = Blueprint(name, __name__)
+
+    @blueprint.route(f"{assets.prefix}/<filename>")
+    def asset(filename):
+        if filename not in assets.files:
+            abort(404)
+        path = os.path.join(assets.dist, filename)
+        encoding = None
+        for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if request.accept_encodings[candidate] and os.path.exists(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_file(path, mimetype=mimetype, download_name=filename, max_age=MAX_AGE,
+                             conditional=True)
+        response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}, immutable"
+        response.vary.add("Accept-Encoding")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+    return blueprint
+
+
+# Serve the built assets and give templates asset_url(name)
+def register_assets(app, assets):
+    app.register_blueprint(create_blueprint(assets))
+    app.add_template_global(assets.url, "asset_url")
+
+
+def main():
+    assets = Assets()
+    if "--fetch" in sys.argv[1:]:
+        assets.fetch()
+    for name, size, built in assets.build():
+        path = os.path.join(assets.dist, assets.manifest[name])
+        variants = "  ".join(f"{suffix} {os.path.getsize(path + suffix):>9,}"
+                             for suffix in (".gz", ".br") if os.path.exists(path + suffix))
+        print(f"{name:<28} {size:>9,} -> {built:>9,}  {variants}")
+
+
+if __name__ == "__main__":
+    main()
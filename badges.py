@@ -0,0 +1,244 @@
+import collections
+import json
+import os
+import queue
+import threading
+import time
+
+
+Badge = collections.namedtuple("Badge", "uid name role active")
+
+
+# Turn one 'Badges/<uid>' value into a Badge: {"name", "role", "active"},
+# a role string, or true. false/null means the badge is not authorized.
+def parse_badge(uid, value):
+    if isinstance(value, dict):
+        return Badge(uid, value.get("name"), value.get("role", "user"), bool(value.get("active", True)))
+    if isinstance(value, str):
+        return Badge(uid, None, value, True)
+    if value is True:
+        return Badge(uid, None, "user", True)
+    return None
+
+
+# Authorized RFID badges, indexed by UID string.
+# The index is loaded from a local JSON file at start (badges known offline)
+# and, once attach() gets the 'Badges' reference, replaced by the database
+# copy and kept current by its listener; every full snapshot is written back
+# to the file. Lookups are one dict access. Until the listener has delivered
+# a snapshot a miss falls back to a point read of 'Badges/<uid>', and a miss
+# there is cached for negative_ttl seconds so a stranger's tag resting on
+# the reader costs one round trip, not one per poll (the max_negative most
+# recent misses are kept). An empty or deleted 'Badges' node means no badges;
+# the defaults only apply until the first file or database copy exists.
+#
+# record() queues audit events; the writer thread started by start() hands
+# them in batches to audit(values), e.g. the sync queue's enqueue_many, under
+# '<audit_prefix>/<uid>/<ms>-<seq>'.
+class BadgeStore:
+
+    def __init__(self, path=None, defaults=None, negative_ttl=60.0, max_negative=1024,
+                 audit=None, audit_prefix="Badge Audit", audit_batch=100, clock=time.monotonic):
+        self.path = path
+        self.defaults = dict(defaults or {})
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self.audit = audit
+        self.audit_prefix = audit_prefix
+        self.audit_batch = audit_batch
+        self.clock = clock
+        self.ref = None
+        self.live = False  # Listener has delivered the database copy
+
+        self._raw = {}      # uid -> value as stored in the database
+        self._index = {}    # uid -> Badge
+        self._negative = collections.OrderedDict()  # uid -> monotonic expiry, oldest first
+        self._lock = threading.Lock()
+        self._listener = None
+        self._audit_queue = queue.Queue(maxsize=10000)
+        self._audit_thread = None
+        self._seq = 0
+        self.recent = collections.deque(maxlen=50)  # Last audit events, newest last
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.remote_lookups = 0
+        self.events = 0
+        self.audit_recorded = 0
+        self.audit_dropped = 0
+        self.audit_written = 0
+
+        source = self._load_file() if path else None
+        self._replace(source if source is not None else self.defaults)
+
+    def _load_file(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Badge file {self.path} unreadable: {e}")
+            return None
+
+    def _save_file(self, raw):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(raw, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Could not save badge file: {e}")
+
+    def _replace(self, raw):
+        index = {}
+        for uid, value in raw.items():
+            badge = parse_badge(str(uid), value)
+            if badge is not None:
+                index[badge.uid] = badge
+        with self._lock:
+            self._raw = dict(raw)
+            self._index = index
+            self._negative.clear()
+
+    def _set(self, uid, value):
+        with self._lock:
+            if value is None:
+                self._raw.pop(uid, None)
+            else:
+                self._raw[uid] = value
+            badge = parse_badge(uid, value)
+            if badge is None:
+                self._index.pop(uid, None)
+            else:
+                self._index[uid] = badge
+            self._negative.pop(uid, None)
+
+    def start(self):
+        if self._audit_thread is None:
+            self._audit_thread = threading.Thread(target=self._write_audit, daemon=True)
+            self._audit_thread.start()
+        return self
+
+    # Start following the database copy (the ref's database must be up)
+    def attach(self, ref):
+        self.ref = ref
+        if self._listener is None:
+            self._listener = ref.listen(self._on_event)
+        return self
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def _on_event(self, event):
+        # event.path is relative to 'Badges': "/" for everything, "/<uid>"
+        # or "/<uid>/<field>" for one badge
+        self.events += 1
+        parts = [p for p in event.path.split("/") if p]
+        if event.event_type == "patch":
+            for child, value in (event.data or {}).items():
+                self._apply(parts + [p for p in child.split("/") if p], value)
+        else:
+            self._apply(parts, event.data)
+
+    def _apply(self, parts, value):
+        if not parts:
+            # A null node is an empty badge list, so revoking the last badges
+            # sticks (also in the file, for offline starts)
+            raw = value if isinstance(value, dict) else {}
+            self._replace(raw)
+            self.live = True
+            if self.path:
+                self._save_file(raw)
+        elif len(parts) == 1:
+            self._set(parts[0], value)
+        else:
+            uid, field = parts[0], parts[1]
+            with self._lock:
+                current = self._raw.get(uid)
+            current = dict(current) if isinstance(current, dict) else {}
+            if value is None:
+                current.pop(field, None)
+            else:
+                current[field] = value
+            self._set(uid, current or None)
+
+    # The Badge for an authorized, active UID, or None
+    def authorize(self, uid):
+        uid = str(uid)
+        self.lookups += 1
+        badge = self._index.get(uid)
+        if badge is not None:
+            self.hits += 1
+            return badge if badge.active else None
+        if self.live or self.ref is None:
+            return None  # The index is complete
+        now = self.clock()
+        expiry = self._negative.get(uid)
+        if expiry is not None and expiry > now:
+            self.negative_hits += 1
+            return None
+        self.remote_lookups += 1
+        try:
+            value = self.ref.child(uid).get()
+        except Exception as e:
+            print(f"Badge lookup for {uid} failed: {e}")
+            return None
+        badge = parse_badge(uid, value)
+        if badge is None:
+            with self._lock:
+                self._negative[uid] = now + self.negative_ttl
+                self._negative.move_to_end(uid)
+                while len(self._negative) > self.max_negative:
+                    self._negative.popitem(last=False)
+            return None
+        self._set(uid, value)
+        return badge if badge.active else None
+
+    # Queue an audit event; never blocks the caller
+    def record(self, uid, event, **fields):
+        entry = dict(fields, event=event, t=time.time())
+        try:
+            self._audit_queue.put_nowait((str(uid), entry))
+            self.audit_recorded += 1
+        except queue.Full:
+            self.audit_dropped += 1
+
+    def _write_audit(self):
+        while True:
+            batch = [self._audit_queue.get()]
+            while len(batch) < self.audit_batch:
+                try:
+                    batch.append(self._audit_queue.get_nowait())
+                except queue.Empty:
+                    break
+            values = {}
+            for uid, entry in batch:
+                self._seq += 1
+                self.recent.append(dict(entry, uid=uid))
+                values[f"{self.audit_prefix}/{uid}/{int(entry['t'] * 1000)}-{self._seq}"] = entry
+            if self.audit is not None:
+                try:
+                    self.audit(values)
+                    self.audit_written += len(values)
+                except Exception as e:
+                    print(f"Badge audit write failed: {e}")
+
+    def metrics(self):
+        return {
+            "badges": len(self._index),
+            "live": self.live,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "negative_cached": len(self._negative),
+            "remote_lookups": self.remote_lookups,
+            "events": self.events,
+            "audit_recorded": self.audit_recorded,
+            "audit_dropped": self.audit_dropped,
+            "audit_written": self.audit_written,
+        }
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# Kiosk polling load on main.py (simulated hardware, RTDB emulator): clients
+# repeatedly fetch a room's page, either as the rendered room.html or from
+# the JSON API revalidating with If-None-Match, while one room's count keeps
+# changing. Reports requests/s, latency and how many API polls were 304s.
+#   python bench_api.py [rooms] [clients] [polls_per_client]
+
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("INVENTORY_HARDWARE", "sim")
+
+import main  # noqa: E402  (the backend is chosen at import)
+
+
+def poll(client, path, polls, use_etag, latencies, statuses):
+    etag = None
+    for _ in range(polls):
+        headers = {"If-None-Match": etag} if use_etag and etag else {}
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+        etag = response.headers.get("ETag") or etag
+
+
+def churn(stop):
+    while not stop.is_set():
+        main.change_count(0, 1)
+        main.change_count(0, -1)
+        time.sleep(0.01)
+
+
+def run(label, paths, polls, use_etag):
+    stop = threading.Event()
+    churner = threading.Thread(target=churn, args=(stop,))
+    latencies, statuses = [], []
+    threads = [threading.Thread(target=poll, args=(main.app.test_client(), path, polls, use_etag,
+                                                   latencies, statuses)) for path in paths]
+    start = time.perf_counter()
+    churner.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    churner.join()
+    latencies.sort()
+    n = len(latencies)
+    print(f"{label:<22} {n / elapsed:8,.0f} req/s  p50 {latencies[n // 2] * 1000:6.2f} ms  "
+          f"p99 {latencies[int(n * 0.99)] * 1000:6.2f} ms  304s {statuses.count(304) / n:5.1%}")
+
+
+def main_bench():
+    room_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    polls = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    main.boot.wait('initial fetch', 10)
+    for i in range(len(main.rooms), room_count):
+        main.rooms.add(f"Room {i + 1}", count=20)
+    room_ids = [1 + i % (room_count - 1) for i in range(clients)]  # Room 0 is churning
+
+    run("room.html", [f"/enter/{i}" for i in room_ids], polls, False)
+    run("/api/rooms/<id>", [f"/api/rooms/{i}" for i in room_ids], polls, True)
+    run("/api/rooms (all)", ["/api/rooms"] * clients, polls, True)
+    run("/api/rooms range", [f"/api/rooms?start={(i // 30) * 30 + 30}&limit=30" for i in room_ids],
+        polls, True)
+    main.shutdown()
+
+
+if __name__ == "__main__":
+    main_bench()
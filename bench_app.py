@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# Load test of the real app (main.py) on simulated hardware and the RTDB
+# emulator: concurrent clients enter rooms and press add/remove through the
+# Flask routes while the buttons are hammered on the simulated GPIO.
+#   python bench_app.py [clients] [requests_per_client] [--profile]
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+os.environ.setdefault("INVENTORY_HARDWARE", "sim")
+
+import main  # noqa: E402  (the backend is chosen at import)
+
+
+profiles = []  # One profiler per client thread with --profile
+
+
+def client_run(room_id, requests, latencies):
+    if "--profile" in sys.argv:
+        profiler = cProfile.Profile()
+        profiles.append(profiler)
+        profiler.runcall(client_requests, room_id, requests, latencies)
+    else:
+        client_requests(room_id, requests, latencies)
+
+
+def client_requests(room_id, requests, latencies):
+    client = main.app.test_client()
+    client.get(f"/enter/{room_id}")
+    for i in range(requests):
+        start = time.perf_counter()
+        response = client.post("/update", data={
+            "room_id": room_id, "action": "add" if i % 2 == 0 else "remove"})
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            print(f"HTTP {response.status_code}")
+
+
+def press_buttons(gpio, stop):
+    while not stop.is_set():
+        gpio.press(main.button_add, hold=0.01)
+        gpio.press(main.button_remove, hold=0.01)
+        time.sleep(0.03)
+
+
+def main_bench():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    clients = int(args[0]) if args else 8
+    per_client = int(args[1]) if len(args) > 1 else 200
+    gpio = main.hardware.gpio
+    writes_before = gpio.writes
+
+    stop = threading.Event()
+    buttons = threading.Thread(target=press_buttons, args=(gpio, stop), daemon=True)
+    latencies = []
+    pool = [threading.Thread(target=client_run, args=(i % len(main.rooms), per_client, latencies))
+            for i in range(clients)]
+    start = time.perf_counter()
+    buttons.start()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    buttons.join()
+
+    latencies.sort()
+    n = len(latencies)
+    print(f"{n} requests from {clients} clients in {elapsed:.2f}s = {n / elapsed:,.0f} req/s")
+    print(f"latency p50 {latencies[n // 2] * 1000:.2f} ms, p99 {latencies[int(n * 0.99)] * 1000:.2f} ms, "
+          f"max {latencies[-1] * 1000:.2f} ms")
+    print(f"gpio writes {gpio.writes - writes_before:,}, button presses "
+          f"{sum(b.presses for b in main.button_inputs)}, display {main.display.metrics()}")
+    print(f"database requests {main.db.requests}, sync {main.sync_queue.metrics()['flushes']} flushes")
+    main.shutdown()
+    if profiles:
+        pstats.Stats(*profiles).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main_bench()
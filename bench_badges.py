@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# Badge authorization lookups: the old list of UID strings with a linear
+# `in` against BadgeStore's dict index, for hits and misses, plus the cost
+# of a live update arriving through the emulated database listener.
+#   python bench_badges.py [badges] [lookups]
+
+import random
+import sys
+import time
+
+from badges import BadgeStore
+from rtdb_emulator import EmulatedDatabase
+
+
+def timed(fn, uids):
+    start = time.perf_counter()
+    for uid in uids:
+        fn(uid)
+    return (time.perf_counter() - start) * 1e6 / len(uids)
+
+
+def main_bench():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    rng = random.Random(1)
+    uids = [str(rng.randrange(10 ** 11, 10 ** 12)) for _ in range(count)]
+    badges = {uid: {"name": f"User {i}", "role": "staff"} for i, uid in enumerate(uids)}
+
+    db = EmulatedDatabase(data={"Badges": badges})
+    store = BadgeStore().attach(db.reference("Badges"))
+    valid_uid = list(uids)
+
+    hits = [rng.choice(uids) for _ in range(lookups)]
+    misses = [str(rng.randrange(10 ** 11)) for _ in range(lookups)]
+    print(f"{count} badges, {lookups} lookups each")
+    print(f"list `in`      hit {timed(lambda uid: uid in valid_uid, hits):8.2f} us   "
+          f"miss {timed(lambda uid: uid in valid_uid, misses):8.2f} us")
+    print(f"BadgeStore     hit {timed(store.authorize, hits):8.2f} us   "
+          f"miss {timed(store.authorize, misses):8.2f} us")
+
+    start = time.perf_counter()
+    db.reference(f"Badges/{uids[0]}/active").set(False)
+    db.wait_events()
+    print(f"revocation applied in {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"authorized afterwards: {store.authorize(uids[0]) is not None}")
+    print(store.metrics())
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# Restocking many rooms at once on main.py (simulated hardware, RTDB
+# emulator with a network delay): the same changes sent as one /update
+# request per room and item, then as a single /api/rooms/batch request.
+# Reports the client-side time, the database requests needed until every
+# change reached the emulator, and the Socket.IO messages to dashboards.
+#   python bench_batch.py [rooms] [items_per_room] [latency_ms]
+
+import os
+import sys
+import time
+
+os.environ.setdefault("INVENTORY_HARDWARE", "sim")
+
+import main  # noqa: E402  (the backend is chosen at import)
+
+
+def settle(db, expected, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        db.wait_events()
+        if db.data.get("Total Items") == expected and not main.sync_status()["pending_paths"] \
+                and not main.counter_sync.metrics()["pending_paths"]:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def run(label, db, client, send, expected):
+    emitted = []
+    emit = main.socketio.emit
+    main.socketio.emit = lambda event, *args, **kwargs: emitted.append(event)
+    requests = db.requests
+    start = time.perf_counter()
+    send(client)
+    sent = time.perf_counter() - start
+    ok = settle(db, expected)
+    main.socketio.emit = emit
+    print(f"{label:<12} sent in {sent * 1000:8.1f} ms   synced {ok}   "
+          f"database requests {db.requests - requests:5}   "
+          f"dashboard messages {sum(1 for e in emitted if e in ('count', 'counts')):5}")
+
+
+def main_bench():
+    room_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 5) / 1000
+    main.boot.wait('initial fetch', 10)
+    db = main.database.result()
+    for i in range(len(main.rooms), room_count):
+        main.rooms.add(f"Room {i + 1}", count=10)
+    main.sync_queue.enqueue_many(main.rooms.sync_payload())
+    settle(db, {main.rooms.name(i): main.rooms.count(i) for i in range(len(main.rooms))})
+    db.latency = latency
+    client = main.app.test_client()
+    room_ids = range(room_count)
+
+    def singles(client):
+        for room_id in room_ids:
+            for _ in range(items):
+                client.post("/update", data={"room_id": room_id, "action": "add"})
+            client.post("/update", data={"room_id": room_id, "action": "set", "quantity": 10 + items})
+
+    def batch(client):
+        ops = [{"room_id": room_id, "action": "add", "quantity": items} for room_id in room_ids]
+        ops += [{"room_id": room_id, "action": "set", "quantity": 10 + items * 2}
+                for room_id in room_ids]
+        response = client.post("/api/rooms/batch", json={"ops": ops})
+        assert response.status_code == 200, response.get_json()
+
+    run("one by one", db, client, singles, {main.rooms.name(i): 10 + items for i in room_ids})
+    run("batch", db, client, batch, {main.rooms.name(i): 10 + items * 2 for i in room_ids})
+    main.shutdown()
+
+
+if __name__ == "__main__":
+    main_bench()
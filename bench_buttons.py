@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# Compare missed button presses: the old 10 ms polling loop vs edge events.
+# Everything runs on a simulated clock, so no Pi is needed:
+#   python bench_buttons.py
+
+import random
+
+from buttons import ButtonInput
+from hal import SimGPIO
+
+HIGH, LOW = 1, 0
+BOUNCE_EDGES = 3       # Extra edges per transition from contact bounce
+BOUNCE_SPAN = 0.002    # Bounce settles within 2 ms
+
+
+def make_presses(rate_hz, count, seed=1):
+    # Human-ish taps: random gap around 1/rate, 40-120 ms hold
+    rng = random.Random(seed)
+    t = 0.1
+    presses = []
+    for _ in range(count):
+        hold = rng.uniform(0.04, 0.12)
+        presses.append((t, t + hold))
+        gap = max(hold + 0.02, rng.gauss(1.0 / rate_hz, 0.2 / rate_hz))
+        t += gap
+    return presses
+
+
+def make_edges(presses, seed=2):
+    # Level transitions including bounce, sorted by time
+    rng = random.Random(seed)
+    edges = []
+    for down, up in presses:
+        for start, level in ((down, LOW), (up, HIGH)):
+            other = HIGH if level == LOW else LOW
+            t = start
+            for _ in range(BOUNCE_EDGES):
+                edges.append((t, level))
+                t += rng.uniform(0, BOUNCE_SPAN / (2 * BOUNCE_EDGES))
+                edges.append((t, other))
+                t += rng.uniform(0, BOUNCE_SPAN / (2 * BOUNCE_EDGES))
+            edges.append((t, level))
+    edges.sort()
+    return edges
+
+
+def level_at(edges, t):
+    # Pin level at time t (pull-up idles HIGH)
+    level = HIGH
+    for et, lv in edges:
+        if et > t:
+            break
+        level = lv
+    return level
+
+
+def run_polling(edges, end):
+    # Same logic as the original monitor_buttons(): sample every 10 ms,
+    # sleep 300 ms after each detected press
+    detected = 0
+    wakeups = 0
+    t = 0.0
+    last = HIGH
+    while t < end:
+        wakeups += 1
+        cur = level_at(edges, t)
+        if last == HIGH and cur == LOW:
+            detected += 1
+            t += 0.3
+        last = cur
+        t += 0.01
+    return detected, wakeups
+
+
+def run_edges(edges):
+    clock = [0.0]
+    gpio = SimGPIO(clock=lambda: clock[0])
+    button = ButtonInput(gpio, 29, clock=lambda: clock[0]).setup()
+    for t, level in edges:
+        clock[0] = t
+        gpio.drive(29, level)  # Fires the edge callback like the GPIO thread
+    presses = 0
+    while not button.events.empty():
+        kind, _ = button.events.get_nowait()
+        if kind == "down":
+            presses += 1
+    return presses, button.edges_seen
+
+
+def main():
+    print(f"{'scenario':<14}{'presses':>8}{'poll hit':>10}{'poll miss':>10}"
+          f"{'poll wake':>11}{'edge hit':>10}{'edge miss':>10}{'edge wake':>11}")
+    for name, rate in (("steady 1/s", 1), ("quick 3/s", 3), ("burst 6/s", 6), ("burst 8/s", 8)):
+        presses = make_presses(rate, 200)
+        edges = make_edges(presses)
+        end = presses[-1][1] + 0.5
+        poll_hit, poll_wake = run_polling(edges, end)
+        edge_hit, edge_wake = run_edges(edges)
+        n = len(presses)
+        print(f"{name:<14}{n:>8}{poll_hit:>10}{n - poll_hit:>10}{poll_wake:>11}"
+              f"{edge_hit:>10}{n - edge_hit:>10}{edge_wake:>11}")
+
+
+if __name__ == "__main__":
+    main()
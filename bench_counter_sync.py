@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# Several simulated devices counting into the same rooms of an emulated RTDB.
+# Compares the old blind set() of local counts with CounterSync's batched
+# compare-and-set increments:
+#   python bench_counter_sync.py [latency_ms]
+
+import random
+import sys
+import threading
+import time
+
+from count_sync import CounterSync
+from rtdb_emulator import EmulatedDatabase
+
+ROOMS = ["Room 1", "Room 2", "Room 3"]
+TAPS_PER_DEVICE = 150
+
+
+def device_taps(seed):
+    rng = random.Random(seed)
+    return [(rng.choice(ROOMS), rng.uniform(0, 0.004)) for _ in range(TAPS_PER_DEVICE)]
+
+
+def start_value():
+    return {"Total Items": {name: 0 for name in ROOMS}}
+
+
+def run_blind(devices, latency):
+    # Each device keeps its own counts and writes them back with set()
+    db = EmulatedDatabase(latency=latency, data=start_value())
+
+    def device(seed):
+        counts = dict(db.reference('Total Items').get())
+        for room, pause in device_taps(seed):
+            counts[room] = counts[room] + 1
+            db.reference('Total Items').child(room).set(counts[room])
+            time.sleep(pause)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=device, args=(i,)) for i in range(devices)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = sum(db.reference('Total Items').get().values())
+    return total, elapsed, db.requests, 0, 0
+
+
+def run_cas(devices, latency):
+    db = EmulatedDatabase(latency=latency, data=start_value())
+    syncs = [CounterSync(db.reference(), flush_interval=0.05, high=10 ** 9).start()
+             for _ in range(devices)]
+
+    def device(seed, sync):
+        for room, pause in device_taps(seed):
+            sync.add(f"Total Items/{room}", 1)
+            time.sleep(pause)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=device, args=(i, s)) for i, s in enumerate(syncs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for sync in syncs:
+        sync.stop()
+    elapsed = time.perf_counter() - start
+    total = sum(db.reference('Total Items').get().values())
+    transactions = sum(s.transactions for s in syncs)
+    conflicts = sum(s.conflicts for s in syncs)
+    return total, elapsed, db.requests, transactions, conflicts
+
+
+def main():
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.005
+    print(f"emulated round trip {latency * 1000:.1f} ms, {TAPS_PER_DEVICE} taps per device")
+    print(f"{'devices':>7} {'mode':>6} {'expected':>9} {'stored':>7} {'lost':>5} "
+          f"{'requests':>9} {'taps/s':>8} {'txns':>6} {'conflicts':>10} {'retry %':>8}")
+    for devices in (1, 2, 4, 8, 16):
+        expected = devices * TAPS_PER_DEVICE
+        for mode, runner in (("blind", run_blind), ("cas", run_cas)):
+            total, elapsed, requests, txns, conflicts = runner(devices, latency)
+            retry = 100.0 * conflicts / txns if txns else 0.0
+            print(f"{devices:>7} {mode:>6} {expected:>9} {total:>7} {expected - total:>5} "
+                  f"{requests:>9} {expected / elapsed:>8.0f} {txns:>6} {conflicts:>10} {retry:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# Offline journal benchmark: append cost per mutation, then replay of a
+# 100k-event backlog into the emulated RTDB once "connectivity returns".
+#   python bench_journal.py [events] [latency_ms]
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from count_sync import CounterSync
+from firebase_sync import FirebaseSyncQueue
+from journal import SyncJournal
+from rtdb_emulator import EmulatedDatabase
+
+ROOMS = 1000
+
+
+def fill(journal, events, seed=1):
+    # 80% button/web increments, 20% absolute sets and low-stock flags
+    rng = random.Random(seed)
+    mutations = []
+    for _ in range(events):
+        room = f"Room {rng.randrange(ROOMS) + 1}"
+        if rng.random() < 0.8:
+            mutations.append(("inc", f"Total Items/{room}", rng.choice((1, 1, 1, -1))))
+        elif rng.random() < 0.5:
+            mutations.append(("set", f"Total Items/{room}", rng.randrange(100)))
+        else:
+            mutations.append(("set", f"Low Stock/{room}", rng.random() < 0.2))
+    # Keep journal order: one transaction per run of same-kind rows (max 1000)
+    start = time.perf_counter()
+    run = []
+    for kind, path, value in mutations:
+        if run and (run[0][0] != kind or len(run) == 1000):
+            journal.append_many(run[0][0], [(p, v) for _, p, v in run])
+            run = []
+        run.append((kind, path, value))
+    if run:
+        journal.append_many(run[0][0], [(p, v) for _, p, v in run])
+    return time.perf_counter() - start
+
+
+def single_appends(path, synchronous, n=500):
+    journal = SyncJournal(path, synchronous=synchronous)
+    start = time.perf_counter()
+    for i in range(n):
+        journal.append("inc", "Total Items/Room 1", 1)
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return n / elapsed
+
+
+def replay(path, latency):
+    journal = SyncJournal(path, synchronous="NORMAL")
+    backlog = journal.backlog()
+    db = EmulatedDatabase(latency=latency)
+    start = time.perf_counter()
+    writes = FirebaseSyncQueue(db.reference(), journal=journal, flush_interval=0.0,
+                               dedup_prefixes=("Total Items/", "Low Stock/"))
+    counters = CounterSync(db.reference(), journal=journal, flush_interval=0.0,
+                           workers=8, high=10 ** 9, low=-10 ** 9)
+    writes.on_written = counters.written  # Increments after a set wait for it
+    counters.start()  # Before the queue replays (and deletes) the sets
+    writes.start()
+    while journal.backlog():
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    writes.stop()
+    counters.stop()
+    size = os.path.getsize(path)
+    journal.close()
+    return backlog, elapsed, db.requests, writes.flushes, counters.transactions, size
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("FULL", "NORMAL"):
+            rate = single_appends(os.path.join(tmp, f"single-{mode}.db"), mode)
+            print(f"single append, synchronous={mode:<6}: {rate:,.0f} events/s")
+
+        for compact in (False, True):
+            path = os.path.join(tmp, f"backlog-{compact}.db")
+            journal = SyncJournal(path, synchronous="NORMAL")
+            fill_time = fill(journal, events)
+            label = "compacted" if compact else "raw"
+            if compact:
+                start = time.perf_counter()
+                before, after = journal.compact(merge_increments=True)
+                print(f"compaction: {before:,} -> {after:,} rows in "
+                      f"{time.perf_counter() - start:.2f}s")
+            journal.close()
+            backlog, elapsed, requests, flushes, txns, size = replay(path, latency)
+            print(f"replay {label:<9}: {events:,} events ({backlog:,} rows) filled in "
+                  f"{fill_time:.2f}s, replayed in {elapsed:.2f}s = {events / elapsed:,.0f} events/s, "
+                  f"{requests} requests ({flushes} updates, {txns} transactions), "
+                  f"journal {size / 1024:.0f} KiB after")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# Dashboard and room page rendering on main.py (simulated hardware, RTDB
+# emulator): clients fetch dashboard pages and room pages while one room's
+# count keeps changing, first with every page and room card rendered through
+# Flask's render_template on each request (the path before PageCache), then
+# with the compiled templates and cached fragments. Reports requests/s,
+# latency and, per cached run, the cache counters.
+#   python bench_pages.py [rooms] [clients] [requests_per_client]
+
+import os
+import sys
+import threading
+import time
+
+from flask import render_template
+from markupsafe import Markup
+
+os.environ.setdefault("INVENTORY_HARDWARE", "sim")
+
+import main  # noqa: E402  (the backend is chosen at import)
+
+
+# The uncached pages, rendered the way the routes did before PageCache
+def render_index(page, user_name):
+    rooms = main.rooms
+    counts = rooms.snapshot().counts
+    pages = max(1, -(-len(counts) // main.rooms_per_page))
+    page = max(1, min(page, pages))
+    start = (page - 1) * main.rooms_per_page
+    cards = [Markup(render_template("room_card.html", room={
+        "id": i, "name": rooms.names[i], "count": counts[i],
+        "low": counts[i] <= rooms.thresholds[i]}))
+        for i in range(start, min(start + main.rooms_per_page, len(counts)))]
+    return render_template("index.html", cards=cards, page=page, pages=pages,
+                           user_name=user_name)
+
+
+def render_room(room_id, scanning=None):
+    return render_template("room.html", room_id=room_id, room_name=main.rooms.name(room_id),
+                           count=main.rooms.count(room_id), scanning=scanning)
+
+
+def fetch(client, paths, latencies):
+    for path in paths:
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, path
+
+
+def churn(stop):
+    while not stop.is_set():
+        main.change_count(0, 1)
+        main.change_count(0, -1)
+        time.sleep(0.01)
+
+
+# A test client with an operator logged in
+def operator(i):
+    client = main.app.test_client()
+    user = main.sessions.create(f"bench-{i}", f"Operator {i}")
+    client.set_cookie(main.sessions.cookie_name, main.sessions.cookie(user))
+    return client
+
+
+def run(label, clients, paths):
+    stop = threading.Event()
+    churner = threading.Thread(target=churn, args=(stop,))
+    latencies = []
+    threads = [threading.Thread(target=fetch, args=(operator(i), paths[i::clients], latencies))
+               for i in range(clients)]
+    start = time.perf_counter()
+    churner.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    churner.join()
+    latencies.sort()
+    n = len(latencies)
+    print(f"{label:<28} {n / elapsed:8,.0f} req/s  p50 {latencies[n // 2] * 1000:6.2f} ms  "
+          f"p99 {latencies[int(n * 0.99)] * 1000:6.2f} ms")
+
+
+def main_bench():
+    room_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    main.boot.wait('initial fetch', 10)
+    main.boot.wait('templates', 10)
+    for i in range(len(main.rooms), room_count):
+        main.rooms.add(f"Room {i + 1}", count=20)
+    pages = -(-room_count // main.rooms_per_page)
+    dashboard = [f"/index?page={1 + i % pages}" for i in range(clients * requests)]
+    room_ids = [1 + i % (room_count - 1) for i in range(clients * requests)]  # Room 0 is churning
+
+    cache = main.page_cache
+    for cached in (False, True):
+        if cached:
+            del cache.index, cache.room
+        else:
+            cache.index, cache.room = render_index, render_room  # Instance overrides
+        mode = "cached fragments" if cached else "render_template"
+        for label, paths in (("dashboard", dashboard),
+                             ("room page", [f"/enter/{i}" for i in room_ids])):
+            cache.reset_metrics()
+            run(f"{label}, {mode}", clients, paths)
+            if cached:
+                metrics = cache.metrics()
+                print(" " * 29 + ", ".join(f"{key} {metrics[key]}" for key in (
+                    "card_hits", "card_misses", "page_hits", "page_misses",
+                    "shell_hits", "shell_misses", "invalidations")))
+    main.shutdown()
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# SPI cost of one RFID read on the emulated MFRC522: the stock mfrc522
+# driver against BurstMFRC522, polling and with the IRQ line wired. For a
+# badge read (UID and text), a UID-only read and an empty poll it reports
+# SPI transfers, bytes and modelled bus time (syscall overhead + bytes at
+# 1 MHz, roughly what the Pi spends) per read, and wall time in the
+# simulator.
+#   python bench_rfid.py [reads]
+
+import os
+import sys
+import time
+
+os.environ.setdefault("INVENTORY_HARDWARE", "sim")
+
+import hal  # noqa: E402
+
+IRQ_PIN = 29  # Physical pin (BOARD numbering, as main.py sets it)
+
+
+def run(reader, chip, read, reads):
+    before = chip.metrics()
+    start = time.perf_counter()
+    results = set()
+    for _ in range(reads):
+        result = read(reader)
+        results.add(result if not isinstance(result, tuple) else
+                    (result[0], (result[1] or "").strip()))
+    wall = time.perf_counter() - start
+    after = chip.metrics()
+    return {
+        "transfers": (after["transfers"] - before["transfers"]) / reads,
+        "bytes": (after["bytes"] - before["bytes"]) / reads,
+        "bus_ms": (after["bus_time_ms"] - before["bus_time_ms"]) / reads,
+        "wall_ms": wall * 1000 / reads,
+        "results": results,
+    }
+
+
+def main_bench():
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    hardware = hal.SimBackend()
+    chip = hardware.rfid_chip
+    tag = hal.SimBackend.DEFAULT_TAG
+
+    drivers = [
+        ("stock", lambda: hardware.rfid_reader(burst=False)),
+        ("burst", lambda: hardware.rfid_reader()),
+        ("burst+irq", lambda: hardware.rfid_reader(irq_pin=IRQ_PIN)),
+    ]
+    scenarios = [
+        ("badge read", True, lambda r: r.read_no_block()),
+        ("uid only", True, lambda r: r.read_id_no_block()),
+        ("empty poll", False, lambda r: r.read_no_block()),
+    ]
+
+    print(f"{'driver':<10} {'scenario':<11} {'transfers':>9} {'bytes':>7} "
+          f"{'bus ms':>7} {'wall ms':>8}  result")
+    for scenario, card, read in scenarios:
+        for name, make_reader in drivers:
+            reader = make_reader()
+            if card:
+                chip.present(*tag)
+            else:
+                chip.remove()
+            stats = run(reader, chip, read, reads if card else max(1, reads // 10))
+            print(f"{name:<10} {scenario:<11} {stats['transfers']:>9.1f} {stats['bytes']:>7.1f} "
+                  f"{stats['bus_ms']:>7.2f} {stats['wall_ms']:>8.3f}  {sorted(stats['results'], key=str)}")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# Scan-to-count on the emulated MFRC522: tagged items are put on the reader
+# one after another (hold ms on the antenna, gap ms between items) and every
+# few items one is swiped again by mistake. Reports counted vs. expected,
+# duplicates suppressed, the scanner's poll rate and the SPI cost per poll.
+#   python bench_scan_count.py [items] [hold_ms] [gap_ms]
+
+import random
+import sys
+import time
+
+import hal
+from rfid_service import RfidScanner
+from scan_count import ScanCounter
+
+
+def main_bench():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    hold = (float(sys.argv[2]) if len(sys.argv) > 2 else 60) / 1000
+    gap = (float(sys.argv[3]) if len(sys.argv) > 3 else 40) / 1000
+    hardware = hal.SimBackend(tag=None)
+    chip = hardware.rfid_chip
+    scanner = RfidScanner(hardware.rfid_reader()).start()
+
+    applied = []
+    counter = ScanCounter(scanner, lambda room_id, delta: applied.append((room_id, delta)))
+    rng = random.Random(7)
+    tags = [bytes(rng.randrange(256) for _ in range(4)) for _ in range(items)]
+    sequence = []
+    for i, tag in enumerate(tags):
+        sequence.append(tag)
+        if i % 5 == 4:
+            sequence.append(tags[i - 1])  # Re-swipe of the previous item
+
+    before = chip.metrics()
+    start = time.perf_counter()
+    counter.start(0, "add")
+    for tag in sequence:
+        chip.present(tag)
+        time.sleep(hold)
+        chip.remove()
+        time.sleep(gap)
+    time.sleep(counter.flush_interval)
+    metrics = counter.metrics()
+    scanner_metrics = scanner.metrics()
+    counter.stop()
+    elapsed = time.perf_counter() - start
+    after = chip.metrics()
+    scanner.stop()
+
+    total = sum(delta for _, delta in applied)
+    polls = scanner_metrics["polls"]
+    print(f"{len(sequence)} swipes of {items} items in {elapsed:.1f}s: counted {total} "
+          f"(expected {items}), duplicates suppressed {metrics['duplicates']}, "
+          f"{len(applied)} batched updates")
+    print(f"{polls} polls = {polls / elapsed:.0f}/s, "
+          f"{(after['transfers'] - before['transfers']) / polls:.1f} SPI transfers and "
+          f"{(after['bus_time_ms'] - before['bus_time_ms']) / polls:.2f} ms bus time per poll")
+    print(metrics)
+
+
+if __name__ == "__main__":
+    main_bench()
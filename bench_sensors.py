@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# Cost of polling many DHT sensors to the web process, on simulated sensors
+# (each read spins a CPU for ~250 ms, like the real pulse capture). A probe
+# thread stands in for a request handler: it runs a small task every 10 ms
+# and records how late it finishes. Three runs: no sensors, every sensor
+# read in-process by a threaded sampler, and the SensorScheduler with its
+# capture process.
+#   python bench_sensors.py [sensors] [seconds]
+
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("INVENTORY_HARDWARE", "sim")
+
+import hal  # noqa: E402
+from sensor_scheduler import SensorScheduler  # noqa: E402
+from sensor_service import SensorSampler  # noqa: E402
+
+
+# Latency = finish time minus the time the task should have started, so it
+# includes waiting for the GIL after the sleep
+def probe(stop, latencies):
+    while not stop.is_set():
+        due = time.perf_counter() + 0.01
+        time.sleep(0.01)
+        sum(i * i for i in range(2000))  # ~0.1 ms of request work
+        latencies.append(time.perf_counter() - due)
+
+
+def measure(label, seconds, setup, teardown):
+    stop = threading.Event()
+    latencies = []
+    state = setup()
+    thread = threading.Thread(target=probe, args=(stop, latencies))
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+    teardown(state)
+    latencies.sort()
+    n = len(latencies)
+    print(f"{label:<12} probe p50 {latencies[n // 2] * 1000:6.2f} ms, "
+          f"p99 {latencies[int(n * 0.99)] * 1000:6.2f} ms, max {latencies[-1] * 1000:6.2f} ms")
+
+
+def main_bench():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    hardware = hal.load()
+    pins = list(range(count))
+
+    def threaded():
+        return [SensorSampler(hardware.dht11(pin), f"Sensor {pin}").start() for pin in pins]
+
+    def stop_threaded(samplers):
+        for sampler in samplers:
+            sampler.stop(flush=False)
+        reads = sum(s.reads for s in samplers)
+        failures = sum(s.failures for s in samplers)
+        print(f"{'':<12} {reads} reads, {failures} failures")
+
+    def scheduled():
+        return SensorScheduler({f"Sensor {pin}": (pin, "DHT11") for pin in pins},
+                               backend=hardware.name).start()
+
+    def stop_scheduled(scheduler):
+        metrics = scheduler.metrics()
+        scheduler.stop()
+        print(f"{'':<12} period {metrics['period_s']} s over {metrics['slots']} slots, "
+              f"{metrics['restarts']} restarts")
+        for name, sensor in metrics["sensors"].items():
+            latency = sensor["latency_ms"] or {}
+            print(f"{'':<12} {name:<10} slot {sensor['slot']:>3}: {sensor['reads']} reads, "
+                  f"success {sensor['success_rate']}, timeouts {sensor['timeouts']}, "
+                  f"skipped {sensor['skipped']}, read p50 {latency.get('read_p50')} ms, "
+                  f"turnaround max {latency.get('turnaround_max')} ms")
+
+    measure("idle", seconds, lambda: None, lambda state: None)
+    measure("threaded", seconds, threaded, stop_threaded)
+    measure("scheduler", seconds, scheduled, stop_scheduled)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# Session lookups with many operators logged in: the cost of resolving a
+# request's cookie to its session (signature check plus store lookup) and
+# of the lookup alone, for growing numbers of live sessions, plus idle
+# expiry of all of them.
+#   python bench_sessions.py [lookups]
+
+import random
+import sys
+import time
+
+from user_sessions import SessionStore
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def main_bench():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(3)
+    for count in (10, 1000, 100000):
+        clock = Clock()
+        store = SessionStore("bench-secret", ttl=600, max_sessions=count, clock=clock)
+        sessions = [store.create(f"uid-{i}", f"Operator {i}") for i in range(count)]
+        cookies = [store.cookie(rng.choice(sessions)) for _ in range(1000)]
+        sids = [rng.choice(sessions).sid for _ in range(lookups)]
+
+        start = time.perf_counter()
+        for i in range(lookups):
+            store.get(cookies[i % len(cookies)])
+        with_cookie = (time.perf_counter() - start) * 1e6 / lookups
+        start = time.perf_counter()
+        for sid in sids:
+            with store._lock:
+                store._sessions.move_to_end(sid)
+        lookup_only = (time.perf_counter() - start) * 1e6 / lookups
+
+        clock.now += store.ttl + 1
+        start = time.perf_counter()
+        store.create("late", "Late Operator")  # Expires everything idle
+        expire_ms = (time.perf_counter() - start) * 1000
+        print(f"{count:>7} sessions   cookie -> session {with_cookie:6.2f} us   "
+              f"store lookup {lookup_only:5.2f} us   expire all {expire_ms:7.2f} ms   "
+              f"left {store.metrics()['active']}")
+
+
+if __name__ == "__main__":
+    main_bench()
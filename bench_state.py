@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# Stress test for the shared count store: many threads increment the same
+# rooms at once and the totals must come out exact. The old unsynchronised
+# list update is run the same way for comparison.
+#   python bench_state.py [threads] [increments_per_thread]
+
+import itertools
+import random
+import sys
+import threading
+import time
+
+from rooms import RoomRegistry
+
+ROOMS = 8
+
+
+def run(threads, per_thread, increment):
+    barrier = threading.Barrier(threads)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        targets = [rng.randrange(ROOMS) for _ in range(per_thread)]
+        barrier.wait()
+        for room_id in targets:
+            increment(room_id)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    expected = threads * per_thread
+    # Switch threads as often as possible to provoke interleavings
+    sys.setswitchinterval(1e-6)
+
+    # Old pattern: room_counts[i] = room_counts[i] + 1 from several threads
+    room_counts = [0] * ROOMS
+
+    def unsafe_increment(room_id):
+        count = room_counts[room_id]
+        time.sleep(0)  # The real handlers did GPIO/Firebase work in between
+        room_counts[room_id] = count + 1
+
+    elapsed = run(threads, per_thread, unsafe_increment)
+    total = sum(room_counts)
+    print(f"list     : {total}/{expected} counted, {expected - total} lost, "
+          f"{expected / elapsed:,.0f} ops/s")
+
+    rooms = RoomRegistry(max_count=2 ** 31 - 1)
+    for i in range(ROOMS):
+        rooms.add(f"Room {i + 1}")
+    changes = itertools.count()
+    rooms.subscribe(lambda room_id, old, new: next(changes))
+
+    def safe_increment(room_id):
+        rooms.add_count(room_id, 1)
+        time.sleep(0)
+
+    elapsed = run(threads, per_thread, safe_increment)
+    snap = rooms.snapshot()
+    total = sum(snap.counts)
+    print(f"registry : {total}/{expected} counted, {expected - total} lost, "
+          f"{expected / elapsed:,.0f} ops/s, version {snap.version}, "
+          f"{next(changes)} change notifications")
+    if total != expected:
+        sys.exit("registry lost increments")
+
+
+if __name__ == "__main__":
+    main()
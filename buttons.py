@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+
+
+# Edge-driven push button input.
+# The GPIO edge callback only debounces and timestamps the edge, then hands it
+# to a per-button event queue. A worker thread drains the queue, turns edges
+# into "press" events and, while the button is held, into "repeat" events for
+# fast bulk counting.
+class ButtonInput:
+
+    def __init__(self, gpio, pin, on_press=None, debounce_ms=30,
+                 long_press_s=0.8, repeat_interval_s=0.15, clock=time.monotonic):
+        self.gpio = gpio
+        self.pin = pin
+        self.on_press = on_press
+        self.debounce = debounce_ms / 1000.0
+        self.long_press_s = long_press_s
+        self.repeat_interval_s = repeat_interval_s
+        self.clock = clock
+
+        self.events = queue.Queue()  # ("down" | "up", timestamp)
+        self._pressed = False        # Last accepted (debounced) state
+        self._last_edge = -1.0
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Counters
+        self.edges_seen = 0
+        self.edges_ignored = 0
+        self.presses = 0
+        self.repeats = 0
+
+    def setup(self):
+        self.gpio.setup(self.pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+        self.gpio.add_event_detect(self.pin, self.gpio.BOTH, callback=self._on_edge)
+        return self
+
+    def start(self):
+        self.setup()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.gpio.remove_event_detect(self.pin)
+        self.events.put(("stop", self.clock()))
+
+    def _is_down(self):
+        return self.gpio.input(self.pin) == self.gpio.LOW  # Pull-up: pressed reads LOW
+
+    # Runs on the GPIO library's callback thread, keep it short
+    def _on_edge(self, channel=None):
+        now = self.clock()
+        self.edges_seen += 1
+        down = self._is_down()
+        if now - self._last_edge < self.debounce:
+            self.edges_ignored += 1
+            return
+        if down == self._pressed:
+            if not down:
+                self.edges_ignored += 1
+                return
+            # Release was swallowed by the debounce window, this is a new press
+            self.events.put(("up", now))
+        self._pressed = down
+        self._last_edge = now
+        self.events.put(("down" if down else "up", now))
+
+    def _emit(self, kind):
+        if kind == "press":
+            self.presses += 1
+        else:
+            self.repeats += 1
+        if self.on_press is not None:
+            try:
+                self.on_press(kind)
+            except Exception as e:
+                print(f"Button {self.pin} handler error: {e}")
+
+    def _run(self):
+        held = False
+        wait = None  # Seconds until the next hold/repeat check while held
+        while not self._stop.is_set():
+            try:
+                kind, _ = self.events.get(timeout=wait)
+            except queue.Empty:
+                # No release within the window: still held?
+                if held and self._is_down():
+                    self._emit("repeat")
+                    wait = self.repeat_interval_s
+                else:
+                    held, wait = False, None
+                continue
+
+            if kind == "down":
+                held = True
+                self._emit("press")
+                wait = self.long_press_s
+            elif kind == "up":
+                held, wait = False, None
+
+    def stats(self):
+        return {
+            "pin": self.pin,
+            "edges_seen": self.edges_seen,
+            "edges_ignored": self.edges_ignored,
+            "presses": self.presses,
+            "repeats": self.repeats,
+            "queue_depth": self.events.qsize(),
+        }
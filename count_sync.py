@@ -0,0 +1,281 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Conflict-safe counter sync for several devices writing the same database.
+# Local increments are summed per path and, once per flush window, applied
+# to the server with a compare-and-set (set_if_unchanged) against a cached
+# etag. A conflict means another device wrote first: the server's value and
+# etag come back with the rejection, so the retry needs no extra get().
+# Rooms are committed in parallel on a small worker pool. When a window has
+# group_min or more paths under one parent (a replayed backlog, a batch),
+# they are committed together with one compare-and-set of the parent node
+# instead of a get and a set per room; if that keeps conflicting with other
+# devices, those rooms fall back to one compare-and-set each. With a journal,
+# each increment is on disk before add() returns and is deleted once its
+# room commits; the leftover backlog is replayed on start().
+# An absolute set of a path goes through the write-behind queue instead;
+# increments made after it are held until the queue reports the set value
+# as written (written()), so they apply on top of the set rather than
+# committing against the old server value and then being overwritten.
+class CounterSync:
+
+    def __init__(self, root_ref, flush_interval=0.2, max_retries=25,
+                 low=0, high=99, on_commit=None, journal=None, workers=4,
+                 retry_delay=5.0, group_min=8):
+        self.root_ref = root_ref
+        self.journal = journal
+        self.workers = workers
+        self.group_min = group_min
+        self.retry_delay = retry_delay  # Pause after a failed window (offline)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.low = low
+        self.high = high
+        self.on_commit = on_commit  # Called with (path, committed_value)
+
+        self._deltas = {}   # path -> summed local delta not yet committed
+        self._cache = {}    # path -> (value, etag) last seen on the server
+        self._seqs = {}     # path -> journal rows covered by the pending delta
+        self._inflight = {} # path -> delta currently being committed
+        self._holds = {}    # path -> absolute value that must be written first
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Metrics
+        self.increments = 0
+        self.transactions = 0
+        self.conflicts = 0
+        self.aborted = 0
+        self.etag_fetches = 0
+        self.replayed = 0
+        self.group_commits = 0
+
+    def start(self):
+        if self._thread is None:
+            if self.journal is not None:
+                # An increment journaled before a set of its path is included
+                # in the set; one journaled after it waits for the set's replay
+                sets = {path: (seq, value) for seq, path, value in self.journal.load("set")}
+                superseded = []
+                with self._lock:
+                    for seq, path, delta in self.journal.load("inc"):
+                        if path in sets and seq < sets[path][0]:
+                            superseded.append(seq)
+                            continue
+                        self._deltas[path] = self._deltas.get(path, 0) + delta
+                        self._seqs.setdefault(path, []).append(seq)
+                        if path in sets:
+                            self._holds[path] = sets[path][1]
+                        self.replayed += 1
+                self._forget(superseded)
+                if self._deltas:
+                    self._wake.set()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def add(self, path, delta):
+        if not delta:
+            return
+        seq = self.journal.append("inc", path, delta) if self.journal is not None else None
+        with self._lock:
+            self._deltas[path] = self._deltas.get(path, 0) + delta
+            if seq is not None:
+                self._seqs.setdefault(path, []).append(seq)
+            self.increments += 1
+        self._wake.set()
+
+    # Local delta still waiting to be committed for a path
+    def pending(self, path):
+        return self._deltas.get(path, 0) + self._inflight.get(path, 0)
+
+    # Forget pending deltas for a path: an absolute set of value supersedes
+    # them, and later increments of the path are held until it is written
+    def discard(self, path, value=None):
+        with self._lock:
+            self._deltas.pop(path, None)
+            self._cache.pop(path, None)
+            seqs = self._seqs.pop(path, None)
+            if value is not None:
+                self._holds[path] = value
+        self._forget(seqs)
+
+    # Values the write-behind queue wrote (or found already on the server);
+    # increments held behind a set of one of them can be committed now
+    def written(self, values):
+        with self._lock:
+            released = [path for path, value in values.items()
+                        if path in self._holds and self._holds[path] == value]
+            for path in released:
+                del self._holds[path]
+                self._cache.pop(path, None)  # The set changed the server's etag
+            if any(path in self._deltas for path in released):
+                self._wake.set()
+
+    def _clamp(self, value):
+        return max(self.low, min(value, self.high))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Collect every increment that lands inside the window
+            self._stop.wait(self.flush_interval)
+            if not self.flush():
+                self._stop.wait(self.retry_delay)
+
+    # Commit every pending delta that is not held; False if any room has to
+    # wait for a retry. If the commits themselves fail (no new threads once
+    # the interpreter is shutting down), the uncommitted deltas go back.
+    def flush(self, parallel=True):
+        with self._lock:
+            deltas = {path: delta for path, delta in self._deltas.items()
+                      if path not in self._holds}
+            seqs = {path: self._seqs.pop(path, []) for path in deltas}
+            for path in deltas:
+                del self._deltas[path]
+            self._inflight = dict(deltas)
+        if not deltas:
+            return True
+        groups = {}
+        for path in deltas:
+            groups.setdefault(path.rpartition("/")[0], []).append(path)
+        jobs = []
+        for parent, paths in groups.items():
+            if parent and len(paths) >= self.group_min:
+                jobs.append({path: deltas[path] for path in paths})
+            else:
+                jobs.extend({path: deltas[path]} for path in paths)
+        try:
+            if not parallel or len(jobs) == 1 or self.workers <= 1:
+                outcomes = [self._commit_job(job) for job in jobs]
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    outcomes = list(pool.map(self._commit_job, jobs))
+            results = {path: ok for job, ok in zip(jobs, outcomes) for path in job}
+        except Exception as e:
+            print(f"Counter sync flush failed: {e}")
+            # A committed path has left _inflight
+            results = {path: path not in self._inflight for path in deltas}
+        done = []
+        with self._lock:
+            for path, delta in deltas.items():
+                ok = results[path]
+                if ok:
+                    done.extend(seqs.get(path, ()))
+                    continue
+                # Keep the delta for the next window rather than losing it
+                self._deltas[path] = self._deltas.get(path, 0) + delta
+                self._seqs[path] = seqs.get(path, []) + self._seqs.get(path, [])
+                self._wake.set()
+            self._inflight = {}
+        self._forget(done)
+        return all(results.values())
+
+    def _forget(self, seqs):
+        if self.journal is not None and seqs:
+            try:
+                self.journal.delete(seqs)
+            except Exception as e:
+                print(f"Journal cleanup failed: {e}")
+
+    def _commit_job(self, deltas):
+        if len(deltas) == 1:
+            return self._commit(*next(iter(deltas.items())))
+        return self._commit_group(deltas)
+
+    # Paths under one parent in one compare-and-set of the parent node: the
+    # other children are written back unchanged, and the etag covers them all
+    def _commit_group(self, deltas):
+        parent = next(iter(deltas)).rpartition("/")[0]
+        ref = self.root_ref.child(parent)
+        try:
+            value, etag = ref.get(etag=True)
+            self.etag_fetches += 1
+            for _ in range(self.max_retries):
+                self.transactions += 1
+                node = dict(value) if isinstance(value, dict) else {}
+                committed = {}
+                for path, delta in deltas.items():
+                    key = path.rpartition("/")[2]
+                    current = node.get(key)
+                    node[key] = self._clamp((current if isinstance(current, int) else 0) + delta)
+                    committed[path] = node[key]
+                success, value, etag = ref.set_if_unchanged(etag, node)
+                if success:
+                    self.group_commits += 1
+                    with self._lock:
+                        for path in deltas:
+                            self._inflight.pop(path, None)
+                            self._cache.pop(path, None)  # Child etags changed
+                    if self.on_commit is not None:
+                        for path, new_value in committed.items():
+                            self.on_commit(path, new_value)
+                    return True
+                self.conflicts += 1
+        except Exception as e:
+            self.aborted += 1
+            print(f"Counter sync failed for {parent} ({len(deltas)} paths): {e}")
+            return False
+        # Busy parent: one compare-and-set per room only conflicts per room
+        results = [self._commit(path, delta) for path, delta in deltas.items()]
+        return all(results)
+
+    def _commit(self, path, delta):
+        if not delta:
+            return True
+        ref = self.root_ref.child(path)
+        cached = self._cache.get(path)
+        try:
+            if cached is None:
+                cached = ref.get(etag=True)
+                self.etag_fetches += 1
+            value, etag = cached
+            for _ in range(self.max_retries):
+                self.transactions += 1
+                new_value = self._clamp((value if isinstance(value, int) else 0) + delta)
+                success, value, etag = ref.set_if_unchanged(etag, new_value)
+                if success:
+                    self._cache[path] = (new_value, etag)
+                    with self._lock:
+                        self._inflight.pop(path, None)
+                    if self.on_commit is not None:
+                        self.on_commit(path, new_value)
+                    return True
+                self.conflicts += 1
+            self._cache.pop(path, None)
+            self.aborted += 1
+            return False
+        except Exception as e:
+            self._cache.pop(path, None)
+            self.aborted += 1
+            print(f"Counter sync failed for {path}: {e}")
+            return False
+
+    # Stop the worker; by default commit what is pending, one room at a
+    # time (stop() may run from atexit, when no new threads can start).
+    # Held increments stay in the journal for the next start.
+    def stop(self, flush=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        if flush:
+            self.flush(parallel=False)
+
+    def metrics(self):
+        return {
+            "pending_paths": len(self._deltas),
+            "held_paths": len(self._holds),
+            "increments": self.increments,
+            "transactions": self.transactions,
+            "conflicts": self.conflicts,
+            "aborted": self.aborted,
+            "etag_fetches": self.etag_fetches,
+            "replayed": self.replayed,
+            "group_commits": self.group_commits,
+        }
@@ -1,18 +1,20 @@
 import time
-import board
-import adafruit_dht
+import hal
+from sensor_service import SensorSampler
 
 # Use GPIO23 (physical pin 16)
-dht_sensor = adafruit_dht.DHT11(board.D23)
+dht_sensor = hal.load().dht11(23)
 
-while True:
-    try:
-        temp = dht_sensor.temperature
-        humidity = dht_sensor.humidity
-        print(f"Temperature: {temp}°C, Humidity: {humidity}%")
-    except RuntimeError as error:
-        print(f"RuntimeError: {error}")
-        time.sleep(2.0)  # Wait 2 seconds before retrying
-    except Exception as error:
-        dht_sensor.exit()
-        raise error
+# Sample in the background at the sensor's pace and print the filtered value
+sampler = SensorSampler(dht_sensor, "GPIO23").start()
+
+try:
+    while True:
+        time.sleep(2.0)
+        latest = sampler.latest()
+        metrics = sampler.metrics()
+        print(f"Temperature: {latest['temperature']}°C, Humidity: {latest['humidity']}% "
+              f"({metrics['failures']}/{metrics['reads']} failed reads, {metrics['outliers']} outliers)")
+except KeyboardInterrupt:
+    sampler.stop(flush=False)
+    dht_sensor.exit()
@@ -0,0 +1,174 @@
+import collections
+import os
+import threading
+import time
+
+
+# Multiplexed two-digit 7-segment driver.
+# Segment levels for every digit are precomputed as bitmasks (bit i = level of
+# segments[i]), and each frame only writes the pins whose level actually
+# changes. The refresh loop runs on its own thread, asks for SCHED_FIFO when
+# the process is allowed to, sleeps to absolute deadlines rather than a fixed
+# delay, and blocks completely while the display is blank.
+class SevenSegmentDisplay:
+
+    def __init__(self, gpio, segments, mux_pins, encoding, digit_time=0.004,
+                 realtime_priority=10):
+        self.gpio = gpio
+        self.segments = list(segments)
+        self.mux_pins = list(mux_pins)
+        self.digit_time = digit_time
+        self.realtime_priority = realtime_priority
+        self.realtime = False
+
+        # encoding[d][i] is the segment value for digit d (0 = lit, common anode)
+        self.masks = []
+        for bits in encoding:
+            mask = 0
+            for i, val in enumerate(bits):
+                if val:
+                    mask |= 1 << i
+            self.masks.append(mask)
+        self.blank_mask = (1 << len(self.segments)) - 1  # All HIGH = all off
+
+        self._value = None
+        self._frame = None  # Per-digit masks for the current value
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Pin state cache so unchanged pins are never rewritten
+        self._seg_state = None
+        self._mux_on = None  # None = unknown, -1 = all off, else digit index
+        self.pin_writes = 0
+
+        # Timing metrics
+        self._periods = collections.deque(maxlen=250)
+        self._last_frame_start = None
+
+    def start(self):
+        self._blank()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        self._blank()
+
+    # Show a value 0-99, or None to blank the display
+    def show(self, value):
+        if value is None:
+            self._value = None
+            self._frame = None
+            return
+        value = max(0, min(int(value), 99))
+        self._value = value
+        self._frame = (self.masks[value // 10], self.masks[value % 10])
+        self._wake.set()
+
+    @property
+    def value(self):
+        return self._value
+
+    def _write_segments(self, mask):
+        if self._seg_state is None:
+            changed = self.blank_mask
+        else:
+            changed = mask ^ self._seg_state
+        i = 0
+        while changed:
+            if changed & 1:
+                self.gpio.output(self.segments[i],
+                                 self.gpio.HIGH if mask >> i & 1 else self.gpio.LOW)
+                self.pin_writes += 1
+            changed >>= 1
+            i += 1
+        self._seg_state = mask
+
+    def _select(self, digit):
+        # digit -1 disables both multiplexers
+        if self._mux_on == digit:
+            return
+        if self._mux_on is None:
+            for pin in self.mux_pins:
+                self.gpio.output(pin, self.gpio.LOW)
+                self.pin_writes += 1
+        elif self._mux_on >= 0:
+            self.gpio.output(self.mux_pins[self._mux_on], self.gpio.LOW)
+            self.pin_writes += 1
+        if digit >= 0:
+            self.gpio.output(self.mux_pins[digit], self.gpio.HIGH)
+            self.pin_writes += 1
+        self._mux_on = digit
+
+    def _blank(self):
+        self._select(-1)
+        self._write_segments(self.blank_mask)
+
+    def _try_realtime(self):
+        if not hasattr(os, "sched_setscheduler"):
+            return
+        try:
+            # pid 0 applies to the calling thread on Linux
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.realtime_priority))
+            self.realtime = True
+        except (PermissionError, OSError):
+            self.realtime = False
+
+    def _run(self):
+        self._try_realtime()
+        while not self._stop.is_set():
+            if self._frame is None:
+                # Nothing to show: switch off and sleep until show() is called
+                self._blank()
+                self._last_frame_start = None
+                self._wake.clear()
+                if self._frame is None:
+                    self._wake.wait()
+                continue
+
+            deadline = time.perf_counter()
+            self._record_frame(deadline)
+            while self._frame is not None and not self._stop.is_set():
+                frame = self._frame
+                for digit in (0, 1):
+                    self._select(-1)
+                    self._write_segments(frame[digit])
+                    self._select(digit)
+                    deadline += self.digit_time
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        # Fell behind (e.g. preempted), resync instead of bursting
+                        deadline = time.perf_counter()
+                self._record_frame(time.perf_counter())
+
+    def _record_frame(self, now):
+        if self._last_frame_start is not None:
+            self._periods.append(now - self._last_frame_start)
+        self._last_frame_start = now
+
+    def metrics(self):
+        periods = list(self._periods)
+        expected = 2 * self.digit_time
+        if periods:
+            mean = sum(periods) / len(periods)
+            jitter = (sum((p - mean) ** 2 for p in periods) / len(periods)) ** 0.5
+            worst = max(abs(p - expected) for p in periods)
+            rate = 1.0 / mean if mean > 0 else 0.0
+        else:
+            mean = jitter = worst = rate = 0.0
+        return {
+            "value": self._value,
+            "realtime": self.realtime,
+            "target_refresh_hz": round(1.0 / expected, 1),
+            "refresh_hz": round(rate, 1),
+            "frame_jitter_ms": round(jitter * 1000, 3),
+            "max_frame_error_ms": round(worst * 1000, 3),
+            "pin_writes": self.pin_writes,
+        }
@@ -0,0 +1,270 @@
+import json
+import queue
+import threading
+import time
+
+
+# Write-behind sync engine for the Realtime Database.
+# Callers enqueue (path, value) pairs and return immediately; a background
+# worker coalesces everything that arrives within one flush window into a
+# single multi-path update() on the root reference. For paths under
+# dedup_prefixes (values that get overwritten, like counts), a write whose
+# value matches the last one the server acknowledged is dropped before
+# sending; append-only paths (one new key per write) are not tracked.
+# While offline the worker keeps moving queued writes into pending, where
+# they coalesce by path, so the bounded queue does not fill up.
+# With a journal, every write is recorded on disk before enqueue() returns
+# and only deleted once acknowledged; the backlog left by an earlier run or
+# an outage is replayed on start() in chunks of max_batch paths.
+# on_written, if set, is called with {path: value} for every write the
+# server acknowledged or already held.
+class FirebaseSyncQueue:
+
+    def __init__(self, root_ref, flush_interval=0.2, max_queue=1000,
+                 max_retries=5, backoff_base=0.5, backoff_max=8.0,
+                 journal=None, max_batch=1000, on_written=None, dedup_prefixes=()):
+        self.root_ref = root_ref
+        self.dedup_prefixes = tuple(dedup_prefixes)
+        self.on_written = on_written
+        self.journal = journal
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}  # Coalesced writes waiting for the next flush
+        self._acked = {}    # Last value the server is known to hold per dedup path
+        self._seqs = {}     # Journal rows covered by each pending path
+        self._stop = threading.Event()
+        self._lock = threading.Lock()      # Guards the pending/acked/seqs dicts
+        self._flushing = threading.Lock()  # One flush at a time (worker or stop())
+        self._thread = None
+
+        # Metrics
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.retries = 0
+        self.replayed = 0
+        self.writes_sent = 0
+        self.writes_avoided = 0
+        self.bytes_sent = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+
+    def start(self):
+        if self._thread is None:
+            if self.journal is not None:
+                for seq, path, value in self.journal.load("set"):
+                    self._add(path, value, seq)
+                    self.replayed += 1
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    # Queue a write; never blocks the caller for longer than put_timeout
+    def enqueue(self, path, value, put_timeout=0.05):
+        seq = None
+        if self.journal is not None:
+            seq = self.journal.append("set", path, value)
+        return self._put(path, value, seq, put_timeout)
+
+    # Several writes, journaled in one transaction; True if all were queued
+    def enqueue_many(self, values, put_timeout=0.05):
+        items = list(values.items())
+        if self.journal is not None:
+            seqs = self.journal.append_many("set", items)
+        else:
+            seqs = [None] * len(items)
+        queued = True
+        for (path, value), seq in zip(items, seqs):
+            queued = self._put(path, value, seq, put_timeout) and queued
+        return queued
+
+    def _put(self, path, value, seq, put_timeout):
+        try:
+            self._queue.put((path, value, seq), timeout=put_timeout)
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            # Only while the worker is stuck in a slow update(): a journaled
+            # write goes out on the next start, otherwise it is lost
+            self.dropped += 1
+            print(f"Firebase sync queue full, dropped write to {path}")
+            return False
+
+    # Record a value the server already holds (e.g. seen on the listener),
+    # so writing the same value back is skipped
+    def note_remote(self, path, value):
+        if path.startswith(self.dedup_prefixes):
+            with self._lock:
+                self._acked[path] = value
+
+    def _add(self, path, value, seq):
+        self._pending[path] = value
+        if seq is not None:
+            self._seqs.setdefault(path, []).append(seq)
+
+    def _drain(self):
+        # Move everything currently queued into the pending dict (last write wins)
+        while True:
+            try:
+                path, value, seq = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._add(path, value, seq)
+
+    # Wait (for retry backoff) while still taking writes off the queue
+    def _hold(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._add(*item)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._pending:
+                try:
+                    item = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                with self._lock:
+                    self._add(*item)
+            # Give bursts a chance to pile up so they go out as one update
+            self._stop.wait(self.flush_interval)
+            self._drain()
+            if not self._flush_with_retry():
+                # Still offline: keep everything pending and try again later
+                self._hold(self.backoff_max)
+        # Final drain happens in stop()
+
+    def _flush_with_retry(self):
+        attempt = 0
+        while self._pending:
+            if self._flush_once():
+                # Large backlogs go out max_batch paths at a time
+                attempt = 0
+                continue
+            attempt += 1
+            if attempt > self.max_retries or self._stop.is_set():
+                return False
+            self.retries += 1
+            delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+            # Newer values that arrive while backing off replace stale ones
+            self._hold(delay)
+        return True
+
+    # Send one batch. The lock is only held to pick the batch and to record
+    # the result, not across the round trip, so enqueue paths and the
+    # listener (note_remote) never wait for the network.
+    def _flush_once(self):
+        with self._flushing:
+            with self._lock:
+                batch = {}
+                avoided = {}
+                done_seqs = []
+                for path, value in list(self._pending.items()):
+                    if path in self._acked and self._acked[path] == value:
+                        del self._pending[path]
+                        done_seqs.extend(self._seqs.pop(path, ()))
+                        avoided[path] = value
+                        self.writes_avoided += 1
+                    elif len(batch) < self.max_batch:
+                        batch[path] = value
+                sent_seqs = {path: list(self._seqs.get(path, ())) for path in batch}
+            if not batch:
+                self._forget(done_seqs)
+                self._written(avoided)
+                return True
+            body = json.dumps(batch)
+            start = time.perf_counter()
+            try:
+                self.root_ref.update(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                print(f"Firebase sync failed ({len(batch)} paths): {e}")
+                self._forget(done_seqs)
+                self._written(avoided)
+                return False
+            latency = time.perf_counter() - start
+
+            with self._lock:
+                # Only drop entries that were not overwritten during the flush
+                for path, value in batch.items():
+                    if self._pending.get(path) == value:
+                        del self._pending[path]
+                    seqs = self._seqs.get(path)
+                    if seqs:
+                        del seqs[:len(sent_seqs[path])]
+                        if not seqs:
+                            del self._seqs[path]
+                    done_seqs.extend(sent_seqs[path])
+                self._acked.update((path, value) for path, value in batch.items()
+                                   if path.startswith(self.dedup_prefixes))
+                self.flushes += 1
+                self.writes_sent += len(batch)
+                self.bytes_sent += len(body)
+                self.last_flush_latency = latency
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+                self._total_flush_latency += latency
+            self._forget(done_seqs)
+            avoided.update(batch)
+            self._written(avoided)
+            return True
+
+    def _written(self, values):
+        if self.on_written is not None and values:
+            self.on_written(values)
+
+    def _forget(self, seqs):
+        if self.journal is not None and seqs:
+            try:
+                self.journal.delete(seqs)
+            except Exception as e:
+                # Rows stay in the journal and are replayed (harmlessly) later
+                print(f"Journal cleanup failed: {e}")
+
+    # Stop the worker; by default push out whatever is still queued
+    def stop(self, flush=True, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if flush:
+            self._drain()
+            deadline = time.monotonic() + timeout
+            while self._pending and time.monotonic() < deadline:
+                if not self._flush_once():
+                    time.sleep(self.backoff_base)
+
+    def metrics(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "journal_backlog": self.journal.backlog("set") if self.journal is not None else None,
+            "pending_paths": len(self._pending),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "retries": self.retries,
+            "replayed": self.replayed,
+            "writes_sent": self.writes_sent,
+            "writes_avoided": self.writes_avoided,
+            "bytes_sent": self.bytes_sent,
+            "last_flush_latency_ms": round(self.last_flush_latency * 1000, 2),
+            "max_flush_latency_ms": round(self.max_flush_latency * 1000, 2),
+            "avg_flush_latency_ms": round(
+                self._total_flush_latency / self.flushes * 1000, 2) if self.flushes else 0.0,
+        }
@@ -0,0 +1,502 @@
+import collections
+import os
+import random
+import sys
+import threading
+import time
+import types
+
+
+# Hardware abstraction layer.
+# The app talks to three devices: the RPi.GPIO module (LEDs, display,
+# buttons), an MFRC522 RFID reader on SPI and a DHT11 sensor. A backend
+# supplies all three:
+#
+#   rpi  the real libraries (RPi.GPIO, mfrc522/spidev, adafruit_dht)
+#   sim  SimGPIO, an emulated MFRC522 behind a fake spidev, SimDHT11
+#
+# The simulated backend lets main.py be imported, load-tested and profiled
+# on any Linux box. load() picks the backend from INVENTORY_HARDWARE
+# (rpi, sim or auto = rpi when RPi.GPIO can be imported).
+def load(name=None):
+    name = name or os.environ.get("INVENTORY_HARDWARE", "auto")
+    if name == "auto":
+        try:
+            return RpiBackend()
+        except (ImportError, RuntimeError) as e:
+            print(f"No Raspberry Pi GPIO ({e}), using simulated hardware")
+            return SimBackend()
+    if name == "rpi":
+        return RpiBackend()
+    if name == "sim":
+        return SimBackend()
+    raise ValueError(f"Unknown hardware backend '{name}'")
+
+
+class RpiBackend:
+    name = "rpi"
+    simulated = False
+
+    def __init__(self):
+        import RPi.GPIO
+        self.gpio = RPi.GPIO
+
+    # burst=False gives the stock driver; irq_pin is the reader's IRQ line
+    def rfid_reader(self, irq_pin=None, burst=True):
+        if not burst:
+            from mfrc522 import SimpleMFRC522
+            return SimpleMFRC522()
+        from rfid_driver import BurstSimpleMFRC522
+        return BurstSimpleMFRC522(irq_pin=irq_pin)
+
+    def dht11(self, pin):
+        # pin is the BCM number (GPIO23 = physical pin 16)
+        import adafruit_dht
+        import board
+        return adafruit_dht.DHT11(getattr(board, f"D{pin}"))
+
+    def dht22(self, pin):
+        import adafruit_dht
+        import board
+        return adafruit_dht.DHT22(getattr(board, f"D{pin}"))
+
+
+# Simulated backend. The stock mfrc522 driver imports RPi.GPIO and spidev
+# itself, so the simulator registers its GPIO and SPI stand-ins under those
+# module names; the unmodified driver code then runs against the emulated
+# chip, SPI transfer for SPI transfer.
+class SimBackend:
+    name = "sim"
+    simulated = True
+
+    # Badge resting on the reader at startup: UID 85615652294 with its check
+    # byte, one of main.py's default_badges, so the badge store authorizes
+    # it until a 'Badges' node exists
+    DEFAULT_TAG = (bytes([0x13, 0xEF, 0x17, 0x2D]), "Simulated User")
+
+    def __init__(self, clock=time.monotonic, tag=DEFAULT_TAG):
+        self.gpio = SimGPIO(clock)
+        self.rfid_chip = SimMFRC522()
+        if tag is not None:
+            self.rfid_chip.present(*tag)
+        SimSpiDev.devices[(0, 0)] = self.rfid_chip
+
+        rpi = types.ModuleType("RPi")
+        rpi.GPIO = self.gpio
+        spidev = types.ModuleType("spidev")
+        spidev.SpiDev = SimSpiDev
+        sys.modules.update({"RPi": rpi, "RPi.GPIO": self.gpio, "spidev": spidev})
+
+    def rfid_reader(self, irq_pin=None, burst=True):
+        if irq_pin is not None:
+            self.rfid_chip.attach_irq(self.gpio, irq_pin)
+        if not burst:
+            from mfrc522 import SimpleMFRC522
+            return SimpleMFRC522()
+        from rfid_driver import BurstSimpleMFRC522
+        return BurstSimpleMFRC522(irq_pin=irq_pin)
+
+    def dht11(self, pin):
+        return SimDHT11(seed=pin)
+
+    def dht22(self, pin):
+        return SimDHT11(seed=pin)
+
+
+# RPi.GPIO stand-in that records a timeline of pin transitions.
+# Outputs are written by the app; inputs are driven by the simulation with
+# drive(), which fires edge callbacks registered with add_event_detect().
+class SimGPIO:
+    BOARD, BCM = 10, 11
+    OUT, IN = 0, 1
+    LOW, HIGH = 0, 1
+    PUD_OFF, PUD_DOWN, PUD_UP = 20, 21, 22
+    RISING, FALLING, BOTH = 31, 32, 33
+    RPI_INFO = {"TYPE": "Simulated"}
+
+    def __init__(self, clock=time.monotonic, history=100000):
+        self.clock = clock
+        self.timeline = collections.deque(maxlen=history)  # (time, pin, level)
+        self.writes = 0
+        self._mode = None
+        self._levels = {}
+        self._directions = {}
+        self._detect = {}  # pin -> (edge, [callbacks])
+        self._lock = threading.Lock()
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        self._mode = mode
+
+    def getmode(self):
+        return self._mode
+
+    def setup(self, channel, direction, pull_up_down=PUD_OFF, initial=None):
+        for pin in self._channels(channel):
+            self._directions[pin] = direction
+            if direction == self.IN:
+                level = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+            else:
+                level = self.LOW if initial is None else initial
+            self._set_level(pin, level)
+
+    def output(self, channel, value):
+        pins = self._channels(channel)
+        values = value if isinstance(value, (list, tuple)) else [value] * len(pins)
+        for pin, level in zip(pins, values):
+            self.writes += 1
+            self._set_level(pin, int(bool(level)))
+
+    def input(self, channel):
+        return self._levels.get(channel, self.LOW)
+
+    def add_event_detect(self, channel, edge, callback=None, bouncetime=None):
+        self._detect[channel] = (edge, [callback] if callback else [])
+
+    def add_event_callback(self, channel, callback):
+        self._detect[channel][1].append(callback)
+
+    def remove_event_detect(self, channel):
+        self._detect.pop(channel, None)
+
+    def cleanup(self, channel=None):
+        pins = list(self._levels) if channel is None else self._channels(channel)
+        for pin in pins:
+            self._detect.pop(pin, None)
+            self._directions.pop(pin, None)
+            self._set_level(pin, self.LOW)
+
+    @staticmethod
+    def _channels(channel):
+        return list(channel) if isinstance(channel, (list, tuple)) else [channel]
+
+    def _set_level(self, pin, level):
+        with self._lock:
+            old = self._levels.get(pin)
+            self._levels[pin] = level
+            if old != level:
+                self.timeline.append((self.clock(), pin, level))
+        return old
+
+    # Simulation side: set an input's level and fire its edge callbacks
+    def drive(self, pin, level):
+        old = self._set_level(pin, level)
+        edge, callbacks = self._detect.get(pin, (None, ()))
+        if old == level or edge is None:
+            return
+        if edge == self.BOTH or (edge == self.RISING) == (level == self.HIGH):
+            for callback in callbacks:
+                callback(pin)
+
+    # Press and release a pull-up button (pressed reads LOW)
+    def press(self, pin, hold=0.05):
+        self.drive(pin, self.LOW)
+        time.sleep(hold)
+        self.drive(pin, self.HIGH)
+
+    # Transitions of one pin: [(time, level), ...]
+    def history(self, pin):
+        return [(t, level) for t, p, level in self.timeline if p == pin]
+
+    # Fraction of [start, end] the pin spent HIGH
+    def duty_cycle(self, pin, start, end):
+        level, since, high = self.LOW, start, 0.0
+        for t, lv in self.history(pin):
+            if t >= end:
+                break
+            if t > start and level == self.HIGH:
+                high += t - since
+            level, since = lv, max(t, start)
+        if level == self.HIGH:
+            high += end - since
+        return high / (end - start) if end > start else 0.0
+
+
+# ISO 14443-A CRC, as computed by the MFRC522's CalcCRC command
+def crc_a(data):
+    crc = 0x6363
+    for byte in data:
+        byte = (byte ^ crc) & 0xFF
+        byte = (byte ^ (byte << 4)) & 0xFF
+        crc = (crc >> 8) ^ (byte << 8) ^ (byte << 3) ^ (byte >> 4)
+    return [crc & 0xFF, crc >> 8 & 0xFF]
+
+
+SimTag = collections.namedtuple("SimTag", "uid blocks")
+
+
+# Register-level MFRC522 emulation with one MIFARE Classic 1K card slot.
+# Covers what the mfrc522 driver uses: register and FIFO access (single and
+# multi-byte SPI frames), CalcCRC, Authent and Transceive for REQA,
+# anticollision, select, read and write. With no card present a transceive
+# only raises the timer interrupt, so the driver spins through its full
+# CommIrqReg polling loop exactly as on the real chip.
+#
+# Bus cost is modelled rather than slept: every transfer adds a fixed
+# syscall overhead plus its bytes at max_speed_hz to bus_time. The IRQ line
+# can be wired to a SimGPIO input with attach_irq().
+class SimMFRC522:
+    CommandReg, CommIEnReg, DivIEnReg = 0x01, 0x02, 0x03
+    CommIrqReg, DivIrqReg, ErrorReg = 0x04, 0x05, 0x06
+    Status2Reg, FIFODataReg, FIFOLevelReg = 0x08, 0x09, 0x0A
+    ControlReg, BitFramingReg = 0x0C, 0x0D
+    CRCResultRegM, CRCResultRegL, VersionReg = 0x21, 0x22, 0x37
+
+    IDLE, CALCCRC, TRANSCEIVE, AUTHENT, RESETPHASE = 0x00, 0x03, 0x0C, 0x0E, 0x0F
+
+    def __init__(self, transfer_overhead=40e-6):
+        self.transfer_overhead = transfer_overhead
+        self.max_speed_hz = 1000000
+        self.tag = None
+        self._irq_line = None  # (gpio, pin)
+        self._lock = threading.Lock()
+        self._reset()
+        # Metrics
+        self.transfers = 0
+        self.bytes = 0
+        self.bus_time = 0.0
+        self.transceives = 0
+
+    def _reset(self):
+        self.regs = [0] * 64
+        self.regs[self.VersionReg] = 0x92
+        self.regs[self.CommIEnReg] = 0x80  # IRqInv: IRQ line active low
+        self.fifo = []
+        self._selected = False
+        self._authenticated = False
+        self._pending_write = None
+
+    # Put a card on the antenna: uid is 4 bytes, text goes to blocks 8-10
+    def present(self, uid, text=""):
+        blocks = [bytes(16)] * 64
+        data = text.ljust(48).encode("ascii")[:48]
+        for i, block in enumerate((8, 9, 10)):
+            blocks[block] = data[i * 16:(i + 1) * 16]
+        with self._lock:
+            self.tag = SimTag(bytes(uid), blocks)
+
+    def remove(self):
+        with self._lock:
+            self.tag = None
+            self._selected = self._authenticated = False
+
+    def attach_irq(self, gpio, pin):
+        with self._lock:
+            self._irq_line = (gpio, pin)
+            self._update_irq()
+
+    # IRQ line: any enabled interrupt flag set, inverted by IRqInv
+    def _update_irq(self):
+        if self._irq_line is None:
+            return
+        gpio, pin = self._irq_line
+        active = (self.regs[self.CommIrqReg] & self.regs[self.CommIEnReg] & 0x7F or
+                  self.regs[self.DivIrqReg] & self.regs[self.DivIEnReg] & 0x14)
+        inverted = self.regs[self.CommIEnReg] & 0x80
+        gpio.drive(pin, gpio.LOW if bool(active) == bool(inverted) else gpio.HIGH)
+
+    # One SPI frame: first byte addresses a register (bit 7 = read). Reads
+    # return one register per following byte, writes repeat into one register.
+    def xfer2(self, data):
+        with self._lock:
+            self.transfers += 1
+            self.bytes += len(data)
+            self.bus_time += self.transfer_overhead + len(data) * 8 / self.max_speed_hz
+            out = [0] * len(data)
+            if data[0] & 0x80:
+                for i in range(1, len(data)):
+                    out[i] = self._read((data[i - 1] >> 1) & 0x3F)
+            else:
+                addr = (data[0] >> 1) & 0x3F
+                for value in data[1:]:
+                    self._write(addr, value)
+                self._update_irq()
+            return out
+
+    def _read(self, addr):
+        if addr == self.FIFODataReg:
+            return self.fifo.pop(0) if self.fifo else 0
+        if addr == self.FIFOLevelReg:
+            return len(self.fifo)
+        return self.regs[addr]
+
+    def _write(self, addr, value):
+        if addr == self.FIFODataReg:
+            if len(self.fifo) < 64:
+                self.fifo.append(value)
+        elif addr == self.FIFOLevelReg:
+            if value & 0x80:
+                self.fifo = []
+        elif addr in (self.CommIrqReg, self.DivIrqReg):
+            # Bit 7 (Set1) chooses between setting and clearing the marked bits
+            if value & 0x80:
+                self.regs[addr] |= value & 0x7F
+            else:
+                self.regs[addr] &= ~value & 0x7F
+        elif addr == self.CommandReg:
+            self.regs[addr] = value & 0x0F
+            self._command(value & 0x0F)
+        elif addr == self.BitFramingReg:
+            self.regs[addr] = value & 0x7F  # StartSend reads back as 0
+            if value & 0x80 and self.regs[self.CommandReg] == self.TRANSCEIVE:
+                self._transceive()
+        elif addr == self.Status2Reg:
+            self.regs[addr] = value
+            if not value & 0x08:
+                self._authenticated = False
+        else:
+            self.regs[addr] = value
+
+    def _command(self, command):
+        if command == self.RESETPHASE:
+            self._reset()
+        elif command == self.CALCCRC:
+            low, high = crc_a(self.fifo)
+            self.fifo = []
+            self.regs[self.CRCResultRegL], self.regs[self.CRCResultRegM] = low, high
+            self.regs[self.DivIrqReg] |= 0x04
+            self.regs[self.CommandReg] = self.IDLE
+        elif command == self.AUTHENT:
+            # Any key is accepted; the card must have been selected
+            data, self.fifo = self.fifo, []
+            if self.tag and self._selected and len(data) == 12 and \
+                    bytes(data[8:12]) == self.tag.uid:
+                self._authenticated = True
+                self.regs[self.Status2Reg] |= 0x08
+            self.regs[self.CommIrqReg] |= 0x10
+            self.regs[self.CommandReg] = self.IDLE
+
+    def _transceive(self):
+        self.transceives += 1
+        data, self.fifo = self.fifo, []
+        self.regs[self.ErrorReg] = 0
+        reply, last_bits = self._card_reply(data)
+        if reply is None:
+            self.regs[self.CommIrqReg] |= 0x01  # Timer ran out, no answer
+            return
+        self.fifo = list(reply)
+        self.regs[self.ControlReg] = (self.regs[self.ControlReg] & ~0x07) | last_bits
+        self.regs[self.CommIrqReg] |= 0x30  # RxIRq | IdleIRq
+
+    # What the card answers to a frame: (bytes, valid bits in last byte) or None
+    def _card_reply(self, data):
+        tag = self.tag
+        if tag is None or not data:
+            return None, 0
+        uid = list(tag.uid) + [tag.uid[0] ^ tag.uid[1] ^ tag.uid[2] ^ tag.uid[3]]
+        if self._pending_write is not None:
+            block, self._pending_write = self._pending_write, None
+            if len(data) == 18 and crc_a(data[:16]) == data[16:]:
+                blocks = list(tag.blocks)
+                blocks[block] = bytes(data[:16])
+                self.tag = SimTag(tag.uid, blocks)
+                return [0x0A], 4
+            return None, 0
+        if data[0] in (0x26, 0x52) and len(data) == 1:  # REQA / WUPA
+            self._selected = self._authenticated = False
+            return [0x04, 0x00], 0
+        if data[:2] == [0x93, 0x20]:  # Anticollision, cascade level 1
+            return uid, 0
+        if data[:2] == [0x93, 0x70] and len(data) == 9:  # Select
+            if data[2:7] != uid or crc_a(data[:7]) != data[7:9]:
+                return None, 0
+            self._selected = True
+            sak = [0x08]
+            return sak + crc_a(sak), 0
+        if data[0] == 0x30 and len(data) == 4 and self._authenticated:  # Read block
+            block = list(tag.blocks[data[1] & 0x3F])
+            return block + crc_a(block), 0
+        if data[0] == 0xA0 and len(data) == 4 and self._authenticated:  # Write block
+            self._pending_write = data[1] & 0x3F
+            return [0x0A], 4
+        return None, 0
+
+    def metrics(self):
+        return {
+            "transfers": self.transfers,
+            "bytes": self.bytes,
+            "bus_time_ms": round(self.bus_time * 1000, 2),
+            "transceives": self.transceives,
+        }
+
+
+# spidev.SpiDev stand-in routing transfers to the emulated chip on (bus, device)
+class SimSpiDev:
+    devices = {}
+
+    def __init__(self):
+        self.chip = None
+        self.max_speed_hz = 500000
+        self.mode = 0
+
+    def open(self, bus, device):
+        self.chip = self.devices[(bus, device)]
+
+    def close(self):
+        self.chip = None
+
+    def xfer2(self, data, speed_hz=0, delay_usecs=0, bits_per_word=0):
+        self.chip.max_speed_hz = speed_hz or self.max_speed_hz
+        return self.chip.xfer2(list(data))
+
+    xfer = xfer2
+
+    def writebytes(self, data):
+        self.xfer2(data)
+
+    def readbytes(self, n):
+        return [0] * n
+
+
+# adafruit_dht.DHT11 stand-in: a slow random walk around room conditions.
+# Like the real driver, a measurement takes read_time (spinning on the CPU
+# by default, as a bit-banged pulse capture does), is repeated at most every
+# 2 s (otherwise the last values are returned) and fails now and then with
+# the driver's RuntimeError.
+class SimDHT11:
+
+    def __init__(self, temperature=24.0, humidity=55.0, failure_rate=0.1,
+                 read_time=0.25, busy=True, seed=None, clock=time.monotonic):
+        self._temperature = temperature
+        self._humidity = humidity
+        self.failure_rate = failure_rate
+        self.read_time = read_time
+        self.busy = busy
+        self.clock = clock
+        self._rng = random.Random(seed)
+        self._last = None
+        self.reads = 0
+        self.failures = 0
+
+    def _measure(self):
+        now = self.clock()
+        if self._last is not None and now - self._last < 2.0:
+            return
+        self._last = now
+        self.reads += 1
+        if self.busy:
+            end = time.perf_counter() + self.read_time
+            while time.perf_counter() < end:
+                pass
+        elif self.read_time:
+            time.sleep(self.read_time)
+        if self._rng.random() < self.failure_rate:
+            self.failures += 1
+            raise RuntimeError("Checksum did not validate. Try again.")
+        self._temperature = min(50.0, max(0.0, self._temperature + self._rng.gauss(0, 0.2)))
+        self._humidity = min(90.0, max(20.0, self._humidity + self._rng.gauss(0, 0.5)))
+
+    @property
+    def temperature(self):
+        self._measure()
+        return round(self._temperature)
+
+    @property
+    def humidity(self):
+        self._measure()
+        return round(self._humidity)
+
+    def exit(self):
+        pass
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# Hardware owner for the multi-process setup: the only process that touches
+# GPIO, the display, the buttons and the MFRC522. It loads main.py for the
+# hardware and Firebase side (without serving HTTP), mirrors every count into
+# shared memory and executes the commands sent by the web workers.
+#   python hardware_daemon.py      then      python web_workers.py [workers] [port]
+
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import main as hw
+from shared_state import SharedCounts, SharedRevocations, CommandServer
+from web_routes import LocalBackend
+
+# Commands that may block (badge wait, Firebase round trip) run off the
+# command loop so button-speed updates are never queued behind them
+slow_ops = {"scan", "scan_count", "sync"}
+
+
+# Commands run the same LocalBackend actions as main.py's own routes
+backend = LocalBackend(hw)
+command_ops = {"update", "batch", "enter", "leave", "scan", "scan_count", "sync", "status"}
+
+
+def handle(command):
+    op = command["op"]
+    if op not in command_ops:
+        raise ValueError(f"Unknown command '{op}'")
+    args = {key: value for key, value in command.items() if key not in ("op", "id", "reply")}
+    result = getattr(backend, op)(**args)
+    if op in ("enter", "leave"):
+        counts.publish_active(hw.rooms.active_room)
+    return result
+
+
+# Run one command and answer it; never raises, so a bad command cannot end
+# the command loop or a slow-command thread
+def execute(command):
+    try:
+        result = handle(command)
+    except Exception as e:
+        print(f"Command {command.get('op')} failed: {e}")
+        server.reply(command, error=str(e))
+    else:
+        server.reply(command, result)
+
+
+# Rooms found in Firebase later (listener, /sync) are published as they appear
+def watch_rooms(stop, interval=0.5):
+    while not stop.wait(interval):
+        if len(hw.rooms) != counts.rooms:
+            counts.publish(hw.rooms)
+
+
+# SIGTERM from the service manager shuts down like Ctrl+C
+def on_terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+counts = SharedCounts(create=True)
+revocations = SharedRevocations(create=True)  # Written and read by the web workers
+server = CommandServer()
+
+
+def main():
+    counts.publish(hw.rooms)
+    hw.rooms.subscribe_many(
+        lambda changes: counts.publish_counts(hw.rooms, [room_id for room_id, _, _ in changes]))
+    stop = threading.Event()
+    threading.Thread(target=watch_rooms, args=(stop,), daemon=True).start()
+    slow = ThreadPoolExecutor(max_workers=4, thread_name_prefix="slow-command")
+
+    signal.signal(signal.SIGTERM, on_terminate)
+    print("Hardware daemon ready")
+    try:
+        while True:
+            command = server.receive()
+            if command.get("op") in slow_ops:
+                slow.submit(execute, command)
+            else:
+                execute(command)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        slow.shutdown(wait=False)
+        hw.shutdown()  # Flush pending writes before exiting
+        server.remove()
+        counts.remove()
+        revocations.remove()
+
+
+if __name__ == "__main__":
+    main()
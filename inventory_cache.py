@@ -0,0 +1,99 @@
+import threading
+import time
+
+
+# Local replica of one Realtime Database subtree (e.g. "Total Items").
+# It is seeded with a single get() and then kept current by the SSE stream
+# from Reference.listen(), so readers only ever touch the in-memory dict.
+class InventoryCache:
+
+    def __init__(self, ref, on_change=None):
+        self.ref = ref
+        self.on_change = on_change  # Called with (key, value) on remote changes
+        self._data = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self.etag = None
+        self.seeded_at = None
+        self.last_event_at = None
+        self.events = 0
+
+    # One round trip: the whole subtree plus its etag
+    def seed(self):
+        data, etag = self.ref.get(etag=True)
+        with self._lock:
+            self._data = dict(data or {})
+            self.etag = etag
+            self.seeded_at = time.time()
+        return self.snapshot()
+
+    # Re-seed only if the server copy changed since our last seed
+    def refresh(self):
+        if self.etag is None:
+            return self.seed()
+        changed, data, etag = self.ref.get_if_changed(self.etag)
+        if changed:
+            with self._lock:
+                self._data = dict(data or {})
+                self.etag = etag
+        self.seeded_at = time.time()
+        return self.snapshot()
+
+    def listen(self):
+        if self._listener is None:
+            self._listener = self.ref.listen(self._on_event)
+        return self
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def _on_event(self, event):
+        # event.path is relative to self.ref: "/" for the whole subtree,
+        # "/Room 1" for a single child
+        changed = {}
+        with self._lock:
+            key = event.path.strip("/")
+            if event.event_type == "put":
+                if not key:
+                    self._data = dict(event.data or {})
+                    changed = dict(self._data)
+                elif "/" not in key:
+                    if event.data is None:
+                        self._data.pop(key, None)
+                    else:
+                        self._data[key] = event.data
+                    changed[key] = event.data
+            elif event.event_type == "patch":
+                base = key + "/" if key else ""
+                for child, value in (event.data or {}).items():
+                    name = (base + child).strip("/")
+                    if "/" in name:
+                        continue
+                    self._data[name] = value
+                    changed[name] = value
+            self.last_event_at = time.time()
+            self.events += 1
+        if self.on_change is not None:
+            for key, value in changed.items():
+                self.on_change(key, value)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._data)
+
+    def status(self):
+        now = time.time()
+        fresh = max(self.seeded_at or 0, self.last_event_at or 0)
+        return {
+            "keys": len(self._data),
+            "listening": self._listener is not None,
+            "events": self.events,
+            "staleness_s": round(now - fresh, 1) if fresh else None,
+            "seeded_age_s": round(now - self.seeded_at, 1) if self.seeded_at else None,
+            "last_event_age_s": round(now - self.last_event_at, 1) if self.last_event_at else None,
+        }
@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import threading
+
+
+# Append-only local journal of inventory mutations waiting for Firebase.
+# Every write is committed to SQLite (WAL mode) before the caller goes on, so
+# a change made while the Pi is offline survives a restart. The sync engines
+# delete rows once the server has acknowledged them; whatever is still in
+# the journal at startup is the backlog to replay.
+#
+# kind is "set" (absolute value for a path) or "inc" (delta for a path).
+class SyncJournal:
+
+    def __init__(self, path="inventory_journal.db", synchronous="FULL", vacuum_every=10000):
+        self.path = path
+        self.vacuum_every = vacuum_every  # Give freed pages back after this many deletes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " kind TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " value TEXT NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS events_kind ON events (kind, seq)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS events_path ON events (path, kind, seq)")
+        self.appended = 0
+        self.deleted = 0
+        self._since_vacuum = 0
+
+    def append(self, kind, path, value):
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO events (kind, path, value) VALUES (?, ?, ?)",
+                (kind, path, json.dumps(value)))
+            self.appended += 1
+            return cur.lastrowid
+
+    # Several rows in one transaction (one fsync); returns their seqs
+    def append_many(self, kind, items):
+        seqs = []
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for path, value in items:
+                    cur = self._db.execute(
+                        "INSERT INTO events (kind, path, value) VALUES (?, ?, ?)",
+                        (kind, path, json.dumps(value)))
+                    seqs.append(cur.lastrowid)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self.appended += len(seqs)
+        return seqs
+
+    # Rows of one kind in journal order: [(seq, path, value), ...]
+    def load(self, kind, after_seq=0, limit=-1):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, path, value FROM events WHERE kind = ? AND seq > ?"
+                " ORDER BY seq LIMIT ?", (kind, after_seq, limit)).fetchall()
+        return [(seq, path, json.loads(value)) for seq, path, value in rows]
+
+    # Drop acknowledged rows
+    def delete(self, seqs):
+        seqs = list(seqs)
+        if not seqs:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            for i in range(0, len(seqs), 500):
+                chunk = seqs[i:i + 500]
+                self._db.execute(
+                    f"DELETE FROM events WHERE seq IN ({','.join('?' * len(chunk))})", chunk)
+            self._db.execute("COMMIT")
+            self.deleted += len(seqs)
+            self._since_vacuum += len(seqs)
+            if self._since_vacuum >= self.vacuum_every or (
+                    self._since_vacuum >= 1000 and
+                    self._db.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None):
+                self._shrink()
+
+    def _shrink(self):
+        # Rebuilding is cheap once the backlog is (nearly) drained
+        if self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0] <= 1000:
+            self._db.execute("VACUUM")
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._since_vacuum = 0
+
+    def backlog(self, kind=None):
+        with self._lock:
+            if kind is None:
+                return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            return self._db.execute(
+                "SELECT COUNT(*) FROM events WHERE kind = ?", (kind,)).fetchone()[0]
+
+    # Shrink the journal. Older "set" rows for a path are always superseded by
+    # the newest one. Increments can only be merged before the sync engines
+    # load them (they hold row seqs in memory), so that is opt-in for startup.
+    def compact(self, merge_increments=False):
+        with self._lock:
+            before = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "DELETE FROM events WHERE kind = 'set' AND seq NOT IN"
+                " (SELECT MAX(seq) FROM events WHERE kind = 'set' GROUP BY path)")
+            if merge_increments:
+                # An increment older than a set on the same path is already included
+                self._db.execute(
+                    "DELETE FROM events AS e WHERE kind = 'inc' AND seq <"
+                    " (SELECT MAX(seq) FROM events WHERE kind = 'set' AND path = e.path)")
+                merged = self._db.execute(
+                    "SELECT path, MAX(seq), SUM(CAST(value AS INTEGER)) FROM events"
+                    " WHERE kind = 'inc' GROUP BY path HAVING COUNT(*) > 1").fetchall()
+                for path, last_seq, total in merged:
+                    self._db.execute(
+                        "DELETE FROM events WHERE kind = 'inc' AND path = ? AND seq < ?",
+                        (path, last_seq))
+                    self._db.execute(
+                        "UPDATE events SET value = ? WHERE seq = ?", (json.dumps(total), last_seq))
+            self._db.execute("COMMIT")
+            after = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            self._shrink()
+        return before, after
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def metrics(self):
+        return {
+            "backlog": self.backlog(),
+            "appended": self.appended,
+            "deleted": self.deleted,
+        }
@@ -1,28 +1,90 @@
-from flask import Flask, render_template, redirect, request, url_for, session
-import RPi.GPIO as GPIO
 import time
-from threading import Thread
-from mfrc522 import SimpleMFRC522
-import firebase_admin
-from firebase_admin import credentials, db
-
-# Initialize Firebase Admin SDK
-cred = credentials.Certificate('inventory-9756d-firebase-adminsdk-h2cgm-ef480640da.json')
-firebase_admin.initialize_app(cred, {
-    'databaseURL': 'https://inventory-9756d-default-rtdb.asia-southeast1.firebasedatabase.app/'
-})
-
-# Reference to the Firebase database nodes
-firebase_ref_total_items = db.reference('Total Items')
-firebase_ref_low_stock = db.reference('Low Stock')
-
-# Initialize Low Stock data
-initial_low_stock = {
-    "Room 1": False,
-    "Room 2": False,
-    "Room 3": False
-}
-firebase_ref_low_stock.set(initial_low_stock)
+from startup import Startup, DeferredReference
+
+# Staged startup: imports and local setup are timed phases; Firebase, the
+# initial fetch and the RFID reader come up in the background so the web
+# server binds (and serves the login page) right away. See /boot/status.
+boot = Startup()
+
+with boot.phase('import flask'):
+    from flask import Flask
+
+with boot.phase('import flask_socketio'):
+    from flask_socketio import SocketIO
+
+with boot.phase('import app modules'):
+    import os
+    import sys
+    import atexit
+    import hal
+    from firebase_sync import FirebaseSyncQueue
+    from count_sync import CounterSync
+    from journal import SyncJournal
+    from buttons import ButtonInput
+    from display import SevenSegmentDisplay
+    from inventory_cache import InventoryCache
+    from rooms import RoomRegistry, natural_key
+    from rfid_service import RfidScanner, BadgeNames
+    from badges import BadgeStore
+    from scan_count import ScanCounter
+    from assets import Assets, register_assets
+    from page_cache import PageCache
+    from user_sessions import SessionStore, register_sessions
+    from web_routes import LocalBackend, register_routes
+    from sensor_service import SensorSampler
+    from sensor_scheduler import SensorScheduler
+
+# GPIO, RFID reader and DHT11: the real devices on the Pi, or the simulator
+# (INVENTORY_HARDWARE=sim) for local runs, load tests and profiling
+with boot.phase('hardware backend'):
+    hardware = hal.load()
+    GPIO = hardware.gpio
+
+# Database: Firebase, or the in-process emulator with mock rooms
+# (INVENTORY_DATABASE=emulator, the default with simulated hardware)
+use_emulator = os.environ.get(
+    'INVENTORY_DATABASE', 'emulator' if hardware.simulated else 'firebase') == 'emulator'
+db = None  # Set by the 'firebase init' phase
+default_badges = {'85615652294': True, '0987654321': True}  # Authorized until 'Badges' is first loaded
+
+# firebase_admin and the Google auth stack are only imported here, off the
+# import path of main.py
+def init_database():
+    global db
+    if use_emulator:
+        from rtdb_emulator import EmulatedDatabase
+        db = EmulatedDatabase(data={'Total Items': {'Room 1': 10, 'Room 2': 10, 'Room 3': 10},
+                                    'Badges': dict(default_badges)})
+        return db
+    import firebase_admin
+    from firebase_admin import credentials, db as firebase_db
+
+    # Initialize Firebase Admin SDK
+    cred = credentials.Certificate('inventory-9756d-firebase-adminsdk-h2cgm-ef480640da.json')
+    firebase_admin.initialize_app(cred, {
+        'databaseURL': 'https://inventory-9756d-default-rtdb.asia-southeast1.firebasedatabase.app/'
+    })
+    db = firebase_db
+    return db
+
+database = boot.background('firebase init', init_database)
+
+# Reference to the Firebase database nodes (usable before Firebase is up)
+firebase_ref_total_items = DeferredReference(database, 'Total Items')
+firebase_ref_low_stock = DeferredReference(database, 'Low Stock')
+
+# Durable local journal: every change is on disk before it is acknowledged,
+# so changes made offline are replayed when the database is reachable again
+with boot.phase('journal'):
+    # Never replay the real backlog into the emulator
+    journal = SyncJournal(':memory:' if use_emulator else 'inventory_journal.db')
+    journal.compact(merge_increments=True)  # Shrink the backlog from the last run
+
+# Write-behind queue: count changes are batched into one multi-path update()
+# (started after counter_sync, see below)
+sync_queue = FirebaseSyncQueue(DeferredReference(database), journal=journal,
+                               dedup_prefixes=("Total Items/", "Low Stock/"))
+atexit.register(sync_queue.stop)
 
 # GPIO Setup
 GPIO.setmode(GPIO.BOARD)
@@ -30,6 +92,7 @@ GPIO.setmode(GPIO.BOARD)
 # LED Pins for Rooms (Adjusted to BOARD mode)
 room_leds = [38, 40, 26]  # Physical pins for room LEDs
 warning_leds = [32, 33, 37]  # Additional LEDs for warning when item count < 5
+low_stock_threshold = 5  # Counts at or below this are low stock
 
 # 7-Segment Display Setup
 
@@ -41,37 +104,184 @@ for pin in segments + mux_pins + room_leds + warning_leds:
     GPIO.setup(pin, GPIO.OUT)
     GPIO.output(pin, GPIO.LOW)
 
+# Only the scanner thread touches the reader; it polls while a login is waiting
+rfid_scanner = None  # Set by the 'rfid reader' phase
+login_scan_timeout = 15  # Seconds a login request waits for a badge
+rfid_irq_pin = None  # Physical pin wired to the reader's IRQ line; None = poll the chip
+# Badge names already read from tags: known badges log in on the UID alone
+badge_names = BadgeNames(None if hardware.simulated else 'badge_names.json')
+
+def start_rfid():
+    global rfid_scanner
+    reader = hardware.rfid_reader(irq_pin=rfid_irq_pin)
+    rfid_scanner = RfidScanner(reader, poll_interval=0.1, names=badge_names).start()
+    return rfid_scanner
+
+boot.background('rfid reader', start_rfid)
+
+# DHT sensors per room wired to this device: (BCM pin, model). A scheduler
+# staggers the reads over a time wheel and does the pulse capture in a
+# separate process; each room's sampler filters and aggregates the results,
+# per-minute aggregates go to 'Environment/<room>' through the sync queue
+dht_sensors = {'Room 1': (23, 'DHT11')}  # GPIO23 = physical pin 16
+environment = {}  # room name -> SensorSampler
+sensor_scheduler = None
+
+def record_reading(room_name, temperature, humidity, read_ms, error, t):
+    environment[room_name].record(temperature, humidity, read_ms, error, t)
+
+def start_sensors():
+    global sensor_scheduler
+    for room_name in dht_sensors:
+        environment[room_name] = SensorSampler(None, room_name, publish=sync_queue.enqueue_many)
+    sensor_scheduler = SensorScheduler(dht_sensors, on_reading=record_reading,
+                                       backend=hardware.name).start()
+
+boot.background('dht11 sensors', start_sensors)
+
+# Room registry: rooms wired to this device plus every room found in Firebase
+rooms = RoomRegistry(default_threshold=low_stock_threshold)
+for i, (led, warning) in enumerate(zip(room_leds, warning_leds)):
+    rooms.add(f"Room {i + 1}", led_pin=led, warning_pin=warning)
+
+# Apply a count change pushed from the database (other devices, console edits)
+def apply_remote_count(room_name, value):
+    if not isinstance(value, int):
+        return
+    room_id = rooms.index(room_name)
+    if room_id is None:
+        room_id = rooms.add(room_name)
+    sync_queue.note_remote(f"Total Items/{room_name}", value)
+    # Keep local increments that have not reached the server yet on top
+    rooms.set_count(room_id, value + counter_sync.pending(f"Total Items/{room_name}"), dirty=False)
+
+# A batched increment was committed: adopt the merged server value
+def apply_committed_count(path, value):
+    room_name = path.split('/', 1)[1]
+    apply_remote_count(room_name, value)
+    room_id = rooms.index(room_name)
+    sync_queue.enqueue(f"Low Stock/{room_name}", rooms.is_low(room_id))
+    update_warning_led(room_id)
+
+# Add/remove go through conflict-safe increments so several Pis can count
+# into the same rooms; absolute "set" writes still use the write-behind queue
+counter_sync = CounterSync(DeferredReference(database), on_commit=apply_committed_count,
+                           journal=journal)
+# Increments held behind an absolute set go out once the set is written.
+# The counters load the journal first: a set the queue replays and deletes
+# before that would no longer show which increments it supersedes
+sync_queue.on_written = counter_sync.written
+counter_sync.start()
+sync_queue.start()
+atexit.register(counter_sync.stop)
+
+# Local replica of 'Total Items', kept current by the realtime listener
+inventory_cache = InventoryCache(firebase_ref_total_items, on_change=apply_remote_count)
+
 def get_data():
-	roomLst = []
-	room1 = db.reference('Total Items/Room 1').get()
-	room2 = db.reference('Total Items/Room 2').get()
-	room3 = db.reference('Total Items/Room 3').get()
-	roomLst.append(room1)
-	roomLst.append(room2)
-	roomLst.append(room3)
-	return roomLst
+    try:
+        counts = inventory_cache.seed()
+    except Exception as e:
+        # Offline: start with local counts, the journal catches up later
+        print(f"Could not load counts from Firebase: {e}")
+        return rooms
+    for name in sorted(counts, key=natural_key):
+        room_id = rooms.add(name)
+        if isinstance(counts[name], int):
+            rooms.set_count(room_id, counts[name], dirty=False)
+    return rooms
 
 # Flask App Setup
-app = Flask(__name__)
-current_room = -1  # No room is active initially
-room_counts = get_data()  # Initial counts for Room 1, Room 2, Room 3
-
-reader = SimpleMFRC522()
-
-# Function to synchronize room counts with Firebase
-def sync_to_firebase():
-    # Sync Total Items
-    firebase_ref_total_items.set({
-        "Room 1": room_counts[0],
-        "Room 2": room_counts[1],
-        "Room 3": room_counts[2]
-    })
-    # Sync Low Stock
-    firebase_ref_low_stock.set({
-        "Room 1": room_counts[0] <= 5,
-        "Room 2": room_counts[1] <= 5,
-        "Room 3": room_counts[2] <= 5
-    })
+with boot.phase('flask app'):
+    app = Flask(__name__)
+    # Signs the session cookies; set INVENTORY_SECRET_KEY to keep logins across restarts
+    secret_key = os.environ.get('INVENTORY_SECRET_KEY') or os.urandom(32).hex()
+    sessions = SessionStore(secret_key)  # Logged-in operators, one per browser
+    register_sessions(app, sessions)
+    socketio = SocketIO(app, async_mode='threading')  # Live count updates for dashboards
+    assets = Assets()  # Hashed, precompressed CSS/JS under /assets
+    register_assets(app, assets)
+
+# Rebuild static/dist when a stylesheet, vendored file or template changed;
+# until then pages use the previous build (or the CDN)
+boot.background('assets', assets.ensure_built)
+
+rooms_per_page = 30  # Dashboard pagination
+
+# Dashboard and room pages: compiled templates and cached fragments
+page_cache = PageCache(app, rooms, rooms_per_page, assets)
+boot.background('templates', page_cache.precompile)
+# Initial counts for every room, then live updates
+def load_counts():
+    get_data()
+    try:
+        inventory_cache.listen()
+    except Exception as e:
+        print(f"Could not start Firebase listener: {e}")
+    sync_queue.enqueue_many({f"Low Stock/{rooms.name(i)}": rooms.is_low(i) for i in range(len(rooms))})
+
+boot.background('initial fetch', load_counts, after=('firebase init',))
+
+# Change a room's count by delta locally and queue the increment for Firebase
+def change_count(room_id, delta):
+    old, new = rooms.add_count(room_id, delta, dirty=False)
+    if new != old:
+        counter_sync.add(f"Total Items/{rooms.name(room_id)}", new - old)
+    return new
+
+# Apply an add/remove/set action from the web UI or a socket client
+def apply_action(room_id, action, quantity=None):
+    if action == "add":
+        change_count(room_id, 1)
+    elif action == "remove":
+        change_count(room_id, -1)
+    elif action == "set":
+        new_quantity = int(quantity)
+        if 0 <= new_quantity <= 99 and new_quantity != rooms.count(room_id):
+            # An absolute count replaces any increments still pending; later
+            # ones wait until this value is written
+            name = rooms.name(room_id)
+            path = f"Total Items/{name}"
+            counter_sync.discard(path, new_quantity)
+            rooms.set_count(room_id, new_quantity, dirty=False)
+            sync_queue.enqueue_many({path: new_quantity,
+                                     f"Low Stock/{name}": rooms.is_low(room_id)})
+
+    update_warning_led(room_id)
+    return rooms.count(room_id)
+
+# Apply a batch of [(room_id, "add", delta) or (room_id, "set", value), ...]
+# as one local change. Rooms that are only incremented keep conflict-safe
+# increments, one per room with the batch's net change; a room with a "set"
+# drops its pending increments and is written absolutely, with the count the
+# batch left it at (later increments wait for that write). The absolute
+# counts and every Low Stock flag reach Firebase in one multi-path update.
+def apply_batch(ops):
+    initial = {room_id: rooms.count(room_id) for room_id, _, _ in ops}
+    absolute = {room_id for room_id, action, _ in ops if action == "set"}
+    results = rooms.update_many(ops, dirty_sets=False)
+    final = {room_id: new for (room_id, _, _), (_, new) in zip(ops, results)}
+    payload = {}
+    for room_id in absolute:
+        path = f"Total Items/{rooms.name(room_id)}"
+        counter_sync.discard(path, final[room_id])
+        payload[path] = final[room_id]
+    for room_id, old in initial.items():
+        if room_id not in absolute and final[room_id] != old:
+            counter_sync.add(f"Total Items/{rooms.name(room_id)}", final[room_id] - old)
+    payload.update({f"Low Stock/{rooms.name(i)}": rooms.is_low(i) for i in initial})
+    sync_queue.enqueue_many(payload)
+    for room_id in initial:
+        update_warning_led(room_id)
+    return results
+
+# Every count change, whatever thread it comes from, reaches the display
+# through the registry's change hook (and the dashboards, see web_routes)
+def on_counts_changed(changes):
+    if any(room_id == rooms.active_room for room_id, _, _ in changes):
+        refresh_display()
+
+rooms.subscribe_many(on_counts_changed)
 
 # 7-Segment Encoding for Digits 0-9 (Common Anode)
 seven_seg_encoding = [
@@ -91,180 +301,160 @@ seven_seg_encoding = [
 button_add = 29  # Physical pin for Add button
 button_remove = 31  # Physical pin for Remove button
 
-# Setup Buttons
-GPIO.setup(button_add, GPIO.IN, pull_up_down=GPIO.PUD_UP)  # Use pull-up resistor
-GPIO.setup(button_remove, GPIO.IN, pull_up_down=GPIO.PUD_UP)  # Use pull-up resistor
-
-# Button Debounce Time (in seconds)
-debounce_time = 0.5
-
-# Background Thread to Monitor Buttons
-def monitor_buttons():
-    global current_room
-
-    last_add_state = GPIO.input(button_add)
-    last_remove_state = GPIO.input(button_remove)
-
-    while True:
-        current_add_state = GPIO.input(button_add)
-        current_remove_state = GPIO.input(button_remove)
+# Button Debounce Time (in milliseconds) and hold-to-repeat timing
+debounce_ms = 30
+long_press_s = 0.8  # Hold this long to start auto-repeat
+repeat_interval_s = 0.15
+
+# Handle a button event ("press" or auto "repeat") from the edge-driven input
+def handle_button(action):
+    room_id = rooms.active_room  # Read once; a web request may change it
+    if room_id == -1:
+        return
+    change_count(room_id, 1 if action == "add" else -1)
+    update_warning_led(room_id)
 
-        if last_add_state == GPIO.HIGH and current_add_state == GPIO.LOW:
-            if current_room != -1:
-                room_counts[current_room] = min(room_counts[current_room] + 1, 99)
-                sync_to_firebase()  # Update Firebase
-                update_warning_led(current_room)
-                time.sleep(0.3)
+# Start edge-event inputs for the buttons (replaces the polling loop)
+with boot.phase('buttons'):
+    button_inputs = [
+        ButtonInput(GPIO, button_add, on_press=lambda kind: handle_button("add"),
+                    debounce_ms=debounce_ms, long_press_s=long_press_s,
+                    repeat_interval_s=repeat_interval_s).start(),
+        ButtonInput(GPIO, button_remove, on_press=lambda kind: handle_button("remove"),
+                    debounce_ms=debounce_ms, long_press_s=long_press_s,
+                    repeat_interval_s=repeat_interval_s).start(),
+    ]
 
-        if last_remove_state == GPIO.HIGH and current_remove_state == GPIO.LOW:
-            if current_room != -1 and room_counts[current_room] > 0:
-                room_counts[current_room] -= 1
-                sync_to_firebase()  # Update Firebase
-                update_warning_led(current_room)
-                time.sleep(0.3)
+def update_warning_led(room_id):
+    pin = rooms.warning_pins[room_id]
+    if pin >= 0:
+        GPIO.output(pin, GPIO.HIGH if rooms.is_low(room_id) else GPIO.LOW)
 
-        last_add_state = current_add_state
-        last_remove_state = current_remove_state
-        time.sleep(0.01)
 
-# Start the Button Monitoring Thread
-button_thread = Thread(target=monitor_buttons, daemon=True)
-button_thread.start()
+# Start the 7-segment driver on its own (real-time when permitted) thread
+with boot.phase('display'):
+    display = SevenSegmentDisplay(GPIO, segments, mux_pins, seven_seg_encoding).start()
 
-# Background Thread to Continuously Refresh Display
+# Push the active room's count to the display (blank when no room is active)
 def refresh_display():
-    while True:
-        if current_room == -1:
-            # Turn off all segments when no room is active
-            for pin in segments:
-                GPIO.output(pin, GPIO.HIGH)  # Common anode turns off with HIGH signal
-            continue
-
-        # Get the value to display
-        count = room_counts[current_room]
-        tens = count // 10
-        ones = count % 10
-
-        # Show tens digit
-        for pin, val in zip(segments, seven_seg_encoding[tens]):
-            GPIO.output(pin, GPIO.LOW if val == 0 else GPIO.HIGH)  # Common Anode
-        GPIO.output(mux_pins[0], GPIO.HIGH)  # Enable tens multiplexer
-        time.sleep(0.005)
-        GPIO.output(mux_pins[0], GPIO.LOW)   # Disable tens multiplexer
-
-        # Show ones digit
-        for pin, val in zip(segments, seven_seg_encoding[ones]):
-            GPIO.output(pin, GPIO.LOW if val == 0 else GPIO.HIGH)  # Common Anode
-        GPIO.output(mux_pins[1], GPIO.HIGH)  # Enable ones multiplexer
-        time.sleep(0.005)
-        GPIO.output(mux_pins[1], GPIO.LOW)   # Disable ones multiplexer
+    room_id = rooms.active_room
+    display.show(rooms.count(room_id) if room_id != -1 else None)
 
-def update_warning_led(room_id):
-    room_name = f"Room {room_id + 1}"
-    is_low_stock = room_counts[room_id] <= 5
-    firebase_ref_low_stock.child(room_name).set(is_low_stock)
-    GPIO.output(warning_leds[room_id], GPIO.HIGH if is_low_stock else GPIO.LOW)
+# Authorized badges: 'Badges' in Firebase ({uid: {"name", "role", "active"}}),
+# followed by a listener, with a local copy for offline starts. Logins are
+# audited to 'Badge Audit' through the sync queue.
+badge_store = BadgeStore(None if use_emulator else 'badges.json', defaults=default_badges,
+                         audit=sync_queue.enqueue_many).start()
 
+def attach_badges():
+    badge_store.attach(DeferredReference(database, 'Badges'))
 
-# Start the Display Refresh Loop in a Separate Thread
-display_thread = Thread(target=refresh_display, daemon=True)
-display_thread.start()
+boot.background('badges', attach_badges, after=('firebase init',))
 
-valid_uid = ['85615652294', '0987654321']
+# Scan-to-count: tagged items scanned on the reader change the count of the
+# room being counted; staff badges are not items
+scan_counter = None  # Set by the 'scan counter' phase
 
-@app.route('/')
-def login():
-    return render_template('login.html')
+def apply_scan_count(room_id, delta):
+    change_count(room_id, delta)
+    update_warning_led(room_id)
 
-@app.route('/login', methods=['POST'])
-def rfid_login():
-    global text
-    try:
-        # Start reading RFID
-        rfid_id, text = reader.read()  # Changed 'id' to 'rfid_id'
-        print(f"Scanned RFID ID: {rfid_id}")  # Debugging
-
-        # Check if RFID ID matches a known UID
-        if str(rfid_id) in valid_uid:
-            return render_template('index.html', user_name=text, rooms=room_counts)
-        else:
-            return render_template('login.html', error="Invalid RFID")
-    except Exception as e:
-        print(f"Error reading RFID: {e}")
-        return render_template('login.html', error="Error reading RFID")
+def start_scan_counter():
+    global scan_counter
+    scan_counter = ScanCounter(rfid_scanner, apply_scan_count,
+                               ignore=lambda uid: badge_store.authorize(uid) is not None)
+    return scan_counter
 
-@app.route('/index')
-def index():
-    global current_room, text
-    current_room = -1
-    # No room is active
-    # Turn off all LEDs
-    for led in room_leds:
-        GPIO.output(led, GPIO.LOW)
-    return render_template('index.html', rooms=room_counts, user_name=text)  # Main page after successful login
+boot.background('scan counter', start_scan_counter, after=('rfid reader',))
 
+# Turn off the LEDs of every room wired to this device
+def room_leds_off():
+    for led, warning in rooms.hardware_pins():
+        if led >= 0:
+            GPIO.output(led, GPIO.LOW)
 
-# Enter Room Route
-@app.route('/enter/<int:room_id>')
-def enter_room(room_id):
-    global current_room
-    current_room = room_id  
+# Make a room the one shown on this device's display and LEDs
+def activate_room(room_id):
+    rooms.set_active(room_id)
     # Set the active room
+    refresh_display()
 
     # Turn off all LEDs first
-    for led in room_leds:
-        GPIO.output(led, GPIO.LOW)
-    
+    room_leds_off()
+
     # Turn on the selected room's LED
-    GPIO.output(room_leds[room_id], GPIO.HIGH)
-    
-    # Check if the item count is below 5 for the warning LED
-    if room_counts[room_id] <= 5:
-        GPIO.output(warning_leds[room_id], GPIO.HIGH)  # Turn on the warning LED
-    
-    return render_template('room.html', room_id=room_id, count=room_counts[room_id])
-
-# Update Room Inventory
-@app.route('/update', methods=['POST'])
-def update():
-    room_id = int(request.form['room_id'])
-    action = request.form['action']
-    if action == "add":
-        room_counts[room_id] = min(room_counts[room_id] + 1, 99)
-    elif action == "remove" and room_counts[room_id] > 0:
-        room_counts[room_id] -= 1
-    elif action == "set":
-        new_quantity = int(request.form['quantity'])
-        if 0 <= new_quantity <= 99:
-            room_counts[room_id] = new_quantity
+    if rooms.led_pins[room_id] >= 0:
+        GPIO.output(rooms.led_pins[room_id], GPIO.HIGH)
 
-    sync_to_firebase()  # Update Firebase
+    # Check if the item count is below the threshold for the warning LED
     update_warning_led(room_id)
-    return render_template('room.html', room_id=room_id, count=room_counts[room_id])
-
-@app.route('/logout', methods=['POST'])
-def logout():
-    #return render_template('login.html')
-    return redirect(url_for('login'))
-
-# Leave Room Route
-@app.route('/leave/<int:room_id>')
-def leave_room(room_id):
-    global current_room
-    current_room = -1  # No room is active
-    GPIO.output(room_leds[room_id], GPIO.LOW)  # Turn off the LED for the room
-    return index()
-    
-@app.route('/sync')
-def sync():
-    # Load data from Firebase
-    global room_counts
-    room_counts = firebase_ref.get()
-    return redirect(url_for('index'))
+
+def deactivate_room():
+    if scan_counter is not None:
+        scan_counter.stop()  # Leaving the room ends its scan count session
+    rooms.set_active(-1)
+    # No room is active
+    refresh_display()
+    # Turn off all LEDs
+    room_leds_off()
+
+# Re-check Firebase (no-op if the etag is unchanged) and reload the counts
+def refresh_from_firebase():
+    counts = inventory_cache.refresh()
+    for name, value in counts.items():
+        apply_remote_count(name, value)
+    refresh_display()
+
+def sync_status():
+    metrics = sync_queue.metrics()
+    metrics['counters'] = counter_sync.metrics()
+    metrics['journal'] = journal.metrics()
+    return metrics
+
+# Flush pending writes and release the hardware
+def shutdown():
+    if sensor_scheduler is not None:
+        sensor_scheduler.stop()
+    for sampler in list(environment.values()):
+        sampler.stop()  # Queues the unfinished minute
+    counter_sync.stop()
+    sync_queue.stop()
+    display.stop()
+    if scan_counter is not None:
+        scan_counter.stop()
+    if rfid_scanner is not None:
+        rfid_scanner.stop()
+    badge_store.close()
+    GPIO.cleanup()
+
+# Latest filtered readings, from memory; with seconds > 0 the raw samples
+# of that many seconds are added
+def environment_readings(seconds=0):
+    readings = {}
+    for room_name, sampler in list(environment.items()):
+        readings[room_name] = sampler.latest()
+        if seconds > 0:
+            readings[room_name]['history'] = sampler.history(seconds)
+    return readings
+
+def environment_status_metrics():
+    metrics = {room_name: sampler.metrics() for room_name, sampler in list(environment.items())}
+    if sensor_scheduler is not None:
+        metrics['scheduler'] = sensor_scheduler.metrics()
+    return metrics
+
+# Pages, count updates, Socket.IO and status endpoints, shared with the
+# multi-process web workers
+register_routes(app, socketio, LocalBackend(sys.modules[__name__]), page_cache, sessions,
+                login_scan_timeout)
+
+boot.mark('import done')
 
 # Main Execution
 if __name__ == "__main__":
+    boot.mark('serving')
     try:
-        app.run(host='0.0.0.0', port=5000, debug=False)  # Turn off debug for production
+        socketio.run(app, host='0.0.0.0', port=5000, debug=False,
+                     allow_unsafe_werkzeug=True)  # Turn off debug for production
     except KeyboardInterrupt:
-        GPIO.cleanup()
+        shutdown()  # Flush pending writes before exiting
@@ -0,0 +1,149 @@
+import threading
+import time
+
+from markupsafe import Markup
+
+COUNT_SLOT = "\x00count\x00"  # Never occurs in rendered HTML
+
+
+# Renders the dashboard and room pages from templates compiled once at
+# startup (precompile()), caching the HTML by the state it shows:
+#   room cards       per room, valid while the room's change version holds
+#   dashboard pages  per page and user, valid while the newest version of
+#                    the rooms on the page holds; built from the cached cards
+#   room pages       one shell per room with a slot for the count, so a count
+#                    change costs a string join instead of a render
+# Versions are checked against the registry snapshot the counts came from,
+# and HTML is only kept when nothing on it changed after that snapshot, so a
+# change racing a render never leaves a stale entry. Count changes also drop
+# the affected entries right away, and an asset rebuild (new hashed URLs)
+# retires every page. Room pages with a scan session running are not cached.
+class PageCache:
+
+    def __init__(self, app, rooms, per_page, assets=None, max_users=32, enabled=True):
+        self.env = app.jinja_env
+        self.rooms = rooms
+        self.per_page = per_page
+        self.assets = assets
+        self.max_users = max_users  # Cached dashboard pages per page number
+        self.enabled = enabled
+        self._templates = {}
+        self._cards = {}   # room_id -> (version, html)
+        self._pages = {}   # page -> {user_name: ((version, rooms, assets), html)}
+        self._shells = {}  # room_id -> (assets generation, [html parts])
+        self._lock = threading.Lock()
+        rooms.subscribe_many(self._invalidate)
+
+        # Metrics
+        self.compile_ms = None
+        self.card_hits = 0
+        self.card_misses = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.shell_hits = 0
+        self.shell_misses = 0
+        self.invalidations = 0
+
+    # Load and compile every template now instead of on its first request
+    def precompile(self):
+        start = time.perf_counter()
+        self._templates = {name: self.env.get_template(name) for name in self.env.list_templates()
+                           if name.endswith(".html")}
+        self.compile_ms = round((time.perf_counter() - start) * 1000, 2)
+        return self
+
+    def render(self, name, **context):
+        template = self._templates.get(name)
+        if template is None:
+            template = self.env.get_template(name)
+        return template.render(context)
+
+    def _generation(self):
+        return self.assets.generation if self.assets is not None else 0
+
+    def _card(self, room_id, snap):
+        version = self.rooms.versions[room_id]
+        cached = self._cards.get(room_id)
+        if self.enabled and cached is not None and cached[0] == version:
+            self.card_hits += 1
+            return cached[1]
+        self.card_misses += 1
+        count = snap.counts[room_id]
+        html = Markup(self.render("room_card.html", room={
+            "id": room_id, "name": self.rooms.names[room_id], "count": count,
+            "low": count <= self.rooms.thresholds[room_id]}))
+        if self.enabled and version <= snap.version:
+            self._cards[room_id] = (version, html)
+        return html
+
+    # One page of the room dashboard
+    def index(self, page, user_name):
+        snap = self.rooms.snapshot()
+        total = len(snap.counts)
+        pages = max(1, -(-total // self.per_page))
+        page = max(1, min(page, pages))
+        start = (page - 1) * self.per_page
+        end = min(start + self.per_page, total)
+        version = self.rooms.range_version(start, end)
+        state = (version, total, self._generation())
+        cached = self._pages.get(page, {}).get(user_name)
+        if self.enabled and cached is not None and cached[0] == state:
+            self.page_hits += 1
+            return cached[1]
+        self.page_misses += 1
+        html = self.render("index.html", cards=[self._card(i, snap) for i in range(start, end)],
+                           page=page, pages=pages, user_name=user_name)
+        if self.enabled and version <= snap.version:
+            with self._lock:
+                users = self._pages.setdefault(page, {})
+                if len(users) >= self.max_users:
+                    users.clear()
+                users[user_name] = (state, html)
+        return html
+
+    # A room's page; scanning is the scan session's metrics, if one is running
+    def room(self, room_id, scanning=None):
+        name = self.rooms.name(room_id)
+        if scanning is not None or not self.enabled:
+            return self.render("room.html", room_id=room_id, room_name=name,
+                               count=self.rooms.count(room_id), scanning=scanning)
+        generation = self._generation()
+        cached = self._shells.get(room_id)
+        if cached is not None and cached[0] == generation:
+            self.shell_hits += 1
+            parts = cached[1]
+        else:
+            self.shell_misses += 1
+            parts = self.render("room.html", room_id=room_id, room_name=name,
+                                count=Markup(COUNT_SLOT), scanning=None).split(COUNT_SLOT)
+            self._shells[room_id] = (generation, parts)
+        return str(self.rooms.count(room_id)).join(parts)
+
+    def _invalidate(self, changes):
+        with self._lock:
+            for room_id, _, _ in changes:
+                self._cards.pop(room_id, None)
+                self._pages.pop(room_id // self.per_page + 1, None)
+            self.invalidations += 1
+
+    def reset_metrics(self):
+        self.card_hits = self.card_misses = 0
+        self.page_hits = self.page_misses = 0
+        self.shell_hits = self.shell_misses = 0
+        self.invalidations = 0
+
+    def metrics(self):
+        return {
+            "enabled": self.enabled,
+            "templates": len(self._templates),
+            "compile_ms": self.compile_ms,
+            "cards": len(self._cards),
+            "pages": sum(len(users) for users in self._pages.values()),
+            "card_hits": self.card_hits,
+            "card_misses": self.card_misses,
+            "page_hits": self.page_hits,
+            "page_misses": self.page_misses,
+            "shell_hits": self.shell_hits,
+            "shell_misses": self.shell_misses,
+            "invalidations": self.invalidations,
+        }
@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 
-import RPi.GPIO as GPIO
-from mfrc522 import SimpleMFRC522
+import hal
 
-reader = SimpleMFRC522()
+hardware = hal.load()  # INVENTORY_HARDWARE=sim reads the simulated badge
+GPIO = hardware.gpio
+reader = hardware.rfid_reader()
 
 try:
         id, text = reader.read()
@@ -0,0 +1,152 @@
+import threading
+import time
+
+import RPi.GPIO as GPIO
+from mfrc522 import MFRC522, SimpleMFRC522
+
+
+# MFRC522 driver with batched register access.
+# The stock driver does one SPI transfer per register access and per FIFO
+# byte, and its CommIrqReg loop ignores the timer interrupt, so every poll
+# without a card spins through all 2000 reads. This subclass:
+#   - writes and reads the FIFO in one multi-byte transfer
+#   - reads CommIrqReg, ErrorReg, FIFOLevelReg and ControlReg in one frame
+#   - writes interrupt flags and the FIFO flush directly instead of
+#     read-modify-write, and keeps shadow copies of BitFramingReg and
+#     CommIEnReg (rewritten only when it changes)
+#   - stops waiting on the timer interrupt (no card), bounded by a deadline
+#   - optionally sleeps on the chip's IRQ line (irq_pin, active low) instead
+#     of polling the bus
+# The stock methods built on MFRC522_ToCard and CalulateCRC (request,
+# anticollision, select, auth, read, write) use the fast paths unchanged.
+class BurstMFRC522(MFRC522):
+
+    def __init__(self, irq_pin=None, timeout=0.025, **kwargs):
+        self.irq_pin = irq_pin
+        self.timeout = timeout  # The chip's own timer gives up after ~15 ms
+        self._bit_framing = 0x00
+        self._irq_enable = None  # Unknown until written
+        self._irq = threading.Event()
+        # Metrics
+        self.irq_wakeups = 0
+        self.timeouts = 0
+
+        super().__init__(**kwargs)
+        if irq_pin is not None:
+            GPIO.setup(irq_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(irq_pin, GPIO.FALLING, callback=self._on_irq)
+
+    def _on_irq(self, channel):
+        self._irq.set()
+
+    def Write_MFRC522(self, addr, val):
+        if addr == self.BitFramingReg:
+            self._bit_framing = val & 0x7F
+        elif addr == self.CommIEnReg:
+            self._irq_enable = val
+        elif addr == self.CommandReg and val == self.PCD_RESETPHASE:
+            self._bit_framing, self._irq_enable = 0x00, None
+        self.spi.xfer2([(addr << 1) & 0x7E, val])
+
+    # Several registers in one frame: each byte clocks in the next address
+    def read_registers(self, *addrs):
+        frame = [((addr << 1) & 0x7E) | 0x80 for addr in addrs] + [0]
+        return self.spi.xfer2(frame)[1:]
+
+    def write_fifo(self, data):
+        if data:
+            self.spi.xfer2([(self.FIFODataReg << 1) & 0x7E] + list(data))
+
+    def read_fifo(self, n):
+        address = ((self.FIFODataReg << 1) & 0x7E) | 0x80
+        return self.spi.xfer2([address] * n + [0])[1:]
+
+    def MFRC522_ToCard(self, command, sendData):
+        if command == self.PCD_AUTHENT:
+            wait_irq = 0x10  # IdleIRq
+        elif command == self.PCD_TRANSCEIVE:
+            wait_irq = 0x31  # RxIRq | IdleIRq | TimerIRq
+        else:
+            wait_irq = 0x10
+
+        # Only the interrupts waited for drive the IRQ line (IRqInv: active low)
+        if self._irq_enable != wait_irq | 0x80:
+            self.Write_MFRC522(self.CommIEnReg, wait_irq | 0x80)
+        self.Write_MFRC522(self.CommIrqReg, 0x7F)  # Clear every interrupt flag
+        self._irq.clear()
+        self.Write_MFRC522(self.FIFOLevelReg, 0x80)  # Flush
+        self.Write_MFRC522(self.CommandReg, self.PCD_IDLE)
+        self.write_fifo(sendData)
+        self.Write_MFRC522(self.CommandReg, command)
+        if command == self.PCD_TRANSCEIVE:
+            self.Write_MFRC522(self.BitFramingReg, self._bit_framing | 0x80)  # StartSend
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            irq, error, level, control = self.read_registers(
+                self.CommIrqReg, self.ErrorReg, self.FIFOLevelReg, self.ControlReg)
+            if irq & wait_irq:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.timeouts += 1
+                if command == self.PCD_TRANSCEIVE:
+                    self.Write_MFRC522(self.BitFramingReg, self._bit_framing)
+                return (self.MI_ERR, [], 0)
+            if self.irq_pin is not None and self._irq.wait(remaining):
+                self._irq.clear()
+                self.irq_wakeups += 1
+
+        if command == self.PCD_TRANSCEIVE:
+            self.Write_MFRC522(self.BitFramingReg, self._bit_framing)
+
+        if error & 0x1B:
+            return (self.MI_ERR, [], 0)
+        if irq & 0x01 and not irq & 0x30:
+            return (self.MI_NOTAGERR, [], 0)
+        if command != self.PCD_TRANSCEIVE:
+            return (self.MI_OK, [], 0)
+
+        last_bits = control & 0x07
+        back_len = (level - 1) * 8 + last_bits if last_bits else level * 8
+        n = min(max(level, 1), self.MAX_LEN)
+        return (self.MI_OK, self.read_fifo(n), back_len)
+
+    def CalulateCRC(self, pIndata):
+        self.Write_MFRC522(self.DivIrqReg, 0x04)  # Clear CRCIRq
+        self.Write_MFRC522(self.FIFOLevelReg, 0x80)
+        self.write_fifo(pIndata)
+        self.Write_MFRC522(self.CommandReg, self.PCD_CALCCRC)
+        for _ in range(0xFF):
+            div_irq, low, high = self.read_registers(
+                self.DivIrqReg, self.CRCResultRegL, self.CRCResultRegM)
+            if div_irq & 0x04:
+                break
+        return [low, high]
+
+
+# SimpleMFRC522 on top of BurstMFRC522
+class BurstSimpleMFRC522(SimpleMFRC522):
+
+    def __init__(self, irq_pin=None, **kwargs):
+        self.READER = BurstMFRC522(irq_pin=irq_pin, **kwargs)
+
+    # Second half of read_no_block() for a tag read_id_no_block() just found:
+    # select, authenticate and read the text blocks. None if that fails.
+    def read_text(self, uid):
+        reader = self.READER
+        serial = list(uid.to_bytes(5, "big"))  # uid_to_num() packs the 5 anticollision bytes
+        if not reader.MFRC522_SelectTag(serial):
+            return None
+        text = None
+        if reader.MFRC522_Auth(reader.PICC_AUTHENT1A, 11, self.KEY, serial) == reader.MI_OK:
+            data = []
+            for block_num in self.BLOCK_ADDRS:
+                block = reader.MFRC522_Read(block_num)
+                if block is None:
+                    break
+                data += block
+            else:
+                text = ''.join(chr(i) for i in data)
+        reader.MFRC522_StopCrypto1()
+        return text
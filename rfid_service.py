@@ -0,0 +1,221 @@
+import collections
+import json
+import os
+import queue
+import threading
+import time
+
+
+ScanEvent = collections.namedtuple("ScanEvent", "seq uid text timestamp")
+
+
+# Local table of badge display names (UID -> text stored on the tag),
+# kept in a JSON file so names learned once survive restarts. path=None
+# keeps it in memory only.
+class BadgeNames:
+
+    def __init__(self, path=None):
+        self.path = path
+        self._names = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._names = {int(uid): name for uid, name in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                print(f"Badge name table {path} unreadable, starting empty: {e}")
+
+    def __len__(self):
+        return len(self._names)
+
+    def get(self, uid):
+        return self._names.get(uid)
+
+    def learn(self, uid, name):
+        with self._lock:
+            if self._names.get(uid) == name:
+                return
+            self._names[uid] = name
+            if not self.path:
+                return
+            # Write a temporary file and swap it in so a crash never leaves half a table
+            tmp = f"{self.path}.tmp"
+            try:
+                with open(tmp, "w") as f:
+                    json.dump({str(uid): n for uid, n in self._names.items()}, f)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"Could not save badge name table: {e}")
+
+
+# Background MFRC522 scanner.
+# One thread owns the reader and polls it with read_no_block() at a fixed
+# rate, but only while somebody is waiting for a scan (or always, if
+# continuous=True). Scans are published to every waiter through a condition
+# variable and to subscriber queues, so any number of login requests can
+# wait on the same reader without touching SPI themselves.
+#
+# With a BadgeNames table the scanner only reads UIDs (one REQA and one
+# anticollision round) and takes the name from the table; the tag's text
+# blocks are read, and the name learned, only for UIDs the table lacks.
+#
+# A subscriber can ask for a faster poll_interval while it is subscribed
+# (scan-to-count) and for text=False: while no waiter or subscriber needs
+# tag text, every poll is a UID-only read.
+class RfidScanner:
+
+    def __init__(self, reader, poll_interval=0.1, repeat_window=2.0, continuous=False,
+                 names=None):
+        self.reader = reader
+        self.names = names
+        self.poll_interval = poll_interval
+        self.repeat_window = repeat_window  # Same tag held on the reader counts once
+        self.continuous = continuous
+
+        self._cond = threading.Condition()
+        self._demand = threading.Event()
+        self._stop = threading.Event()
+        self._waiters = 0
+        self._subscribers = {}  # queue -> (poll_interval or None, wants text)
+        self._thread = None
+        self.last_event = None
+        self.seq = 0
+
+        self._last_uid = None
+        self._last_seen = 0.0
+
+        # Metrics
+        self.polls = 0
+        self.scans = 0
+        self.errors = 0
+        self.uid_reads = 0   # Named from the table
+        self.text_reads = 0  # Needed the tag's text blocks
+
+    def start(self):
+        if self._thread is None:
+            if self.continuous:
+                self._demand.set()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._demand.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Leave the reader alone while nobody needs a scan
+            self._demand.wait()
+            if self._stop.is_set():
+                break
+            try:
+                uid, text = self._read()
+            except Exception as e:
+                self.errors += 1
+                print(f"RFID read error: {e}")
+                uid, text = None, None
+            self.polls += 1
+            now = time.monotonic()
+            if uid:
+                if uid != self._last_uid or now - self._last_seen > self.repeat_window:
+                    self._publish(uid, text, now)
+                self._last_uid = uid
+                self._last_seen = now
+            self._stop.wait(self._interval())
+
+    def _interval(self):
+        with self._cond:
+            requested = [interval for interval, _ in self._subscribers.values() if interval]
+        return min(requested + [self.poll_interval])
+
+    def _needs_text(self):
+        with self._cond:
+            return self._waiters > 0 or any(text for _, text in self._subscribers.values())
+
+    def _read(self):
+        needs_text = self._needs_text()
+        if self.names is None and needs_text:
+            return self.reader.read_no_block()
+        uid = self.reader.read_id_no_block()
+        if uid is None:
+            return None, None
+        name = self.names.get(uid) if self.names is not None else None
+        if name is not None or not needs_text:
+            self.uid_reads += 1
+            return uid, name or ""
+        self.text_reads += 1
+        if hasattr(self.reader, "read_text"):
+            text = self.reader.read_text(uid)
+        else:
+            uid, text = self.reader.read_no_block()  # Stock driver: start over
+        if uid and text and text.strip():
+            self.names.learn(uid, text.strip())
+        return uid, text
+
+    def _publish(self, uid, text, now):
+        with self._cond:
+            self.seq += 1
+            event = ScanEvent(self.seq, uid, (text or "").strip(), now)
+            self.last_event = event
+            self.scans += 1
+            self._cond.notify_all()
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+    # Block until a scan newer than after_seq arrives, or return None on timeout
+    def wait_for_scan(self, after_seq=None, timeout=10.0):
+        if after_seq is None:
+            after_seq = self.seq
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiters += 1
+            self._demand.set()
+            try:
+                while self.seq <= after_seq:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                return self.last_event
+            finally:
+                self._waiters -= 1
+                if self._waiters == 0 and not self._subscribers and not self.continuous:
+                    self._demand.clear()
+
+    # Queue that receives every scan until unsubscribe(); keeps the reader
+    # polling, every poll_interval seconds if that is faster than the default
+    def subscribe(self, maxsize=1000, poll_interval=None, text=True):
+        q = queue.Queue(maxsize=maxsize)
+        with self._cond:
+            self._subscribers[q] = (poll_interval, text)
+            self._demand.set()
+        return q
+
+    def unsubscribe(self, q):
+        with self._cond:
+            self._subscribers.pop(q, None)
+            if self._waiters == 0 and not self._subscribers and not self.continuous:
+                self._demand.clear()
+
+    def metrics(self):
+        return {
+            "polling": self._demand.is_set(),
+            "waiters": self._waiters,
+            "subscribers": len(self._subscribers),
+            "poll_interval": self._interval(),
+            "polls": self.polls,
+            "scans": self.scans,
+            "errors": self.errors,
+            "uid_reads": self.uid_reads,
+            "text_reads": self.text_reads,
+            "last_scan_age_s": round(time.monotonic() - self.last_event.timestamp, 1)
+            if self.last_event else None,
+        }
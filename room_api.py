@@ -0,0 +1,164 @@
+import json
+import os
+
+from flask import Blueprint, Response, request
+
+
+MAX_BATCH = 1000  # Operations per batch request
+
+
+# Check a batch request body, {"ops": [{"room_id": 1 | "room": "Room 2",
+# "action": "add" | "remove" | "set", "quantity": n}, ...]}, against the
+# registry. Returns the operations in RoomRegistry.update_many() form plus
+# one error message (or None) per operation.
+def parse_batch(rooms, payload):
+    ops = payload.get("ops") if isinstance(payload, dict) else None
+    if not isinstance(ops, list) or not ops:
+        raise ValueError('Expected {"ops": [...]} with at least one operation')
+    if len(ops) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} operations per batch")
+    parsed, errors = [], []
+    for op in ops:
+        try:
+            if not isinstance(op, dict):
+                raise ValueError("Operation must be an object")
+            room_id = rooms.index(op["room"]) if "room" in op else op.get("room_id")
+            if not isinstance(room_id, int) or isinstance(room_id, bool) or room_id not in rooms:
+                raise ValueError("Unknown room")
+            action = op.get("action")
+            quantity = op.get("quantity", 1 if action in ("add", "remove") else None)
+            if not isinstance(quantity, int) or isinstance(quantity, bool):
+                raise ValueError("quantity must be an integer")
+            if action in ("add", "remove"):
+                if not 1 <= quantity <= rooms.max_count:
+                    raise ValueError(f"quantity must be 1-{rooms.max_count}")
+                parsed.append((room_id, "add", quantity if action == "add" else -quantity))
+            elif action == "set":
+                if not 0 <= quantity <= rooms.max_count:
+                    raise ValueError(f"quantity must be 0-{rooms.max_count}")
+                parsed.append((room_id, "set", quantity))
+            else:
+                raise ValueError("action must be add, remove or set")
+            errors.append(None)
+        except ValueError as e:
+            parsed.append(None)
+            errors.append(str(e))
+    return parsed, errors
+
+
+# JSON API over a RoomRegistry for kiosks and polling clients:
+#   GET /rooms                    every room
+#   GET /rooms?start=N&limit=M    a range of room ids
+#   GET /rooms?ids=1,5,9          chosen rooms
+#   GET /rooms/<id>               one room
+#   POST /rooms/batch             several add/remove/set operations, when a
+#                                 batch(ops) function is given
+# Every response carries a strong ETag made of a per-process epoch (room
+# versions restart with the process), the number of rooms and the newest
+# change version among the rooms it covers, so a change to one room only
+# invalidates the responses that include it. A request whose If-None-Match
+# still matches gets a 304 before any JSON is built; otherwise the body is
+# serialised once per ETag and shared by every client asking for it.
+#
+# A batch is all or nothing: if any operation is invalid nothing is applied
+# and the 400 response flags each operation. Valid batches go to
+# batch(ops), which applies them as one change and returns (old, new) per
+# operation.
+def create_api(rooms, name="room_api", cache_size=512, batch=None):
+    api = Blueprint(name, __name__)
+    epoch = os.urandom(4).hex()
+    bodies = {}  # (etag, query) -> JSON bytes
+
+    def error(message, status):
+        return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+    def respond(etag, query, build):
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            body = bodies.get((etag, query))
+            if body is None:
+                body = json.dumps(build(), separators=(",", ":")).encode()
+                if len(bodies) >= cache_size:
+                    bodies.clear()
+                bodies[(etag, query)] = body
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"  # Always revalidate
+        return response
+
+    def rows(room_ids, counts):
+        return [{"id": i, "name": rooms.names[i], "count": counts[i],
+                 "low": counts[i] <= rooms.thresholds[i]} for i in room_ids]
+
+    @api.route("/rooms")
+    def room_list():
+        total = len(rooms)
+        ids = request.args.get("ids")
+        if ids is not None:
+            try:
+                room_ids = sorted({int(i) for i in ids.split(",") if i})
+            except ValueError:
+                return error("ids must be comma-separated room ids", 400)
+            room_ids = [i for i in room_ids if 0 <= i < total]
+            version = max((rooms.versions[i] for i in room_ids), default=0)
+            query = "ids=" + ",".join(map(str, room_ids))
+        else:
+            start = request.args.get("start", 0, type=int)
+            limit = request.args.get("limit", total, type=int)
+            if start < 0 or limit < 0:
+                return error("start and limit must not be negative", 400)
+            end = min(start + limit, total)
+            room_ids = range(start, max(start, end))
+            version = rooms.range_version(start, end)
+            query = f"start={start}&end={end}"
+
+        def build():
+            counts = rooms.snapshot().counts
+            return {"version": version, "total": total,
+                    "rooms": rows([i for i in room_ids if i < len(counts)], counts)}
+
+        return respond(f"{epoch}-{total}-{version}", query, build)
+
+    @api.route("/rooms/<int:room_id>")
+    def room_detail(room_id):
+        if room_id not in rooms:
+            return error("Unknown room", 404)
+
+        version = rooms.versions[room_id]
+
+        def build():
+            room = rows([room_id], rooms.snapshot().counts)[0]
+            room.update(threshold=rooms.thresholds[room_id], version=version)
+            return room
+
+        return respond(f"{epoch}-{version}", f"room={room_id}", build)
+
+    @api.route("/rooms/batch", methods=["POST"])
+    def room_batch():
+        if batch is None:
+            return error("Batch updates are not enabled", 404)
+        try:
+            ops, errors = parse_batch(rooms, request.get_json(silent=True))
+        except ValueError as e:
+            return error(str(e), 400)
+        if any(errors):
+            results = [{"ok": False, "error": e} if e else {"ok": True} for e in errors]
+            return Response(json.dumps({"applied": False, "results": results}),
+                            status=400, mimetype="application/json")
+        results = []
+        for (room_id, _, _), (old, new) in zip(ops, batch(ops)):
+            results.append({"ok": True, "room_id": room_id, "name": rooms.names[room_id],
+                            "old": old, "count": new})
+        return Response(json.dumps({"applied": True, "version": rooms.version,
+                                    "results": results}),
+                        mimetype="application/json")
+
+    return api
+
+
+# Serve the API at /api/v1 and, for the current version, at /api
+def register_api(app, rooms, batch=None):
+    api = create_api(rooms, batch=batch)
+    app.register_blueprint(api, url_prefix="/api/v1")
+    app.register_blueprint(api, url_prefix="/api", name="room_api_latest")
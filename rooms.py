@@ -0,0 +1,210 @@
+import collections
+import re
+import threading
+from array import array
+
+
+MAX_COUNT = 99  # Two-digit display
+
+Snapshot = collections.namedtuple("Snapshot", "version counts")
+
+
+# Natural sort key so "Room 10" comes after "Room 9"
+def natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+# Registry of rooms backed by flat arrays.
+# A room's id is its slot in the arrays (the <room_id> used in the URLs);
+# names map to ids through a dict, so lookups both ways are O(1) and a
+# thousand rooms cost a few kilobytes instead of a dict per room.
+#
+# Flask request threads, the button thread and the sync threads all mutate
+# counts, so every read-modify-write happens under one short lock and bumps
+# a version number. Readers that need a consistent view of all rooms use
+# snapshot(), which is rebuilt at most once per version and then shared
+# without locking. Change listeners run after the lock is released.
+# versions[room_id] is the version of the room's last change, so a reader of
+# a few rooms can tell whether those rooms changed.
+class RoomRegistry:
+
+    def __init__(self, default_threshold=5, max_count=MAX_COUNT):
+        self.default_threshold = default_threshold
+        self.max_count = max_count
+        self.names = []
+        self.counts = array('i')
+        self.thresholds = array('i')
+        self.led_pins = array('b')      # -1 = room has no LED on this device
+        self.warning_pins = array('b')
+        self.versions = array('Q')      # Registry version of each room's last change
+        self.active_room = -1           # Room shown on this device's display
+        self.version = 0
+        self._by_name = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._snapshot = Snapshot(0, ())
+        self._listeners = []
+        self._batch_listeners = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, room_id):
+        return 0 <= room_id < len(self.names)
+
+    def add(self, name, count=0, threshold=None, led_pin=-1, warning_pin=-1):
+        with self._lock:
+            room_id = self._by_name.get(name)
+            if room_id is not None:
+                return room_id
+            room_id = len(self.names)
+            self.counts.append(self._clamp(count))
+            self.thresholds.append(self.default_threshold if threshold is None else threshold)
+            self.led_pins.append(led_pin)
+            self.warning_pins.append(warning_pin)
+            self.names.append(name)
+            self._by_name[name] = room_id
+            self.version += 1
+            self.versions.append(self.version)
+            return room_id
+
+    def index(self, name):
+        return self._by_name.get(name)
+
+    def name(self, room_id):
+        return self.names[room_id]
+
+    def count(self, room_id):
+        return self.counts[room_id]
+
+    def is_low(self, room_id):
+        return self.counts[room_id] <= self.thresholds[room_id]
+
+    def _clamp(self, value):
+        return max(0, min(int(value), self.max_count))
+
+    # Register fn(room_id, old, new) to be called after every count change
+    def subscribe(self, fn):
+        self._listeners.append(fn)
+
+    # Register fn([(room_id, old, new), ...]) to be called once per change
+    # set: one room for set_count/add_count, every changed room for update_many
+    def subscribe_many(self, fn):
+        self._batch_listeners.append(fn)
+
+    def _notify(self, changes):
+        for fn in self._listeners:
+            for room_id, old, new in changes:
+                try:
+                    fn(room_id, old, new)
+                except Exception as e:
+                    print(f"Room change listener error: {e}")
+        for fn in self._batch_listeners:
+            try:
+                fn(changes)
+            except Exception as e:
+                print(f"Room change listener error: {e}")
+
+    # Set a count; local changes are marked dirty for the next Firebase sync.
+    # Returns (old, new).
+    def set_count(self, room_id, value, dirty=True):
+        with self._lock:
+            old = self.counts[room_id]
+            new = self._clamp(value)
+            if new != old:
+                self.counts[room_id] = new
+                self.version += 1
+                self.versions[room_id] = self.version
+                if dirty:
+                    self._dirty.add(room_id)
+        if new != old:
+            self._notify([(room_id, old, new)])
+        return old, new
+
+    # Atomic increment/decrement, clamped to 0..max_count. Returns (old, new).
+    def add_count(self, room_id, delta, dirty=True):
+        with self._lock:
+            old = self.counts[room_id]
+            new = self._clamp(old + delta)
+            if new != old:
+                self.counts[room_id] = new
+                self.version += 1
+                self.versions[room_id] = self.version
+                if dirty:
+                    self._dirty.add(room_id)
+        if new != old:
+            self._notify([(room_id, old, new)])
+        return old, new
+
+    # Apply [(room_id, "add", delta) or (room_id, "set", value), ...] in order
+    # as one change: a single lock hold and version bump, and one listener
+    # call for everything that changed. Rooms with a "set" are marked dirty
+    # when dirty_sets. Returns (old, new) for every operation.
+    def update_many(self, ops, dirty_sets=True):
+        results = []
+        with self._lock:
+            before = {}
+            for room_id, action, value in ops:
+                old = self.counts[room_id]
+                new = self._clamp(old + value if action == "add" else value)
+                before.setdefault(room_id, old)
+                self.counts[room_id] = new
+                if action == "set" and dirty_sets:
+                    self._dirty.add(room_id)
+                results.append((old, new))
+            changes = [(room_id, old, self.counts[room_id])
+                       for room_id, old in before.items() if self.counts[room_id] != old]
+            if changes:
+                self.version += 1
+                for room_id, _, _ in changes:
+                    self.versions[room_id] = self.version
+        if changes:
+            self._notify(changes)
+        return results
+
+    # Consistent copy of every count, shared between readers until the next change
+    def snapshot(self):
+        snap = self._snapshot
+        if snap.version == self.version:
+            return snap
+        with self._lock:
+            if self._snapshot.version != self.version:
+                self._snapshot = Snapshot(self.version, tuple(self.counts))
+            return self._snapshot
+
+    # Latest change version among rooms start..end-1 (0 for an empty range)
+    def range_version(self, start, end):
+        return max(self.versions[start:end], default=0)
+
+    def set_active(self, room_id):
+        # Returns the previously active room
+        with self._lock:
+            previous, self.active_room = self.active_room, room_id
+        return previous
+
+    def mark_dirty(self, room_id):
+        with self._lock:
+            self._dirty.add(room_id)
+
+    def take_dirty(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def hardware_pins(self):
+        # (led_pin, warning_pin) of every room wired to this device
+        return [(self.led_pins[i], self.warning_pins[i])
+                for i in range(len(self.names))
+                if self.led_pins[i] >= 0 or self.warning_pins[i] >= 0]
+
+    # Firebase paths for the given rooms (default: every room)
+    def sync_payload(self, room_ids=None):
+        counts = self.snapshot().counts
+        if room_ids is None:
+            room_ids = range(len(counts))
+        payload = {}
+        for i in room_ids:
+            name = self.names[i]
+            payload[f"Total Items/{name}"] = counts[i]
+            payload[f"Low Stock/{name}"] = counts[i] <= self.thresholds[i]
+        return payload
@@ -0,0 +1,185 @@
+import copy
+import hashlib
+import json
+import queue
+import threading
+import time
+
+
+# In-process stand-in for the Realtime Database, for benchmarks and local runs
+# without credentials. It implements the subset of firebase_admin.db.Reference
+# this app uses (get/set/update/set_if_unchanged/child/listen), with etags
+# derived from the stored value like the real service, and an optional
+# simulated network round trip. As with the real SDK, listener events after
+# the initial one arrive on a separate thread, never inside the write that
+# caused them.
+class EmulatedDatabase:
+
+    def __init__(self, latency=0.0, data=None):
+        self.latency = latency
+        self.data = copy.deepcopy(data) if data else {}
+        self.requests = 0
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._events = queue.Queue()
+        self._event_thread = None
+
+    def reference(self, path='/'):
+        return EmulatedReference(self, path)
+
+    def _round_trip(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _parts(path):
+        return [p for p in path.strip('/').split('/') if p]
+
+    def _get(self, path):
+        node = self.data
+        for part in self._parts(path):
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return copy.deepcopy(node)
+
+    def _set(self, path, value):
+        parts = self._parts(path)
+        if not parts:
+            self.data = copy.deepcopy(value) if isinstance(value, dict) else {}
+        else:
+            node = self.data
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            if value is None:
+                node.pop(parts[-1], None)
+            else:
+                node[parts[-1]] = copy.deepcopy(value)
+        for prefix, callback in list(self._listeners):
+            self._notify(prefix, callback, path, value)
+
+    def _etag(self, path):
+        body = json.dumps(self._get(path), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(body.encode()).hexdigest()
+
+    def _notify(self, prefix, callback, path, value):
+        prefix_parts = self._parts(prefix)
+        parts = self._parts(path)
+        if parts[:len(prefix_parts)] != prefix_parts:
+            return
+        rel = '/' + '/'.join(parts[len(prefix_parts):])
+        if self._event_thread is None:
+            self._event_thread = threading.Thread(target=self._deliver, daemon=True)
+            self._event_thread.start()
+        self._events.put((callback, EmulatedEvent('put', rel, copy.deepcopy(value))))
+
+    def _deliver(self):
+        while True:
+            callback, event = self._events.get()
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Emulated listener error: {e}")
+            finally:
+                self._events.task_done()
+
+    # Block until every listener event queued so far has been delivered
+    def wait_events(self):
+        self._events.join()
+
+
+class EmulatedEvent:
+
+    def __init__(self, event_type, path, data):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class EmulatedListener:
+
+    def __init__(self, db, entry):
+        self._db = db
+        self._entry = entry
+
+    def close(self):
+        with self._db._lock:
+            if self._entry in self._db._listeners:
+                self._db._listeners.remove(self._entry)
+
+
+class EmulatedReference:
+
+    def __init__(self, db, path):
+        self._db = db
+        self.path = '/' + '/'.join(EmulatedDatabase._parts(path))
+
+    @property
+    def key(self):
+        parts = EmulatedDatabase._parts(self.path)
+        return parts[-1] if parts else None
+
+    def child(self, path):
+        return EmulatedReference(self._db, self.path.rstrip('/') + '/' + path)
+
+    def get(self, etag=False, shallow=False):
+        self._db._round_trip()
+        with self._db._lock:
+            value = self._db._get(self.path)
+            if shallow and isinstance(value, dict):
+                value = {k: (v if not isinstance(v, dict) else True) for k, v in value.items()}
+            if etag:
+                return value, self._db._etag(self.path)
+            return value
+
+    def get_if_changed(self, etag):
+        self._db._round_trip()
+        with self._db._lock:
+            current = self._db._etag(self.path)
+            if current == etag:
+                return False, None, None
+            return True, self._db._get(self.path), current
+
+    def set(self, value):
+        if value is None:
+            raise ValueError('Value must not be None.')
+        self._db._round_trip()
+        with self._db._lock:
+            self._db._set(self.path, value)
+
+    def set_if_unchanged(self, expected_etag, value):
+        if value is None:
+            raise ValueError('Value must not be none.')
+        self._db._round_trip()
+        with self._db._lock:
+            current = self._db._etag(self.path)
+            if current != expected_etag:
+                return False, self._db._get(self.path), current
+            self._db._set(self.path, value)
+            return True, value, self._db._etag(self.path)
+
+    def update(self, value):
+        if not value or not isinstance(value, dict):
+            raise ValueError('Value argument must be a non-empty dictionary.')
+        self._db._round_trip()
+        with self._db._lock:
+            for child, child_value in value.items():
+                self._db._set(self.path.rstrip('/') + '/' + child, child_value)
+
+    def transaction(self, transaction_update):
+        data, etag = self.get(etag=True)
+        for _ in range(25):
+            new_data = transaction_update(data)
+            success, data, etag = self.set_if_unchanged(etag, new_data)
+            if success:
+                return new_data
+        raise RuntimeError('Transaction aborted after failed retries.')
+
+    def listen(self, callback):
+        entry = (self.path, callback)
+        with self._db._lock:
+            self._db._listeners.append(entry)
+            value = self._db._get(self.path)
+        callback(EmulatedEvent('put', '/', value))
+        return EmulatedListener(self._db, entry)
@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+
+
+# Scan-to-count: every tagged item scanned on the RFID reader adds (or, in
+# remove mode, takes) one from the room being counted.
+# The counter subscribes to the RfidScanner for UIDs only, polling fast
+# while a session runs. A UID counts once per window seconds, so a tag held
+# on the reader, or swiped twice by mistake, counts once. Counted items are
+# summed per room and handed to apply(room_id, delta) every flush_interval
+# seconds, so a burst of scans reaches the count store and Firebase as one
+# change. ignore(uid) can exclude tags, e.g. staff badges.
+class ScanCounter:
+
+    MODES = {"add": 1, "remove": -1}
+
+    def __init__(self, scanner, apply, window=5.0, flush_interval=0.5, poll_interval=0.02,
+                 ignore=None, clock=time.monotonic):
+        self.scanner = scanner
+        self.apply = apply
+        self.window = window
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.ignore = ignore
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.room_id = None
+        self.mode = "add"
+        self._seen = {}     # uid -> time it last counted
+        self._pending = {}  # room_id -> delta not yet applied
+        self.started_at = None
+
+        # Metrics (current session)
+        self.scans = 0
+        self.counted = 0
+        self.duplicates = 0
+        self.ignored = 0
+        self.flushes = 0
+
+    @property
+    def active(self):
+        return self._thread is not None
+
+    # Count into room_id; switching room or mode of a running session first
+    # applies what was counted so far
+    def start(self, room_id, mode="add"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown scan count mode '{mode}'")
+        with self._lock:
+            switched = (room_id, mode) != (self.room_id, self.mode)
+            self.room_id = room_id
+            self.mode = mode
+        if self._thread is not None and switched:
+            self._apply_pending()
+        if self._thread is None:
+            self.scans = self.counted = self.duplicates = self.ignored = self.flushes = 0
+            self._seen = {}
+            self.started_at = self.clock()
+            self._stop.clear()
+            self._queue = self.scanner.subscribe(poll_interval=self.poll_interval, text=False)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(2.0)
+        self._thread = None
+        self.scanner.unsubscribe(self._queue)
+        self._flush()
+
+    def _run(self):
+        next_flush = self.clock() + self.flush_interval
+        while not self._stop.is_set():
+            try:
+                event = self._queue.get(timeout=max(0.0, next_flush - self.clock()))
+            except queue.Empty:
+                event = None
+            if event is not None:
+                self._count(event.uid, event.timestamp)
+            if self.clock() >= next_flush:
+                self._flush()
+                next_flush = self.clock() + self.flush_interval
+
+    def _count(self, uid, now):
+        self.scans += 1
+        if self.ignore is not None and self.ignore(uid):
+            self.ignored += 1
+            return
+        last = self._seen.get(uid)
+        if last is not None and now - last < self.window:
+            self.duplicates += 1
+            return
+        self._seen[uid] = now
+        with self._lock:
+            room_id = self.room_id
+            self._pending[room_id] = self._pending.get(room_id, 0) + self.MODES[self.mode]
+        self.counted += 1
+
+    # Hand the counted deltas to apply(); safe from any thread
+    def _apply_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for room_id, delta in pending.items():
+            if delta:
+                try:
+                    self.apply(room_id, delta)
+                except Exception as e:
+                    print(f"Scan count for room {room_id} not applied: {e}")
+        if pending:
+            self.flushes += 1
+
+    def _flush(self):
+        self._apply_pending()
+        # Forget UIDs whose window has passed
+        cutoff = self.clock() - self.window
+        self._seen = {uid: t for uid, t in self._seen.items() if t >= cutoff}
+
+    def metrics(self):
+        elapsed = self.clock() - self.started_at if self.started_at is not None else 0
+        return {
+            "active": self.active,
+            "room_id": self.room_id,
+            "mode": self.mode,
+            "window_s": self.window,
+            "scans": self.scans,
+            "counted": self.counted,
+            "duplicates": self.duplicates,
+            "ignored": self.ignored,
+            "flushes": self.flushes,
+            "pending": sum(self._pending.values()),
+            "scans_per_s": round(self.scans / elapsed, 2) if elapsed else None,
+        }
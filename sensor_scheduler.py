@@ -0,0 +1,252 @@
+import collections
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+SensorStats = collections.namedtuple("SensorStats", "name pin model slot")
+
+
+# Staggered polling of many DHT sensors.
+# Sensors are spread evenly over the slots of a time wheel that turns once
+# per period, so reads are spaced out instead of bunching up. The reads
+# themselves (timing-critical pulse capture that holds a CPU for ~250 ms)
+# happen one at a time in a separate capture process, "python
+# sensor_scheduler.py --worker <backend>", which talks JSON lines over its
+# stdin/stdout. The web process only dispatches requests and files results,
+# and a crashed capture process is restarted.
+#
+# sensors: {name: (bcm_pin, "DHT11" | "DHT22")}
+# on_reading(name, temperature, humidity, read_ms, error, t) gets every result.
+class SensorScheduler:
+
+    def __init__(self, sensors, on_reading=None, period=None, slot=0.3,
+                 backend=None, timeout=3.0, min_interval=2.0):
+        self.on_reading = on_reading
+        self.slot = slot
+        # Default: every sensor read once per period, the capture process
+        # busy at most half the time, never faster than the sensors allow
+        self.period = period or max(min_interval, 2 * len(sensors) * slot)
+        self.slots = max(1, round(self.period / slot))
+        self.backend = backend
+        self.timeout = timeout
+
+        names = list(sensors)
+        self.sensors = {}
+        self.wheel = [[] for _ in range(self.slots)]
+        for i, name in enumerate(names):
+            pin, model = sensors[name]
+            slot_index = i * self.slots // len(names)
+            self.sensors[name] = SensorStats(name, pin, model, slot_index)
+            self.wheel[slot_index].append(name)
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = {}  # name -> monotonic time the read was requested
+        self._process = None
+        self._threads = []
+
+        # Per-sensor metrics
+        self._reads = collections.Counter()
+        self._failures = collections.Counter()
+        self._timeouts = collections.Counter()
+        self._skipped = collections.Counter()
+        self._latency = {name: collections.deque(maxlen=100) for name in names}     # Capture time
+        self._turnaround = {name: collections.deque(maxlen=100) for name in names}  # Request to result
+        self._last_error = {}
+        self.restarts = 0
+        self.ticks = 0
+
+    def start(self):
+        if not self._threads:
+            self._spawn()
+            self._threads = [threading.Thread(target=self._turn, daemon=True)]
+            self._threads[0].start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(2.0)
+        self._threads = []
+        if self._process is not None:
+            self._process.stdin.close()
+            try:
+                self._process.wait(2.0)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+
+    def _spawn(self):
+        args = [sys.executable, os.path.abspath(__file__), "--worker"]
+        if self.backend:
+            args.append(self.backend)
+        self._process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         text=True, bufsize=1)
+        reader = threading.Thread(target=self._read_results, args=(self._process,), daemon=True)
+        reader.start()
+
+    # Time wheel: one slot per tick, on absolute deadlines
+    def _turn(self):
+        next_tick = time.monotonic()
+        slot_index = 0
+        while not self._stop.is_set():
+            self.ticks += 1
+            self._expire()
+            for name in self.wheel[slot_index]:
+                self._request(name)
+            slot_index = (slot_index + 1) % self.slots
+            next_tick += self.slot
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def _request(self, name):
+        sensor = self.sensors[name]
+        with self._lock:
+            if name in self._in_flight:
+                self._skipped[name] += 1  # Last read still queued or running
+                return
+            self._in_flight[name] = time.monotonic()
+        request = {"name": name, "pin": sensor.pin, "model": sensor.model}
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError, OSError):
+            self._restart()
+
+    # Reads the capture process never answered count as failures
+    def _expire(self):
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            # A request waits behind the others in the process: allow for them
+            limit = self.timeout + self.slot * len(self._in_flight)
+            for name, since in list(self._in_flight.items()):
+                if now - since > limit:
+                    del self._in_flight[name]
+                    expired.append((name, since))
+        for name, since in expired:
+            self._timeouts[name] += 1
+            self._finish(name, None, None, (now - since) * 1000, "timeout")
+        if expired and self._process.poll() is not None:
+            self._restart()
+
+    def _restart(self):
+        with self._lock:
+            if self._stop.is_set() or (self._process and self._process.poll() is None):
+                return
+            self._in_flight.clear()
+            self.restarts += 1
+        print("Sensor capture process exited, restarting")
+        self._spawn()
+
+    def _read_results(self, process):
+        for line in process.stdout:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            name = result["name"]
+            with self._lock:
+                since = self._in_flight.pop(name, None)
+            if since is None:
+                continue  # Already timed out
+            self._turnaround[name].append((time.monotonic() - since) * 1000)
+            self._finish(name, result.get("temperature"), result.get("humidity"),
+                         result["read_ms"], result.get("error"), result.get("t"))
+        if not self._stop.is_set():
+            self._restart()
+
+    def _finish(self, name, temperature, humidity, read_ms, error, t=None):
+        self._reads[name] += 1
+        self._latency[name].append(read_ms)
+        if error is not None:
+            self._failures[name] += 1
+            self._last_error[name] = error
+        if self.on_reading is not None:
+            try:
+                self.on_reading(name, temperature, humidity, read_ms, error, t)
+            except Exception as e:
+                print(f"Sensor reading handler error: {e}")
+
+    def metrics(self):
+        sensors = {}
+        for name, sensor in self.sensors.items():
+            reads = self._reads[name]
+            latency = sorted(self._latency[name])
+            turnaround = sorted(self._turnaround[name])
+            sensors[name] = {
+                "pin": sensor.pin,
+                "model": sensor.model,
+                "slot": sensor.slot,
+                "reads": reads,
+                "failures": self._failures[name],
+                "success_rate": round(1 - self._failures[name] / reads, 3) if reads else None,
+                "timeouts": self._timeouts[name],
+                "skipped": self._skipped[name],
+                "latency_ms": {
+                    "read_p50": round(latency[len(latency) // 2], 1),
+                    "read_max": round(latency[-1], 1),
+                    "turnaround_p50": round(turnaround[len(turnaround) // 2], 1),
+                    "turnaround_max": round(turnaround[-1], 1),
+                } if latency and turnaround else None,
+                "last_error": self._last_error.get(name),
+            }
+        return {
+            "period_s": round(self.period, 2),
+            "slots": self.slots,
+            "ticks": self.ticks,
+            "restarts": self.restarts,
+            "in_flight": len(self._in_flight),
+            "sensors": sensors,
+        }
+
+
+# Capture process: owns every DHT driver object and reads one sensor at a
+# time. With a spare core it pins itself to the last one at real-time
+# priority so the pulse timing holds up; on a single core that would stall
+# the web process for a whole read, so it stays a normal process there.
+def worker_main(backend=None):
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    sys.stdout = sys.stderr  # Stray prints must not corrupt the protocol
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if len(cpus) > 1:
+        try:
+            os.sched_setaffinity(0, {cpus[-1]})
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(20))
+        except (PermissionError, OSError):
+            pass
+
+    import hal
+    hardware = hal.load(backend)
+    drivers = {}
+    for line in sys.stdin:
+        request = json.loads(line)
+        key = (request["pin"], request["model"])
+        result = {"name": request["name"]}
+        start = time.monotonic()
+        try:
+            sensor = drivers.get(key)
+            if sensor is None:
+                sensor = drivers[key] = (hardware.dht22 if request["model"] == "DHT22"
+                                         else hardware.dht11)(request["pin"])
+            result["temperature"] = sensor.temperature
+            result["humidity"] = sensor.humidity
+        except Exception as e:
+            result["error"] = str(e)
+        result["read_ms"] = (time.monotonic() - start) * 1000
+        result["t"] = time.time()
+        protocol.write(json.dumps(result) + "\n")
+    for sensor in drivers.values():
+        sensor.exit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        worker_main(sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,235 @@
+import statistics
+import threading
+import time
+from array import array
+
+
+# Fixed-size ring of (timestamp, temperature, humidity) samples backed by
+# three preallocated array('d') columns: appending never allocates, and an
+# hour of 2 s samples costs about 40 KB.
+class SampleRing:
+
+    def __init__(self, capacity=1800):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.temperatures = array('d', bytes(8 * capacity))
+        self.humidities = array('d', bytes(8 * capacity))
+        self.head = 0  # Next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, t, temperature, humidity):
+        i = self.head
+        self.times[i] = t
+        self.temperatures[i] = temperature
+        self.humidities[i] = humidity
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    # Newest n samples, oldest first: [(t, temperature, humidity), ...]
+    def last(self, n):
+        n = min(n, self.size)
+        out = []
+        for k in range(n, 0, -1):
+            i = (self.head - k) % self.capacity
+            out.append((self.times[i], self.temperatures[i], self.humidities[i]))
+        return out
+
+    def since(self, t0):
+        samples = self.last(self.size)
+        for k, sample in enumerate(samples):
+            if sample[0] >= t0:
+                return samples[k:]
+        return []
+
+
+# Running min/max/mean of one minute of accepted samples
+class MinuteAggregate:
+
+    def __init__(self, minute):
+        self.minute = minute
+        self.samples = 0
+        self.t_min = self.h_min = float('inf')
+        self.t_max = self.h_max = float('-inf')
+        self.t_sum = self.h_sum = 0.0
+
+    def add(self, temperature, humidity):
+        self.samples += 1
+        self.t_min = min(self.t_min, temperature)
+        self.t_max = max(self.t_max, temperature)
+        self.t_sum += temperature
+        self.h_min = min(self.h_min, humidity)
+        self.h_max = max(self.h_max, humidity)
+        self.h_sum += humidity
+
+    def key(self):
+        return time.strftime("%Y%m%dT%H%M", time.localtime(self.minute * 60))
+
+    def value(self):
+        return {
+            "samples": self.samples,
+            "temperature": {"min": self.t_min, "max": self.t_max,
+                            "mean": round(self.t_sum / self.samples, 2)},
+            "humidity": {"min": self.h_min, "max": self.h_max,
+                         "mean": round(self.h_sum / self.samples, 2)},
+        }
+
+
+# Background sampler for one DHT11/DHT22.
+# Reads the sensor no faster than its minimum interval, keeps the raw
+# readings in a SampleRing and reports the median of the last few as the
+# current value. A reading further than max_jump from that median is an
+# outlier (a DHT glitch): it is stored, so a real step change wins once it
+# persists, but kept out of the aggregates. Accepted readings are folded
+# into per-minute min/max/mean; finished minutes are handed to publish() in
+# batches of publish_minutes, one multi-path write per batch.
+class SensorSampler:
+
+    def __init__(self, sensor, name, interval=2.0, min_interval=1.0, capacity=1800,
+                 window=5, max_jump=(5.0, 15.0), publish=None, publish_minutes=5,
+                 prefix="Environment", clock=time.time):
+        self.sensor = sensor
+        self.name = name
+        self.interval = max(interval, min_interval)  # DHT11: at most one read per second
+        self.window = window
+        self.max_jump = max_jump  # (degrees C, % RH)
+        self.publish = publish
+        self.publish_minutes = publish_minutes
+        self.prefix = prefix
+        self.clock = clock
+
+        self.ring = SampleRing(capacity)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._minute = None
+        self._finished = []  # MinuteAggregates waiting to be published
+        self._latest = None  # (t, temperature, humidity) after filtering
+
+        # Metrics
+        self.reads = 0
+        self.failures = 0
+        self.outliers = 0
+        self.published = 0
+        self.last_read_ms = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, flush=True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        if flush:
+            with self._lock:
+                if self._minute is not None and self._minute.samples:
+                    self._finished.append(self._minute)
+                    self._minute = None
+            self._publish(force=True)
+
+    def _run(self):
+        next_read = time.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+            # Fixed cadence: a slow or failed read does not push later reads back
+            next_read += self.interval
+            delay = next_read - time.monotonic()
+            if delay < 0:
+                next_read = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    # One read of the sensor; returns True if it produced a reading
+    def sample(self):
+        start = time.monotonic()
+        temperature = humidity = error = None
+        try:
+            temperature = self.sensor.temperature
+            humidity = self.sensor.humidity
+        except RuntimeError as e:
+            error = str(e)  # Checksum errors and missed pulses are routine for DHT sensors
+        except Exception as e:
+            error = str(e)
+            print(f"DHT sensor {self.name} error: {e}")
+        return self.record(temperature, humidity, (time.monotonic() - start) * 1000, error)
+
+    # Account for one read done here or elsewhere (e.g. the sensor scheduler)
+    def record(self, temperature, humidity, read_ms, error=None, t=None):
+        self.reads += 1
+        self.last_read_ms = read_ms
+        if error is not None or temperature is None or humidity is None:
+            self.failures += 1
+            return False
+        self.add(self.clock() if t is None else t, float(temperature), float(humidity))
+        return True
+
+    def add(self, t, temperature, humidity):
+        with self._lock:
+            recent = self.ring.last(self.window)
+            outlier = False
+            if len(recent) >= 3:
+                t_med = statistics.median(s[1] for s in recent)
+                h_med = statistics.median(s[2] for s in recent)
+                outlier = (abs(temperature - t_med) > self.max_jump[0] or
+                           abs(humidity - h_med) > self.max_jump[1])
+            self.ring.append(t, temperature, humidity)
+            recent = self.ring.last(self.window)
+            self._latest = (t, statistics.median(s[1] for s in recent),
+                            statistics.median(s[2] for s in recent))
+            if outlier:
+                self.outliers += 1
+                return
+            minute = int(t // 60)
+            if self._minute is None or self._minute.minute != minute:
+                if self._minute is not None:
+                    self._finished.append(self._minute)
+                self._minute = MinuteAggregate(minute)
+            self._minute.add(temperature, humidity)
+        self._publish()
+
+    def _publish(self, force=False):
+        with self._lock:
+            if not self._finished or (len(self._finished) < self.publish_minutes and not force):
+                return
+            batch, self._finished = self._finished, []
+        if self.publish is not None:
+            self.publish({f"{self.prefix}/{self.name}/{m.key()}": m.value() for m in batch})
+        self.published += len(batch)
+
+    # Current filtered values, served straight from memory
+    def latest(self):
+        with self._lock:
+            latest = self._latest
+            raw = self.ring.last(1)
+        if latest is None:
+            return {"name": self.name, "temperature": None, "humidity": None}
+        return {
+            "name": self.name,
+            "temperature": round(latest[1], 1),
+            "humidity": round(latest[2], 1),
+            "raw": {"temperature": raw[0][1], "humidity": raw[0][2]},
+            "age_s": round(self.clock() - latest[0], 1),
+        }
+
+    def history(self, seconds):
+        with self._lock:
+            samples = self.ring.since(self.clock() - seconds)
+        return [{"t": t, "temperature": temp, "humidity": hum} for t, temp, hum in samples]
+
+    def metrics(self):
+        return {
+            "reads": self.reads,
+            "failures": self.failures,
+            "success_rate": round(1 - self.failures / self.reads, 3) if self.reads else None,
+            "outliers": self.outliers,
+            "buffered": len(self.ring),
+            "minutes_published": self.published,
+            "minutes_pending": len(self._finished),
+            "last_read_ms": round(self.last_read_ms, 1),
+        }
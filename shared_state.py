@@ -0,0 +1,334 @@
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+
+import sysv_ipc
+
+
+# System V IPC keys shared by the hardware daemon and the web workers
+SHM_KEY = 0x1A7E0001
+SEM_KEY = 0x1A7E0002
+MSG_KEY = 0x1A7E0003
+REVOKED_KEY = 0x1A7E0004
+REVOKED_SEM_KEY = 0x1A7E0005
+
+MAX_ROOMS = 4096
+NAME_BYTES = 32
+MAGIC = 0x524F4F4D  # "ROOM"
+COMMAND = 1  # Message type of worker -> daemon commands; replies use the worker's pid
+MAX_MESSAGE = 8192  # Bytes per command or reply, on both ends of the queue
+BATCH_OPS = 200  # Batch operations per command; the ops and their results fit in MAX_MESSAGE
+
+HEADER = struct.Struct("=IIIi")  # magic, version, rooms, active room
+ROOM = struct.Struct(f"=ii{NAME_BYTES}s")  # count, threshold, name
+REVOKED_HEADER = struct.Struct("=IQ")  # magic, revocations ever appended
+SID_BYTES = 16  # user_sessions ids are 16 random bytes in hex
+
+
+class IpcError(Exception):
+    pass
+
+
+# Room counts in a shared memory segment, guarded by a semaphore.
+# The hardware daemon is the only writer: it publishes the registry once
+# and then each count change as it happens, bumping the version in the
+# header. Web workers keep a local RoomRegistry replica and copy the table
+# only when the version moved, so a request normally costs one 16-byte read.
+class SharedCounts:
+
+    def __init__(self, create=False, key=SHM_KEY, sem_key=SEM_KEY, max_rooms=MAX_ROOMS):
+        self.max_rooms = max_rooms
+        size = HEADER.size + ROOM.size * max_rooms
+        try:
+            if create:
+                self._shm = sysv_ipc.SharedMemory(key, sysv_ipc.IPC_CREAT, mode=0o600, size=size)
+                self._sem = sysv_ipc.Semaphore(sem_key, sysv_ipc.IPC_CREAT, mode=0o600,
+                                               initial_value=1)
+            else:
+                self._shm = sysv_ipc.SharedMemory(key)
+                self._sem = sysv_ipc.Semaphore(sem_key)
+        except sysv_ipc.ExistentialError as e:
+            raise IpcError(f"Hardware daemon is not running: {e}")
+        self._sem.undo = True  # A process killed inside the lock releases it
+        self.version = 0
+        self.rooms = 0
+        self.active = -1
+        if create:
+            self._write_header()
+
+    def _write_header(self):
+        self._shm.write(HEADER.pack(MAGIC, self.version, self.rooms, self.active), 0)
+
+    # Daemon side
+
+    # Whole table: at startup and whenever rooms were added
+    def publish(self, registry):
+        counts = registry.snapshot().counts
+        rooms = min(len(counts), self.max_rooms)
+        body = b"".join(
+            ROOM.pack(counts[i], registry.thresholds[i],
+                      registry.names[i].encode()[:NAME_BYTES])
+            for i in range(rooms))
+        with self._sem:
+            self._shm.write(body, HEADER.size)
+            self.version += 1
+            self.rooms = rooms
+            self.active = registry.active_room
+            self._write_header()
+
+    def publish_count(self, registry, room_id):
+        self.publish_counts(registry, [room_id])
+
+    # Called from the registry's change hook. Counts are read inside the
+    # lock, so whichever of two racing changes publishes last writes the
+    # latest; a batch goes out under one lock hold and version, so readers
+    # never see half of it
+    def publish_counts(self, registry, room_ids):
+        if any(room_id >= self.rooms for room_id in room_ids):
+            self.publish(registry)
+            return
+        with self._sem:
+            for room_id in room_ids:
+                self._shm.write(struct.pack("=i", registry.counts[room_id]),
+                                HEADER.size + ROOM.size * room_id)
+            self.version += 1
+            self._write_header()
+
+    def publish_active(self, room_id):
+        with self._sem:
+            self.version += 1
+            self.active = room_id
+            self._write_header()
+
+    # Worker side
+
+    # Copy the table into a local registry if it changed; True when it did
+    def sync_into(self, registry):
+        with self._sem:
+            magic, version, rooms, active = HEADER.unpack(self._shm.read(HEADER.size, 0))
+            if version == self.version:
+                return False
+            body = self._shm.read(ROOM.size * rooms, HEADER.size) if rooms else b""
+        if magic != MAGIC:
+            raise IpcError("Shared count segment is not initialised")
+        ops = []
+        for room_id, (count, threshold, name) in enumerate(ROOM.iter_unpack(body)):
+            if room_id >= len(registry):
+                registry.add(name.rstrip(b"\0").decode(), count, threshold)
+            elif registry.counts[room_id] != count:
+                ops.append((room_id, "set", count))
+        if ops:
+            registry.update_many(ops, dirty_sets=False)  # One change per published version
+        registry.set_active(active)
+        self.version, self.rooms, self.active = version, rooms, active
+        return True
+
+    def detach(self):
+        self._shm.detach()
+
+    # Daemon shutdown: drop the segment and semaphore
+    def remove(self):
+        self._shm.detach()
+        self._shm.remove()
+        self._sem.remove()
+
+
+# Logged-out session ids, shared by the web workers so a logout on one
+# worker also refuses the cookie on the others (user_sessions.SessionStore
+# revocations). A ring of the latest `slots` ids plus a running total in a
+# shared memory segment created by the hardware daemon; each worker appends
+# its logouts and reads the ids appended since it last looked, which is one
+# header read when nothing changed. A worker that falls more than `slots`
+# ids behind misses the oldest ones; at 1024 that means 1024 logouts
+# between two requests.
+class SharedRevocations:
+
+    def __init__(self, create=False, key=REVOKED_KEY, sem_key=REVOKED_SEM_KEY, slots=1024):
+        self.slots = slots
+        size = REVOKED_HEADER.size + SID_BYTES * slots
+        try:
+            if create:
+                self._shm = sysv_ipc.SharedMemory(key, sysv_ipc.IPC_CREAT, mode=0o600, size=size)
+                self._sem = sysv_ipc.Semaphore(sem_key, sysv_ipc.IPC_CREAT, mode=0o600,
+                                               initial_value=1)
+            else:
+                self._shm = sysv_ipc.SharedMemory(key)
+                self._sem = sysv_ipc.Semaphore(sem_key)
+        except sysv_ipc.ExistentialError as e:
+            raise IpcError(f"Hardware daemon is not running: {e}")
+        self._sem.undo = True
+        if create:
+            self._shm.write(REVOKED_HEADER.pack(MAGIC, 0), 0)
+            self._seen = 0
+        else:
+            # Start with every id still in the ring
+            self._seen = max(0, self._total() - slots)
+
+    def _total(self):
+        magic, total = REVOKED_HEADER.unpack(self._shm.read(REVOKED_HEADER.size, 0))
+        if magic != MAGIC:
+            raise IpcError("Shared revocation segment is not initialised")
+        return total
+
+    def append(self, sid):
+        with self._sem:
+            total = self._total()
+            self._shm.write(bytes.fromhex(sid),
+                            REVOKED_HEADER.size + SID_BYTES * (total % self.slots))
+            self._shm.write(REVOKED_HEADER.pack(MAGIC, total + 1), 0)
+
+    # Ids appended since the last call, oldest first
+    def read_new(self):
+        with self._sem:
+            total = self._total()
+            if total == self._seen:
+                return []
+            missed = total - self._seen - self.slots
+            if missed > 0:
+                print(f"Missed {missed} session revocations")
+            first = max(self._seen, total - self.slots)
+            sids = [self._shm.read(SID_BYTES, REVOKED_HEADER.size + SID_BYTES * (i % self.slots))
+                    for i in range(first, total)]
+            self._seen = total
+        return [sid.hex() for sid in sids]
+
+    def detach(self):
+        self._shm.detach()
+
+    def remove(self):
+        self._shm.detach()
+        self._shm.remove()
+        self._sem.remove()
+
+
+# Worker -> daemon commands over a System V message queue.
+# A command is a JSON object {"op", "id", "reply", ...}. Fire-and-forget
+# commands have reply 0; otherwise the daemon answers on message type
+# "reply" (the worker's pid) and one reader thread per worker hands each
+# answer to the request thread waiting for that id.
+class CommandClient:
+
+    def __init__(self, key=MSG_KEY, max_message_size=MAX_MESSAGE):
+        try:
+            # Receive buffer as large as the daemon's replies may be
+            self._queue = sysv_ipc.MessageQueue(key, max_message_size=max_message_size)
+        except sysv_ipc.ExistentialError as e:
+            raise IpcError(f"Hardware daemon is not running: {e}")
+        self._pid = os.getpid()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._waiting = {}  # id -> [Event, result]
+        self._reader = threading.Thread(target=self._read_replies, daemon=True)
+        self._reader.start()
+
+    def _send(self, op, reply, args):
+        command = dict(args, op=op, id=next(self._ids), reply=reply)
+        try:
+            # Never block a request on a full queue (daemon stopped or wedged)
+            self._queue.send(json.dumps(command), block=False, type=COMMAND)
+        except sysv_ipc.BusyError:
+            raise IpcError("Hardware daemon is not accepting commands")
+        except (sysv_ipc.Error, ValueError) as e:  # ValueError: larger than a message
+            raise IpcError(f"Could not send '{op}' to hardware daemon: {e}")
+        return command["id"]
+
+    def send(self, op, **args):
+        self._send(op, 0, args)
+
+    # Send a command and wait for its result
+    def call(self, op, timeout=5.0, **args):
+        done = threading.Event()
+        slot = [done, None]
+        with self._lock:
+            command_id = self._send(op, self._pid, args)
+            self._waiting[command_id] = slot
+        try:
+            if not done.wait(timeout):
+                raise IpcError(f"No answer from hardware daemon for '{op}'")
+        finally:
+            with self._lock:
+                self._waiting.pop(command_id, None)
+        answer = slot[1]
+        if "error" in answer:
+            raise IpcError(answer["error"])
+        return answer.get("result")
+
+    # A bad message is logged and skipped; the calls waiting on it time out
+    # instead of every later call on this worker
+    def _read_replies(self):
+        while True:
+            try:
+                message, _ = self._queue.receive(type=self._pid)
+                answer = json.loads(message)
+            except sysv_ipc.ExistentialError:
+                return  # Queue removed: daemon shut down
+            except Exception as e:
+                print(f"Bad reply from hardware daemon: {e}")
+                time.sleep(0.1)
+                continue
+            if not isinstance(answer, dict):
+                continue
+            with self._lock:
+                slot = self._waiting.get(answer.get("id"))
+            if slot is not None:  # Late answers to timed-out calls are dropped
+                slot[1] = answer
+                slot[0].set()
+
+
+# Daemon side of the command queue. Neither receive() nor reply() raises for
+# a bad message: a malformed command is skipped, and a reply that cannot be
+# encoded or does not fit in one message becomes an error reply, so one
+# request can never stop the daemon's command loop.
+class CommandServer:
+
+    def __init__(self, key=MSG_KEY, max_message_size=MAX_MESSAGE):
+        self.max_message_size = max_message_size
+        self._queue = sysv_ipc.MessageQueue(key, sysv_ipc.IPC_CREAT, mode=0o600,
+                                            max_message_size=max_message_size)
+        # Drop commands left over from a previous run
+        while self._queue.current_messages:
+            try:
+                self._queue.receive(block=False)
+            except sysv_ipc.BusyError:
+                break
+
+    def receive(self):
+        while True:
+            message, _ = self._queue.receive(type=COMMAND)
+            try:
+                command = json.loads(message)
+            except ValueError as e:
+                print(f"Dropped malformed command: {e}")
+                continue
+            if isinstance(command, dict) and "op" in command:
+                return command
+            print("Dropped command without an op")
+
+    def reply(self, command, result=None, error=None):
+        if not command.get("reply"):
+            return
+        answer = {"id": command.get("id")}
+        if error is None:
+            answer["result"] = result
+        else:
+            answer["error"] = error
+        try:
+            message = json.dumps(answer).encode()
+        except (TypeError, ValueError) as e:
+            message = json.dumps({"id": answer["id"], "error": f"Unencodable reply: {e}"}).encode()
+        if len(message) > self.max_message_size:
+            message = json.dumps({"id": answer["id"], "error":
+                                  f"Reply too large ({len(message)} bytes, "
+                                  f"limit {self.max_message_size})"}).encode()
+        try:
+            self._queue.send(message, block=False, type=command["reply"])
+        except sysv_ipc.BusyError:
+            print(f"Dropped reply to {command['reply']}: queue full")
+        except (sysv_ipc.Error, ValueError, TypeError) as e:
+            print(f"Dropped reply to {command['reply']}: {e}")
+
+    def remove(self):
+        self._queue.remove()
@@ -0,0 +1,100 @@
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Staged startup with per-phase timings.
+# Import-time work is wrapped in phase() blocks so its cost shows up in the
+# report; slow work (Firebase init, the initial fetch, the RFID reader) runs
+# as background phases so the web server can bind right away. A background
+# phase can wait for others with after=(...); callers that need its result
+# use wait(name, timeout).
+class Startup:
+
+    def __init__(self, workers=4, verbose=True):
+        self.t0 = time.perf_counter()
+        self.verbose = verbose
+        self.phases = {}      # name -> {"start_ms", "duration_ms", "status", "thread"}
+        self.milestones = {}  # name -> ms since t0
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="boot")
+
+    def _ms(self, t):
+        return round((t - self.t0) * 1000, 1)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException as e:
+            status = f"error: {e}"
+            raise
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases[name] = {
+                    "start_ms": self._ms(start),
+                    "duration_ms": round((end - start) * 1000, 1),
+                    "status": status,
+                    "thread": threading.current_thread().name,
+                }
+            if self.verbose:
+                print(f"[boot] {name}: {(end - start) * 1000:.0f} ms ({status})")
+
+    def background(self, name, fn, *args, after=()):
+        def run():
+            for dependency in after:
+                self._tasks[dependency].result()  # Fails too if a dependency failed
+            with self.phase(name):
+                return fn(*args)
+        with self._lock:
+            self._tasks[name] = self._pool.submit(run)
+        return self._tasks[name]
+
+    # Result of a background phase; raises its error or TimeoutError
+    def wait(self, name, timeout=None):
+        return self._tasks[name].result(timeout)
+
+    def ready(self, name):
+        task = self._tasks.get(name)
+        return task is not None and task.done() and task.exception() is None
+
+    def mark(self, name):
+        self.milestones[name] = self._ms(time.perf_counter())
+        if self.verbose:
+            print(f"[boot] {name} at {self.milestones[name]:.0f} ms")
+
+    def report(self):
+        with self._lock:
+            phases = sorted(self.phases.items(), key=lambda item: item[1]["start_ms"])
+        return {
+            "uptime_ms": self._ms(time.perf_counter()),
+            "phases": dict(phases),
+            "milestones": dict(self.milestones),
+            "pending": [name for name, task in self._tasks.items() if not task.done()],
+        }
+
+
+# Stand-in for a database reference whose database is still being set up.
+# The first attribute access waits for the future and then delegates to the
+# real reference, so the sync engines can be built (and journal writes
+# accepted) before Firebase is initialised; only their background threads
+# ever block on it.
+class DeferredReference:
+
+    def __init__(self, database, path='/'):
+        self._database = database
+        self.path = path
+        self._ref = None
+
+    def _resolve(self):
+        if self._ref is None:
+            self._ref = self._database.result().reference(self.path)
+        return self._ref
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
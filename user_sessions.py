@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+
+# One logged-in operator: who they are and the room they are working in
+class UserSession:
+
+    __slots__ = ("sid", "uid", "name", "role", "room_id", "created", "last_seen", "signed_at")
+
+    def __init__(self, sid, uid, name, role, now):
+        self.sid = sid
+        self.uid = uid
+        self.name = name
+        self.role = role
+        self.room_id = -1  # Room this operator has open, -1 on the dashboard
+        self.created = now
+        self.last_seen = now
+        self.signed_at = None  # When its cookie was last signed, None for a new session
+
+
+# Logged-in operators, keyed by a random session id carried in a signed
+# cookie (itsdangerous, with the app's secret key), so each browser gets its
+# own user name and room instead of sharing module globals.
+# Sessions live in memory in least-recently-used order: a lookup is one dict
+# access plus a move to the end, and sessions idle for longer than ttl
+# seconds fall off the front. Past max_sessions the least recently used one
+# is dropped. The cookie is re-signed at most every refresh_interval seconds
+# of activity, so its signature age tracks the idle time as well.
+# With restore, a valid cookie for a session this process does not know
+# (another web worker process created it) recreates it from the identity
+# signed into the cookie; only the room context starts empty.
+# A session that logged out is revoked: its id stays on a denylist for as
+# long as its cookie could still be valid, so the cookie is refused even
+# where restore would accept it. With revocations (shared between the web
+# worker processes, see shared_state.SharedRevocations) every process
+# applies every other process's logouts before looking up a cookie.
+class SessionStore:
+
+    def __init__(self, secret_key, ttl=8 * 3600, max_sessions=10000, refresh_interval=60,
+                 cookie_name="inventory_session", restore=False, revocations=None,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.max_sessions = max_sessions
+        self.cookie_name = cookie_name
+        self.restore = restore
+        self.revocations = revocations
+        self.clock = clock
+        self._serializer = URLSafeTimedSerializer(secret_key, salt="user-session")
+        self._sessions = OrderedDict()  # sid -> UserSession, least recently used first
+        self._revoked = OrderedDict()   # sid -> when its cookie has expired, oldest first
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.created = 0
+        self.restored = 0
+        self.expired = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    def create(self, uid, name, role=None):
+        now = self.clock()
+        session = UserSession(os.urandom(16).hex(), str(uid), name, role, now)
+        with self._lock:
+            self._expire(now)
+            self._sessions[session.sid] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            self.created += 1
+        return session
+
+    # The live session a cookie value refers to, or None
+    def get(self, cookie):
+        if not cookie:
+            return None
+        try:
+            sid, uid, name, role = self._serializer.loads(cookie, max_age=self.ttl)
+        except (BadSignature, ValueError, TypeError):
+            self.rejected += 1
+            return None
+        now = self.clock()
+        if self.revocations is not None:
+            for revoked in self.revocations.read_new():
+                self.revoke(revoked, share=False)
+        with self._lock:
+            self._expire(now)
+            if sid in self._revoked:
+                self.rejected += 1
+                return None
+            session = self._sessions.get(sid)
+            if session is None:
+                if not self.restore:
+                    return None
+                session = UserSession(sid, uid, name, role, now)
+                self._sessions[sid] = session
+                self.restored += 1
+            else:
+                self._sessions.move_to_end(sid)
+            session.last_seen = now
+        return session
+
+    # Log a session out everywhere: drop it and refuse its cookie from now on
+    def remove(self, session):
+        self.revoke(session.sid)
+
+    def revoke(self, sid, share=True):
+        with self._lock:
+            self._sessions.pop(sid, None)
+            self._revoked.pop(sid, None)
+            self._revoked[sid] = self.clock() + self.ttl
+        if share and self.revocations is not None:
+            self.revocations.append(sid)
+
+    def cookie(self, session):
+        session.signed_at = session.last_seen
+        return self._serializer.dumps([session.sid, session.uid, session.name, session.role])
+
+    def needs_cookie(self, session):
+        return session.signed_at is None or \
+            session.last_seen - session.signed_at >= self.refresh_interval
+
+    def _expire(self, now):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_seen <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+        while self._revoked and next(iter(self._revoked.values())) < now:
+            self._revoked.popitem(last=False)
+
+    def metrics(self):
+        return {
+            "active": len(self._sessions),
+            "revoked": len(self._revoked),
+            "ttl_s": self.ttl,
+            "created": self.created,
+            "restored": self.restored,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+        }
+
+
+# Look up the request's session before each request (g.user) and issue,
+# refresh or clear its cookie after it. Publicly cacheable responses (hashed assets)
+# never carry a cookie.
+def register_sessions(app, store):
+
+    @app.before_request
+    def load_user():
+        g.user = store.get(request.cookies.get(store.cookie_name))
+
+    @app.after_request
+    def save_user(response):
+        if response.cache_control.public:
+            return response
+        user = g.get("user")
+        if user is not None:
+            if store.needs_cookie(user):
+                response.set_cookie(store.cookie_name, store.cookie(user), max_age=store.ttl,
+                                    httponly=True, samesite="Lax")
+        elif request.cookies.get(store.cookie_name):
+            response.delete_cookie(store.cookie_name)
+        return response
+
+
+def current_user():
+    return g.get("user")
+
+
+# Start a session for a badge that was just authorized
+def login_user(store, uid, name, role=None):
+    g.user = store.create(uid, name, role)
+    return g.user
+
+
+def logout_user(store):
+    user = g.get("user")
+    if user is not None:
+        store.remove(user)
+    g.user = None
+    return user
@@ -0,0 +1,372 @@
+import threading
+
+from flask import render_template, redirect, request, url_for, jsonify, abort
+from flask_socketio import join_room, leave_room as leave_socket_room
+
+from room_api import register_api
+from user_sessions import current_user, login_user, logout_user
+
+
+# In-process backend: the hardware and Firebase side of main.py, passed in
+# as the module so the parts that come up in the background (RFID reader,
+# scan counter) are looked up when used. main.py serves its routes with it,
+# and hardware_daemon.py executes the web workers' commands with it, so the
+# single-process and multi-process setups run the same actions.
+class LocalBackend:
+
+    errors = ()  # Nothing in between that could be unavailable
+
+    def __init__(self, hw):
+        self.hw = hw
+        self.rooms = hw.rooms
+
+    def _room(self, room_id):
+        room_id = int(room_id)
+        if room_id not in self.rooms:
+            raise ValueError("Unknown room")
+        return room_id
+
+    def refresh(self):
+        pass
+
+    # Wait for a badge on the reader: None when no tag was presented,
+    # otherwise {"uid", "text", "valid"} plus "role" for a valid badge
+    def scan(self, wait=None):
+        hw = self.hw
+        wait = hw.login_scan_timeout if wait is None else float(wait)
+        scan = hw.boot.wait('rfid reader', timeout=wait).wait_for_scan(timeout=wait)
+        if scan is None:
+            return None
+        print(f"Scanned RFID ID: {scan.uid}")
+        badge = hw.badge_store.authorize(scan.uid)
+        hw.badge_store.record(scan.uid, "login", granted=badge is not None)
+        if badge is None:
+            return {"uid": str(scan.uid), "text": scan.text, "valid": False}
+        return {"uid": str(scan.uid), "text": badge.name or scan.text, "valid": True,
+                "role": badge.role}
+
+    def enter(self, room_id):
+        self.hw.activate_room(self._room(room_id))
+
+    def leave(self):
+        self.hw.deactivate_room()
+
+    def update(self, room_id, action, quantity=None):
+        room_id = self._room(room_id)
+        count = self.hw.apply_action(room_id, action, quantity)
+        return {"id": room_id, "count": count, "low": self.rooms.is_low(room_id)}
+
+    def batch(self, ops):
+        return self.hw.apply_batch([(self._room(room_id), action, int(value))
+                                    for room_id, action, value in ops])
+
+    # Start (or switch) a room's scan count session, or stop it; returns the
+    # session's metrics
+    def scan_count(self, action, room_id=None, mode="add"):
+        hw = self.hw
+        if action == "start":
+            counter = hw.boot.wait('scan counter', timeout=hw.login_scan_timeout)
+            counter.start(self._room(room_id), mode)
+            return counter.metrics()
+        if hw.scan_counter is None:
+            return {"ready": False}
+        hw.scan_counter.stop()
+        return hw.scan_counter.metrics()
+
+    # Metrics of the scan session counting into this room, if one is running
+    def scanning(self, room_id):
+        counter = self.hw.scan_counter
+        if counter is not None and counter.active and counter.room_id == room_id:
+            return counter.metrics()
+        return None
+
+    def sync(self):
+        self.hw.refresh_from_firebase()
+
+    def status(self, name, history=0):
+        hw = self.hw
+        return {
+            "cache": hw.inventory_cache.status,
+            "rfid": lambda: hw.rfid_scanner.metrics() if hw.boot.ready('rfid reader')
+            else {"ready": False},
+            "badges": hw.badge_store.metrics,
+            "scan_count": lambda: hw.scan_counter.metrics() if hw.scan_counter is not None
+            else {"ready": False},
+            "display": hw.display.metrics,
+            "sync": hw.sync_status,
+            "boot": hw.boot.report,
+            "environment": lambda: hw.environment_readings(int(history)),
+            "environment_metrics": hw.environment_status_metrics,
+        }[name]()
+
+
+# IPC backend for web_workers.py: actions go to hardware_daemon.py over the
+# command queue, and the rooms are a local replica of the daemon's registry
+# copied from shared memory. attach() connects it in each worker process.
+class DaemonBackend:
+
+    def __init__(self, rooms):
+        # sysv_ipc is only needed (and installed) for the multi-process setup
+        from shared_state import IpcError, BATCH_OPS
+        self.errors = (IpcError,)
+        self.batch_ops = BATCH_OPS
+        self.rooms = rooms
+        self.counts = None
+        self.commands = None
+        self._lock = threading.Lock()
+
+    def attach(self, counts, commands):
+        self.counts = counts
+        self.commands = commands
+        self.refresh()
+
+    # Copy new counts from shared memory; replica changes reach the sockets
+    def refresh(self):
+        with self._lock:
+            self.counts.sync_into(self.rooms)
+
+    def scan(self, wait):
+        return self.commands.call("scan", timeout=wait + 5, wait=wait)
+
+    def enter(self, room_id):
+        self.commands.send("enter", room_id=room_id)
+
+    def leave(self):
+        self.commands.send("leave")
+
+    def update(self, room_id, action, quantity=None):
+        result = self.commands.call("update", room_id=room_id, action=action, quantity=quantity)
+        self.refresh()  # The daemon published the new count before answering
+        return result
+
+    # A batch too large for one command message goes in chunks of BATCH_OPS,
+    # each applied as its own change; if the daemon stops answering midway,
+    # the request fails with a 503 and the chunks already sent stay applied
+    def batch(self, ops):
+        results = []
+        for start in range(0, len(ops), self.batch_ops):
+            results.extend(self.commands.call("batch", ops=ops[start:start + self.batch_ops]))
+        self.refresh()
+        return results
+
+    def scan_count(self, action, room_id=None, mode="add"):
+        return self.commands.call("scan_count", action=action, room_id=room_id, mode=mode)
+
+    # Not asked per page: a room page shows its scan session when the
+    # session is started from it
+    def scanning(self, room_id):
+        return None
+
+    def sync(self):
+        self.commands.call("sync", timeout=30)
+
+    def status(self, name, history=0):
+        return self.commands.call("status", name=name, history=history)
+
+
+# The web UI over a backend: login, dashboard and room pages, count updates
+# (form, Socket.IO and the JSON API), scan counting and the status
+# endpoints. Count changes in the backend's registry reach the dashboards
+# ('counts' for a batch) and the room channels.
+def register_routes(app, socketio, backend, page_cache, sessions, login_scan_timeout=15):
+    rooms = backend.rooms
+    register_api(app, rooms, batch=backend.batch)  # JSON API with ETags for kiosks and polling clients
+
+    def count_message(room_id):
+        return {"id": room_id, "count": rooms.count(room_id), "low": rooms.is_low(room_id)}
+
+    def notify_counts(changes):
+        messages = [count_message(room_id) for room_id, _, _ in changes]
+        if len(messages) > 1:
+            socketio.emit('counts', messages, to='dashboard')
+        for message in messages:
+            if len(messages) == 1:
+                socketio.emit('count', message, to='dashboard')
+            socketio.emit('count', message, to=f'room-{message["id"]}')
+
+    rooms.subscribe_many(notify_counts)
+
+    @app.before_request
+    def refresh():
+        backend.refresh()
+
+    # Render one page of the room dashboard
+    def index_page(user_name):
+        return page_cache.index(request.args.get('page', 1, type=int), user_name)
+
+    def room_page(room_id, scanning=None):
+        if scanning is None:
+            scanning = backend.scanning(room_id)
+        return page_cache.room(room_id, scanning)
+
+    @app.route('/')
+    def login():
+        return render_template('login.html')
+
+    @app.route('/login', methods=['POST'])
+    def rfid_login():
+        try:
+            # Wait for the reader to see a badge
+            scan = backend.scan(login_scan_timeout)
+        except Exception as e:
+            print(f"Error reading RFID: {e}")
+            return render_template('login.html', error="Error reading RFID")
+        if scan is None:
+            return render_template('login.html', error="No RFID tag scanned")
+        if scan["valid"]:
+            user = login_user(sessions, scan["uid"], scan["text"], scan.get("role"))
+            return index_page(user.name)
+        return render_template('login.html', error="Invalid RFID")
+
+    @app.route('/index')
+    def index():
+        user = current_user()
+        if user is None:
+            return redirect(url_for('login'))
+        user.room_id = -1
+        backend.leave()  # No room is active, LEDs off
+        return index_page(user.name)  # Main page after successful login
+
+    @app.route('/enter/<int:room_id>')
+    def enter_room(room_id):
+        if room_id not in rooms:
+            abort(404)
+        backend.enter(room_id)
+        user = current_user()
+        if user is not None:
+            user.room_id = room_id
+        return room_page(room_id)
+
+    @app.route('/update', methods=['POST'])
+    def update():
+        room_id = int(request.form['room_id'])
+        if room_id not in rooms:
+            abort(404)
+        backend.update(room_id, request.form['action'], request.form.get('quantity'))
+        return room_page(room_id)
+
+    @app.route('/logout', methods=['POST'])
+    def logout():
+        user = logout_user(sessions)
+        if user is not None and user.room_id != -1 and user.room_id == rooms.active_room:
+            backend.leave()  # The operator's room should not stay on the display
+        return redirect(url_for('login'))
+
+    @app.route('/leave/<int:room_id>')
+    def leave_room(room_id):
+        return index()
+
+    # Start (or switch the mode of) a scan count session for a room
+    @app.route('/scan-count/<int:room_id>', methods=['POST'])
+    def scan_count_start(room_id):
+        if room_id not in rooms:
+            abort(404)
+        mode = request.form.get('mode', 'add')
+        if mode not in ('add', 'remove'):
+            abort(400)
+        scanning = backend.scan_count("start", room_id=room_id, mode=mode)
+        return room_page(room_id, scanning)
+
+    @app.route('/scan-count/stop', methods=['POST'])
+    def scan_count_stop():
+        backend.scan_count("stop")
+        room_id = request.form.get('room_id', type=int)
+        user = current_user()
+        if room_id is None and user is not None:
+            room_id = user.room_id  # The room this operator has open
+        if room_id is None or room_id not in rooms:
+            return redirect(url_for('index'))
+        return room_page(room_id)
+
+    @app.route('/sync')
+    def sync():
+        backend.sync()
+        return redirect(url_for('index'))
+
+    # Socket clients join 'dashboard' (no room_id) or a single room's channel.
+    # Malformed payloads and unknown rooms are ignored (None)
+    def channel(data):
+        if data is None:
+            return 'dashboard'
+        if not isinstance(data, dict):
+            return None
+        room_id = data.get('room_id')
+        if room_id is None:
+            return 'dashboard'
+        try:
+            room_id = int(room_id)
+        except (TypeError, ValueError):
+            return None
+        return f'room-{room_id}' if room_id in rooms else None
+
+    @socketio.on('subscribe')
+    def on_subscribe(data=None):
+        name = channel(data)
+        if name is not None:
+            join_room(name)
+
+    @socketio.on('unsubscribe')
+    def on_unsubscribe(data=None):
+        name = channel(data)
+        if name is not None:
+            leave_socket_room(name)
+
+    # Add/remove/set over the socket; the ack carries the new count
+    @socketio.on('update')
+    def on_update(data):
+        try:
+            room_id = int(data['room_id'])
+            if room_id not in rooms:
+                return {"error": "Unknown room"}
+            return backend.update(room_id, data['action'], data.get('quantity'))
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid update"}
+        except backend.errors as e:
+            return {"error": str(e)}
+
+    @app.route('/cache/status')
+    def cache_status():
+        return jsonify(backend.status("cache"))
+
+    @app.route('/rfid/status')
+    def rfid_status():
+        return jsonify(backend.status("rfid"))
+
+    @app.route('/scan-count/status')
+    def scan_count_status():
+        return jsonify(backend.status("scan_count"))
+
+    @app.route('/badges/status')
+    def badges_status():
+        return jsonify(backend.status("badges"))
+
+    @app.route('/pages/metrics')
+    def page_metrics():
+        return jsonify(page_cache.metrics())
+
+    @app.route('/sessions/status')
+    def sessions_status():
+        return jsonify(sessions.metrics())
+
+    @app.route('/display/metrics')
+    def display_metrics():
+        return jsonify(backend.status("display"))
+
+    @app.route('/sync/metrics')
+    def sync_metrics():
+        return jsonify(backend.status("sync"))
+
+    # Latest filtered readings; ?history=<seconds> adds raw samples. In the
+    # multi-process setup a long history can outgrow one command reply (503)
+    @app.route('/environment')
+    def environment_status():
+        return jsonify(backend.status("environment",
+                                      history=request.args.get('history', 0, type=int)))
+
+    @app.route('/environment/metrics')
+    def environment_metrics():
+        return jsonify(backend.status("environment_metrics"))
+
+    @app.route('/boot/status')
+    def boot_status():
+        return jsonify(backend.status("boot"))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# Stateless web front end for hardware_daemon.py. Several worker processes
+# accept connections from one shared listening socket, so requests use every
+# core while the daemon stays the only GPIO owner. Each worker keeps a
+# replica of the room counts from shared memory and sends every action to
+# the daemon over the message queue.
+#   python web_workers.py [workers] [port]
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from flask import Flask
+from flask_socketio import SocketIO
+from werkzeug.serving import make_server
+
+from assets import Assets, register_assets
+from page_cache import PageCache
+from user_sessions import SessionStore, register_sessions
+from rooms import RoomRegistry
+from shared_state import SharedCounts, SharedRevocations, CommandClient, IpcError
+from web_routes import DaemonBackend, register_routes
+
+rooms_per_page = 30  # Dashboard pagination
+login_scan_timeout = 15  # Seconds a login request waits for a badge
+watch_interval = 0.05  # Shared-memory check for live socket updates
+
+app = Flask(__name__)
+# Generated before the workers fork, so every worker accepts every cookie
+secret_key = os.environ.get('INVENTORY_SECRET_KEY') or os.urandom(32).hex()
+# A browser's requests may reach any worker; a worker that has not seen a
+# session yet restores it from the signed cookie. Logouts are shared through
+# SharedRevocations (attached in each worker), so no worker restores them
+sessions = SessionStore(secret_key, restore=True)
+register_sessions(app, sessions)
+# Socket.IO long-polling needs every request of a session on the same
+# process; a websocket stays on the worker that accepted it
+socketio = SocketIO(app, async_mode='threading', transports=['websocket'])
+assets = Assets()  # Built by the hardware daemon (main.py) at startup
+register_assets(app, assets)
+
+rooms = RoomRegistry()  # Local replica of the daemon's registry
+# Templates are compiled before the workers fork; each worker caches its own pages
+page_cache = PageCache(app, rooms, rooms_per_page, assets).precompile()
+# Attached to the daemon's IPC objects in each worker. Pages and the JSON
+# API are served from the replica; ETags are per worker process
+backend = DaemonBackend(rooms)
+register_routes(app, socketio, backend, page_cache, sessions, login_scan_timeout)
+
+def watch_counts():
+    while True:
+        time.sleep(watch_interval)
+        try:
+            backend.refresh()
+        except Exception as e:
+            print(f"Shared count read error: {e}")
+
+@app.errorhandler(IpcError)
+def daemon_unavailable(e):
+    print(f"Hardware daemon error: {e}")
+    return "Hardware daemon unavailable", 503
+
+# One worker process: attach to the daemon's IPC objects and serve the
+# shared listening socket
+def serve(host, port, fd):
+    backend.attach(SharedCounts(), CommandClient())
+    sessions.revocations = SharedRevocations()
+    threading.Thread(target=watch_counts, daemon=True).start()
+    make_server(host, port, app, threaded=True, fd=fd).serve_forever()
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    host = '0.0.0.0'
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(128)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(host, port, listener.fileno())
+            except KeyboardInterrupt:
+                pass
+            except IpcError as e:
+                print(e)
+            os._exit(0)
+        children.append(pid)
+    print(f"{workers} web workers on port {port}")
+
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+if __name__ == "__main__":
+    main()